@@ -0,0 +1,9 @@
+"""
+img_editor の処理速度を測るベンチマーク。
+
+    python -m benchmarks.run [--quick] [--output 結果.json] [--baseline 基準.json]
+
+画像と問題JSONのテスト用データ（決まった乱数の種から作るので毎回同じ内容）を作成し、
+一括リサイズ・表示用画像の作成・描画の書き込み・JSONの検索と保存の時間を計測する。
+画面は使わない。
+"""
@@ -0,0 +1,142 @@
+"""
+ベンチマーク用のテストデータ（画像と問題JSON）を作成する。
+乱数の種を固定しているため、同じ設定なら毎回同じ内容になる。作成済みのデータは再利用する。
+"""
+import hashlib
+import json
+import os
+import random
+from PIL import Image, ImageDraw, features
+
+from img_editor.cache_paths import cache_dir
+
+CORPUS_VERSION = 1
+SEED = 20240601
+
+# (幅, 高さ)。横長と縦長の両方を含める
+FULL_SIZES = [(640, 480), (1920, 1080), (4032, 3024), (480, 640), (1080, 1920), (3024, 4032)]
+QUICK_SIZES = [(640, 480), (1920, 1080), (480, 640), (1080, 1920)]
+FORMATS = {"JPEG": ".jpg", "PNG": ".png", "WEBP": ".webp"}
+FULL_RECORDS = 20000
+QUICK_RECORDS = 2000
+
+
+def available_formats():
+    """この環境のPillowで保存できる形式だけを返す"""
+    formats = dict(FORMATS)
+    if not features.check("webp"):
+        del formats["WEBP"]
+    return formats
+
+
+def corpus_spec(quick=False):
+    return {
+        "version": CORPUS_VERSION,
+        "seed": SEED,
+        "sizes": QUICK_SIZES if quick else FULL_SIZES,
+        "copies": 1 if quick else 2,
+        "formats": sorted(available_formats()),
+        "records": QUICK_RECORDS if quick else FULL_RECORDS,
+    }
+
+
+def spec_id(spec):
+    return hashlib.sha1(json.dumps(spec, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+def synthetic_image(width, height, rng):
+    """グラデーションの背景に図形を重ねた画像（メーター写真に近い、細部のある画像）"""
+    gradient = Image.linear_gradient("L")
+    red = gradient.resize((width, height))
+    green = gradient.rotate(90).resize((width, height))
+    blue = gradient.rotate(rng.choice([45, 135, 180])).resize((width, height))
+    img = Image.merge("RGB", (red, green, blue))
+    draw = ImageDraw.Draw(img)
+    scale = max(width, height) / 100
+    for _ in range(60):
+        x1, y1 = rng.randrange(width), rng.randrange(height)
+        x2 = x1 + rng.randrange(1, int(20 * scale) + 2)
+        y2 = y1 + rng.randrange(1, int(20 * scale) + 2)
+        color = (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+        if rng.random() < 0.5:
+            draw.rectangle([x1, y1, x2, y2], fill=color)
+        else:
+            draw.ellipse([x1, y1, x2, y2], outline=color, width=max(int(scale / 2), 1))
+    for _ in range(200):
+        x, y = rng.randrange(width), rng.randrange(height)
+        draw.line([x, y, x + rng.randrange(-50, 50), y + rng.randrange(-50, 50)], fill=(0, 0, 0), width=1)
+    return img
+
+
+def question_record(question_id, type_english, rng):
+    """json_editor の新規データと同じ項目を持つレコード"""
+    return {
+        "id": question_id,
+        "meterImage": f"img/{type_english}/{type_english}_{question_id:03d}.jpg",
+        "multiplier": str(rng.choice([1, 10, 100])),
+        "pulseUnit": "1",
+        "pulseUnitDisplay": "m3/Pulse",
+        "integerDigits": str(rng.randint(4, 6)),
+        "decimalDigits": str(rng.randint(0, 2)),
+        "displayUnit": "m3",
+        "serialNumber": f"SN{rng.randrange(10 ** 8):08d}",
+        "inspectionYear": str(rng.randint(2015, 2025)),
+        "inspectionMonth": str(rng.randint(1, 12)),
+        "displayValue": f"{rng.randrange(10 ** 5):05d}.{rng.randrange(10)}",
+        "explanationImage": f"img/{type_english}/{type_english}_{question_id:03d}_answer.jpg",
+        "explanationText": [f"解説 {question_id}-{i}: 指針は{rng.randrange(1000)}です" for i in range(rng.randint(1, 3))],
+    }
+
+
+def write_question_json(path, count, rng, type_english="water"):
+    data = {"questions": [question_record(i, type_english, rng) for i in range(1, count + 1)]}
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+class Corpus:
+    """作成済みのテストデータの場所と一覧"""
+
+    def __init__(self, root, spec, images):
+        self.root = root
+        self.spec = spec
+        self.id = spec_id(spec)
+        self.images = images  # [{"path", "format", "width", "height"}, ...]
+        self.json_path = os.path.join(root, "questions.json")
+
+    def images_of(self, image_format=None):
+        return [image["path"] for image in self.images if image_format is None or image["format"] == image_format]
+
+
+def ensure_corpus(base_dir=None, quick=False, log=print):
+    """テストデータを作成（作成済みならそのまま）して Corpus を返す"""
+    spec = corpus_spec(quick)
+    root = os.path.join(base_dir or cache_dir("benchmarks"), f"corpus-{spec_id(spec)}")
+    manifest_path = os.path.join(root, "manifest.json")
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("spec") == json.loads(json.dumps(spec)):
+            return Corpus(root, spec, [dict(image, path=os.path.join(root, image["path"])) for image in manifest["images"]])
+    except (OSError, ValueError):
+        pass
+
+    log(f"テストデータを作成しています: {root}")
+    os.makedirs(os.path.join(root, "images"), exist_ok=True)
+    rng = random.Random(spec["seed"])
+    images = []
+    formats = available_formats()
+    for width, height in spec["sizes"]:
+        for copy_index in range(spec["copies"]):
+            img = synthetic_image(width, height, rng)
+            for image_format in spec["formats"]:
+                relpath = os.path.join("images", f"{width}x{height}_{copy_index}{formats[image_format]}")
+                img.save(os.path.join(root, relpath), image_format, **({"quality": 90} if image_format != "PNG" else {}))
+                images.append({"path": relpath, "format": image_format, "width": width, "height": height})
+    write_question_json(os.path.join(root, "questions.json"), spec["records"], rng)
+
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump({"spec": spec, "images": images}, f, ensure_ascii=False, indent=2)
+    return Corpus(root, spec, [dict(image, path=os.path.join(root, image["path"])) for image in images])
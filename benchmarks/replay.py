@@ -0,0 +1,204 @@
+"""
+記録したキャンバス操作（img_editor.interaction_recorder）を描画エディタで再生し、操作ごとの処理時間を計測する。
+画面が必要なので、画面のない環境では仮想Xサーバー（Xvfb）上で実行する。
+
+    xvfb-run -a python -m benchmarks.replay session.jsonl --repeat 5 --output replay.json
+    xvfb-run -a python -m benchmarks.replay session.jsonl --baseline replay_baseline.json
+
+各操作はTkのイベントとして送り（event_generate）、ハンドラーの処理時間と、その後のアイドル処理（キャンバスの再描画）の時間を
+分けて記録する。基準と比べて中央値が tolerance を超えて遅くなった項目があれば終了コード1を返す。
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import sys
+import time
+
+from img_editor.tracing import percentile
+
+from .run import compare
+
+RESULT_VERSION = 1
+TOOLS = {
+    "resize_and_draw": "img_editor.resize_and_draw",
+    "img_draw": "img_editor.img_draw",
+}
+BUTTON1_MASK = 0x100  # ドラッグ中（左ボタンを押したまま）を表す state
+
+
+def load_recording(path):
+    """(ヘッダー, 操作のリスト) を返す"""
+    with open(path, encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    if not lines or "recording" not in lines[0]:
+        raise ValueError(f"操作の記録ファイルではありません: {path}")
+    return lines[0], lines[1:]
+
+
+def open_image(app, path):
+    """エディタに画像を1枚だけ読み込んで表示する"""
+    app.source_folder = os.path.dirname(path)
+    app.image_files = [os.path.basename(path)]
+    app.current_image_index = 0
+    app.display_current_image()
+
+
+def send_event(app, event):
+    kind = event["type"]
+    if kind == "press":
+        app.canvas.event_generate("<Button-1>", x=event["x"], y=event["y"], state=event["state"])
+    elif kind == "motion":
+        app.canvas.event_generate("<Motion>", x=event["x"], y=event["y"], state=event["state"] | BUTTON1_MASK)
+    elif kind == "release":
+        app.canvas.event_generate("<ButtonRelease-1>", x=event["x"], y=event["y"], state=event["state"] | BUTTON1_MASK)
+    elif kind == "return":
+        app.canvas.event_generate("<Return>")
+
+
+class ReplayTimings:
+    def __init__(self):
+        self.handler_ms = {}  # 操作の種類 -> [ハンドラーの処理時間, ...]
+        self.idle_ms = []  # 各操作の後のアイドル処理（再描画）の時間
+        self.update_canvas_ms = []  # update_canvas の呼び出しごとの時間
+        self.wall_ms = 0.0
+
+    def results(self):
+        results = {}
+        for kind, values in sorted(self.handler_ms.items()):
+            results[f"handler.{kind}"] = _stats(values)
+        results["update_canvas"] = _stats(self.update_canvas_ms)
+        results["idle"] = _stats(self.idle_ms)
+        return results
+
+
+def _stats(values):
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "total_ms": sum(values),
+        "median_ms": percentile(values, 0.5),
+        "p90_ms": percentile(values, 0.9),
+        "p99_ms": percentile(values, 0.99),
+        "max_ms": values[-1] if values else 0.0,
+    }
+
+
+def replay(app, root, events, timings, realtime=False):
+    """操作を順に再生して timings に記録する。realtime では記録時と同じ間隔で送る"""
+    start = time.perf_counter()
+    for event in events:
+        if realtime:
+            while (time.perf_counter() - start) * 1000 < event["t"]:
+                root.update()
+                time.sleep(0.001)
+        if event["type"] == "image":
+            # 画像の読み込みは操作の計測に含めない
+            open_image(app, event["path"])
+            root.update()
+            continue
+        t0 = time.perf_counter()
+        send_event(app, event)
+        t1 = time.perf_counter()
+        root.update_idletasks()
+        t2 = time.perf_counter()
+        timings.handler_ms.setdefault(event["type"], []).append((t1 - t0) * 1000)
+        timings.idle_ms.append((t2 - t1) * 1000)
+    timings.wall_ms += (time.perf_counter() - start) * 1000
+
+
+def environment_info(recording_path, header):
+    import PIL
+    return {
+        "python": platform.python_version(),
+        "pillow": PIL.__version__,
+        "platform": platform.platform(),
+        "display": os.environ.get("DISPLAY"),
+        "recording": os.path.basename(recording_path),
+        "tool": header.get("tool"),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="記録したキャンバス操作を再生して処理時間を計測する")
+    parser.add_argument("recording", help="--record で記録したファイル")
+    parser.add_argument("--tool", choices=sorted(TOOLS), help="再生するエディタ（既定は記録したエディタ）")
+    parser.add_argument("--image", help="再生に使う画像（既定は記録時の画像）")
+    parser.add_argument("--repeat", type=int, default=3, help="再生する回数（すべての回の計測をまとめて集計する）")
+    parser.add_argument("--realtime", action="store_true", help="記録時と同じ間隔で操作を送る（既定は間隔を空けずに送る）")
+    parser.add_argument("--output", help="結果を保存するJSONファイル")
+    parser.add_argument("--baseline", help="比較する基準の結果ファイル")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="遅くなったと判定する割合（既定 0.15 = 15%%）")
+    args = parser.parse_args(argv)
+
+    if not os.environ.get("DISPLAY") and sys.platform.startswith("linux"):
+        print("画面（DISPLAY）がありません。xvfb-run -a python -m benchmarks.replay ... のように実行してください", file=sys.stderr)
+        return 2
+
+    header, events = load_recording(args.recording)
+    tool = args.tool or header.get("tool") or "resize_and_draw"
+    image = args.image or header.get("image")
+    if not image or not os.path.exists(image):
+        print(f"再生に使う画像が見つかりません: {image}（--image で指定してください）", file=sys.stderr)
+        return 2
+
+    import tkinter as tk
+    module = importlib.import_module(TOOLS[tool])
+    root = tk.Tk()
+    app = module.ImageEditorApp(root, resume=False)
+    # 再生で作業状態（前回のフォルダと画像）を上書きしない
+    app.store_session = lambda: None
+
+    timings = ReplayTimings()
+    update_canvas = app.update_canvas
+
+    def timed_update_canvas():
+        t0 = time.perf_counter()
+        update_canvas()
+        timings.update_canvas_ms.append((time.perf_counter() - t0) * 1000)
+
+    for i in range(args.repeat):
+        open_image(app, image)
+        # Enter（多角形を閉じる）のキーイベントを受け取れるようにする
+        app.canvas.focus_force()
+        root.update()
+        app.update_canvas = timed_update_canvas
+        replay(app, root, events, timings, realtime=args.realtime)
+        app.update_canvas = update_canvas
+        print(f"再生 {i + 1}/{args.repeat}: {len(events)}件", file=sys.stderr)
+    root.destroy()
+
+    results = {"version": RESULT_VERSION, "environment": environment_info(args.recording, header), "results": timings.results()}
+    results["wall_ms"] = timings.wall_ms
+    print(f"{'項目':<18} {'件数':>6} {'中央値ms':>9} {'p90ms':>9} {'p99ms':>9} {'最大ms':>9} {'合計ms':>10}")
+    for name, stats in results["results"].items():
+        print(
+            f"{name:<18} {stats['count']:>6} {stats['median_ms']:9.3f} {stats['p90_ms']:9.3f} "
+            f"{stats['p99_ms']:9.3f} {stats['max_ms']:9.3f} {stats['total_ms']:10.1f}"
+        )
+    print(f"再生にかかった時間: {timings.wall_ms:.1f}ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"結果を保存しました: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare(results, baseline, args.tolerance)
+        print(f"\n基準との比較（{args.baseline}）:")
+        for name, base_ms, current_ms, ratio, verdict in rows:
+            if ratio is None:
+                print(f"  {name:<18} {'-':>10}  {current_ms:10.3f}ms  {verdict}")
+            else:
+                print(f"  {name:<18} {base_ms:10.3f}ms {current_ms:10.3f}ms  x{ratio:.2f} {verdict}")
+        if any(verdict == "遅くなった" for *_, verdict in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
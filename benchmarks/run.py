@@ -0,0 +1,253 @@
+"""
+ベンチマークを実行し、結果をJSONで保存・基準と比較する。
+
+    python -m benchmarks.run --quick --output results.json
+    python -m benchmarks.run --baseline baseline.json --tolerance 0.15
+
+基準と比べて中央値が tolerance を超えて遅くなった項目があれば終了コード1を返す。
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import PIL
+
+from img_editor.lazy_json import find_question, load_json_file, write_json_file, INDEX_SUFFIX
+from img_editor.rendering import burn_annotations, prepare_display_image, resize_image_file, TARGET_WIDTH
+
+from .corpus import ensure_corpus, available_formats
+
+RESULT_VERSION = 1
+LOOKUP_COUNT = 1000
+
+
+class Benchmark:
+    """計測する処理。setup() は毎回の計測の前に呼ばれ、計測には含めない"""
+
+    def __init__(self, name, run, items, setup=None):
+        self.name = name
+        self.run = run
+        self.items = items  # 1回の実行で処理する件数（1件あたりの時間の計算用）
+        self.setup = setup
+
+
+def resize_benchmarks(corpus, work_dir):
+    benchmarks = []
+    for image_format in sorted(available_formats()):
+        paths = corpus.images_of(image_format)
+        dest_dir = os.path.join(work_dir, "resized", image_format.lower())
+        os.makedirs(dest_dir, exist_ok=True)
+
+        def run(paths=paths, dest_dir=dest_dir):
+            for path in paths:
+                resize_image_file(path, os.path.join(dest_dir, os.path.basename(path)), width=TARGET_WIDTH, quality=95)
+
+        benchmarks.append(Benchmark(f"resize.batch.{image_format.lower()}", run, len(paths)))
+    return benchmarks
+
+
+def display_benchmarks(corpus, work_dir):
+    paths = corpus.images_of()
+
+    def run_original():
+        for path in paths:
+            img, _ = prepare_display_image(path)
+            img.close()
+
+    def run_resized():
+        for path in paths:
+            img, _ = prepare_display_image(path, width=TARGET_WIDTH)
+            img.close()
+
+    return [
+        Benchmark("display.original", run_original, len(paths)),
+        Benchmark("display.resize", run_resized, len(paths)),
+    ]
+
+
+def burn_benchmarks(corpus, work_dir):
+    rng = random.Random(1)
+    base, _ = prepare_display_image(corpus.images_of("JPEG")[0], width=TARGET_WIDTH)
+    width, height = base.size
+
+    def point():
+        return rng.randrange(width), rng.randrange(height)
+
+    rectangles = []
+    for i in range(20):
+        (x1, y1), (x2, y2) = point(), point()
+        rectangles.append((min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2), "lime" if i % 2 else "red"))
+    lines = [point() + point() for _ in range(40)]
+    save_path = os.path.join(work_dir, "burn_answer.jpg")
+    repeat = 50
+
+    def run_burn():
+        for _ in range(repeat):
+            burn_annotations(base, rectangles, lines).close()
+
+    def run_burn_and_save():
+        for _ in range(repeat):
+            img = burn_annotations(base, rectangles, lines)
+            img.save(save_path, "JPEG")
+            img.close()
+
+    return [
+        Benchmark("render.burn", run_burn, repeat),
+        Benchmark("render.burn_save", run_burn_and_save, repeat),
+    ]
+
+
+def json_benchmarks(corpus, work_dir):
+    benchmarks = []
+    rng = random.Random(2)
+    count = corpus.spec["records"]
+    lookup_ids = [rng.randint(1, count) for _ in range(LOOKUP_COUNT)]
+
+    for mode, threshold in (("eager", None), ("lazy", 0)):
+        json_path = os.path.join(work_dir, f"questions_{mode}.json")
+        shutil.copyfile(corpus.json_path, json_path)
+        state = {}
+
+        def load(json_path=json_path, threshold=threshold):
+            state["data"] = load_json_file(json_path, lazy_threshold=threshold)
+
+        def drop_index(json_path=json_path):
+            if os.path.exists(json_path + INDEX_SUFFIX):
+                os.remove(json_path + INDEX_SUFFIX)
+
+        def lookup(load=load):
+            if "data" not in state:
+                load()
+            questions = state["data"]["questions"]
+            for question_id in lookup_ids:
+                find_question(questions, question_id)
+
+        def save(json_path=json_path, load=load):
+            if "data" not in state:
+                load()
+            _, question = find_question(state["data"]["questions"], lookup_ids[0])
+            question["displayValue"] = str(time.perf_counter_ns())
+            write_json_file(json_path, state["data"])
+
+        benchmarks.append(Benchmark(f"json.load.{mode}", load, count))
+        if mode == "lazy":
+            # 索引キャッシュがない状態（初回）の読み込み
+            benchmarks.append(Benchmark("json.load.lazy_cold", load, count, setup=drop_index))
+        benchmarks.append(Benchmark(f"json.lookup.{mode}", lookup, LOOKUP_COUNT))
+        benchmarks.append(Benchmark(f"json.save.{mode}", save, 1))
+    return benchmarks
+
+
+SUITES = (resize_benchmarks, display_benchmarks, burn_benchmarks, json_benchmarks)
+
+
+def measure(benchmark, repeat, warmup=1):
+    for _ in range(warmup):
+        if benchmark.setup:
+            benchmark.setup()
+        benchmark.run()
+    timings = []
+    for _ in range(repeat):
+        if benchmark.setup:
+            benchmark.setup()
+        start = time.perf_counter()
+        benchmark.run()
+        timings.append((time.perf_counter() - start) * 1000)
+    median = statistics.median(timings)
+    return {
+        "median_ms": median,
+        "min_ms": min(timings),
+        "mean_ms": statistics.fmean(timings),
+        "stdev_ms": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "repeat": repeat,
+        "items": benchmark.items,
+        "per_item_ms": median / benchmark.items if benchmark.items else median,
+    }
+
+
+def environment_info(corpus):
+    return {
+        "python": platform.python_version(),
+        "pillow": PIL.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "corpus": corpus.id,
+        "corpus_spec": corpus.spec,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """基準との比較結果 [(名前, 基準ms, 今回ms, 比率, 判定), ...] を返す"""
+    rows = []
+    for name, current in sorted(results["results"].items()):
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            rows.append((name, None, current["median_ms"], None, "新規"))
+            continue
+        ratio = current["median_ms"] / base["median_ms"] if base["median_ms"] else float("inf")
+        if ratio > 1 + tolerance:
+            verdict = "遅くなった"
+        elif ratio < 1 - tolerance:
+            verdict = "速くなった"
+        else:
+            verdict = "変化なし"
+        rows.append((name, base["median_ms"], current["median_ms"], ratio, verdict))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="img_editor のベンチマーク")
+    parser.add_argument("--quick", action="store_true", help="小さいテストデータで短時間に計測する")
+    parser.add_argument("--repeat", type=int, default=5, help="各項目の計測回数（中央値を使う）")
+    parser.add_argument("--filter", help="名前にこの文字列を含む項目だけを計測する")
+    parser.add_argument("--corpus-dir", help="テストデータの保存先（既定は ~/.cache/img_editor/benchmarks）")
+    parser.add_argument("--output", help="結果を保存するJSONファイル")
+    parser.add_argument("--baseline", help="比較する基準の結果ファイル")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="遅くなったと判定する割合（既定 0.15 = 15%%）")
+    args = parser.parse_args(argv)
+
+    corpus = ensure_corpus(args.corpus_dir, quick=args.quick, log=lambda message: print(message, file=sys.stderr))
+    results = {"version": RESULT_VERSION, "environment": environment_info(corpus), "results": {}}
+
+    with tempfile.TemporaryDirectory(prefix="img_editor_bench_") as work_dir:
+        for suite in SUITES:
+            for benchmark in suite(corpus, work_dir):
+                if args.filter and args.filter not in benchmark.name:
+                    continue
+                result = measure(benchmark, args.repeat)
+                results["results"][benchmark.name] = result
+                print(f"{benchmark.name:<22} {result['median_ms']:10.2f}ms  (1件 {result['per_item_ms']:.3f}ms, {result['items']}件)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"結果を保存しました: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("environment", {}).get("corpus") != corpus.id:
+            print("注意: 基準と異なるテストデータで計測しています", file=sys.stderr)
+        rows = compare(results, baseline, args.tolerance)
+        print(f"\n基準との比較（{args.baseline}）:")
+        for name, base_ms, current_ms, ratio, verdict in rows:
+            if ratio is None:
+                print(f"  {name:<22} {'-':>10}  {current_ms:10.2f}ms  {verdict}")
+            else:
+                print(f"  {name:<22} {base_ms:10.2f}ms {current_ms:10.2f}ms  x{ratio:.2f} {verdict}")
+        if any(verdict == "遅くなった" for *_, verdict in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
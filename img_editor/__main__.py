@@ -0,0 +1,141 @@
+"""
+各ツールを1つの入口から起動する。
+
+    python -m img_editor <ツール名> [--startup-report] [--startup-log ファイル]
+
+選択したツールのモジュールだけを読み込む。Pillowなどの重いモジュールを読み込む前に
+ウィンドウを表示し、読み込みと起動にかかった時間を計測する。
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+try:
+    from .lazy_import import import_module
+    from . import diagnostics, encoder_profiles, interaction_recorder, output_layout, parallel_resize, session, work_queue
+except ImportError:
+    from lazy_import import import_module
+    import diagnostics
+    import encoder_profiles
+    import interaction_recorder
+    import output_layout
+    import parallel_resize
+    import session
+    import work_queue
+
+START = time.perf_counter()
+
+# ツール名 -> (モジュール名, アプリのクラス名, ウィンドウのタイトル)
+TOOLS = {
+    "resize_and_draw": ("resize_and_draw", "ImageEditorApp", "画像エディタ（リサイズ）"),
+    "img_draw": ("img_draw", "ImageEditorApp", "画像エディタ"),
+    "img_resize": ("img_resize", "ImageResizeApp", "画像リサイズアプリ"),
+    "json_editor": ("json_editor", "JsonEditorApp", "JSONエディタ"),
+}
+IMAGE_OUTPUT_TOOLS = {"resize_and_draw", "img_draw", "img_resize"}  # 画像を保存するツール（--encoder と --layout を渡す）
+EDITOR_TOOLS = {"resize_and_draw", "img_draw"}  # 描画エディタ（--no-resume・--work-queue・--record を使う）
+
+
+class StartupTimer:
+    """起動の各段階までの経過時間を記録する"""
+
+    def __init__(self, start=START):
+        self.start = start
+        self.marks = []  # [(段階名, 起動からの秒数), ...]
+
+    def mark(self, name):
+        self.marks.append((name, time.perf_counter() - self.start))
+
+    def report(self, tool, output=sys.stderr):
+        print(f"起動時間 ({tool}):", file=output)
+        previous = 0.0
+        for name, elapsed in self.marks:
+            print(f"  {name:<12} {elapsed * 1000:8.1f}ms  (+{(elapsed - previous) * 1000:.1f}ms)", file=output)
+            previous = elapsed
+
+    def append_log(self, path, tool):
+        """計測結果をJSON Lines形式で追記する（起動時間の推移を追うため）"""
+        entry = {
+            "tool": tool,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "marks_ms": {name: round(elapsed * 1000, 2) for name, elapsed in self.marks},
+        }
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def load_app_class(module_name, class_name):
+    # python img_editor/__main__.py で直接実行した場合は __package__ が空なので、そのまま読み込む
+    return getattr(import_module(module_name, __package__), class_name)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m img_editor", description="画像エディタの各ツールを起動する")
+    parser.add_argument("tool", choices=sorted(TOOLS), help="起動するツール")
+    parser.add_argument("--startup-report", action="store_true", help="起動にかかった時間を表示する")
+    parser.add_argument("--startup-log", help="起動時間をJSON Lines形式で追記するファイル")
+    diagnostics.add_arguments(parser)
+    encoder_profiles.add_argument(parser)
+    output_layout.add_argument(parser)
+    session.add_argument(parser)
+    work_queue.add_argument(parser)
+    interaction_recorder.add_argument(parser)
+    parallel_resize.add_argument(parser)
+    args = parser.parse_args(argv)
+    diagnostics.setup(args)
+    module_name, class_name, title = TOOLS[args.tool]
+    timer = StartupTimer()
+    timer.mark("args")
+
+    import tkinter as tk
+    timer.mark("tkinter")
+
+    # ツールのモジュールを読み込む前にウィンドウを出しておく
+    root = tk.Tk()
+    root.title(title)
+    diagnostics.attach(root, args, args.tool)
+    splash = tk.Label(root, text="起動中…", padx=60, pady=30)
+    splash.pack()
+    root.update()
+    timer.mark("window")
+
+    app_class = load_app_class(module_name, class_name)
+    timer.mark("import")
+
+    splash.destroy()
+    kwargs = {}
+    if args.tool in IMAGE_OUTPUT_TOOLS:
+        kwargs.update(encoder_profile=args.encoder, layout=args.layout)
+    if args.tool in EDITOR_TOOLS:
+        kwargs.update(resume=not args.no_resume, work_queue=args.work_queue)
+    if args.tool == "img_resize":
+        kwargs["workers"] = args.workers
+    app = app_class(root, **kwargs)
+    if args.record and args.tool in EDITOR_TOOLS:
+        interaction_recorder.InteractionRecorder(app, args.record, args.tool)
+    timer.mark("init")
+
+    def on_ready():
+        timer.mark("ready")
+        if args.startup_report:
+            timer.report(args.tool)
+        if args.startup_log:
+            timer.append_log(args.startup_log, args.tool)
+
+    root.after_idle(on_ready)
+    root.mainloop()
+
+    shutdown = getattr(app, "shutdown", None)
+    if shutdown is not None:
+        shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
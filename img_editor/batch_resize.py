@@ -0,0 +1,476 @@
+"""
+一括リサイズの処理本体（画面を使わない）。
+元と保存先には、フォルダのほかに zip/tar アーカイブを指定できる。アーカイブは展開せず、
+先頭から1回だけ順に読み、各画像をメモリ上で処理して保存先に書き込む。
+内容が同じ画像は1回だけ処理し、2件目以降は保存先で最初の結果をリンク（またはコピー）する。
+"""
+import csv
+import hashlib
+import io
+import os
+import shutil
+import tarfile
+import time
+import zipfile
+from contextlib import contextmanager
+from pathlib import Path, PurePosixPath
+from PIL import Image
+
+try:
+    from .rendering import resize_image_file, format_for_name, TARGET_WIDTH
+    from .encoder_profiles import save_options, DEFAULT_PROFILE, PROFILE_NAMES
+    from .output_layout import output_name, load_index, OutputIndex, FLAT, LAYOUTS, INDEX_NAME
+    from .parallel_resize import ResizePipeline
+    from . import tracing
+except ImportError:
+    from rendering import resize_image_file, format_for_name, TARGET_WIDTH
+    from encoder_profiles import save_options, DEFAULT_PROFILE, PROFILE_NAMES
+    from output_layout import output_name, load_index, OutputIndex, FLAT, LAYOUTS, INDEX_NAME
+    from parallel_resize import ResizePipeline
+    import tracing
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tiff', '.webp'}
+ZIP_SUFFIXES = (".zip",)
+TAR_MODES = {  # 拡張子 -> 書き込み時のモード
+    ".tar": "w",
+    ".tar.gz": "w:gz",
+    ".tgz": "w:gz",
+    ".tar.bz2": "w:bz2",
+    ".tbz2": "w:bz2",
+    ".tar.xz": "w:xz",
+    ".txz": "w:xz",
+}
+HASH_CHUNK_SIZE = 1024 * 1024
+ARCHIVE_FILETYPES = [("アーカイブ", "*.zip *.tar *.tar.gz *.tgz *.tar.bz2 *.tbz2 *.tar.xz *.txz"), ("すべて", "*")]
+
+
+def archive_kind(path):
+    """拡張子から "zip" / "tar" / None（フォルダ）を返す"""
+    lower = path.lower()
+    if lower.endswith(ZIP_SUFFIXES):
+        return "zip"
+    if lower.endswith(tuple(TAR_MODES)):
+        return "tar"
+    return None
+
+
+def is_image_name(name):
+    """アーカイブ内の名前が処理対象の画像かどうか（macOSの付加ファイルは除く）"""
+    basename = name.rsplit("/", 1)[-1]
+    if basename.startswith("._") or "__MACOSX/" in name:
+        return False
+    return Path(basename).suffix.lower() in IMAGE_EXTENSIONS
+
+
+def check_member_name(name):
+    """アーカイブ内の名前が保存先の外を指していないか確認する（絶対パスや ".." を含む名前は ValueError）"""
+    path = PurePosixPath(name.replace("\\", "/"))
+    if path.is_absolute() or ".." in path.parts or (path.parts and ":" in path.parts[0]):
+        raise ValueError(f"保存先の外を指す名前のため処理しません: {name}")
+
+
+def _check_tar_member(member):
+    """tarfile.data_filter と同じ基準でメンバーを確認し、名前を正規化したメンバーを返す"""
+    if hasattr(tarfile, "data_filter"):
+        try:
+            member = tarfile.data_filter(member, ".")
+        except tarfile.FilterError as e:
+            raise ValueError(f"安全でないメンバーのため処理しません: {member.name}（{e}）")
+    check_member_name(member.name)
+    return member
+
+
+class SourceItem:
+    """元の画像1件（フォルダならファイルのパス、アーカイブなら読み込んだ内容を持つ）"""
+
+    def __init__(self, name, path=None, data=None, link_target=None, mtime=None, error=None):
+        self.name = name  # 元からの相対パス（区切りは "/"）
+        self.path = path
+        self.data = data
+        self.link_target = link_target  # tar内のハードリンクの場合、リンク先の名前
+        self.mtime = mtime
+        self.error = error  # 処理しない理由（安全でない名前など）。件数を合わせるため、除かずにエラーとして返す
+
+    def modified_time(self):
+        """更新日時（フォルダの場合は必要になったときに取得する）"""
+        if self.mtime is None and self.path is not None:
+            self.mtime = os.path.getmtime(self.path)
+        return self.mtime
+
+    def open(self):
+        if self.data is not None:
+            return io.BytesIO(self.data)
+        return open(self.path, "rb")
+
+    def read(self):
+        if self.data is not None:
+            return self.data
+        with open(self.path, "rb") as f:
+            return f.read()
+
+
+def content_digest(item):
+    """内容のハッシュ（フォルダのファイルは少しずつ読んで計算し、全体をメモリに置かない）"""
+    if item.data is not None:
+        return hashlib.blake2b(item.data, digest_size=16).digest()
+    with open(item.path, "rb") as f:
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=16)).digest()
+        digest = hashlib.blake2b(digest_size=16)
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+        return digest.digest()
+
+
+def fits_width(item, width):
+    """ヘッダーだけを読み、横幅が width 以下（リサイズ不要）かどうかを返す"""
+    with item.open() as f, Image.open(f) as img:
+        return img.width <= width
+
+
+def count_source(source):
+    """処理対象の件数（tarは先頭から読まないと分からないためNone）"""
+    kind = archive_kind(source)
+    if kind == "zip":
+        with zipfile.ZipFile(source) as zf:
+            return sum(1 for info in zf.infolist() if not info.is_dir() and is_image_name(info.filename))
+    if kind == "tar":
+        return None
+    return sum(1 for _ in _folder_images(source))
+
+
+def _folder_images(folder):
+    if os.path.exists(os.path.join(folder, INDEX_NAME)):
+        # フォルダ分けして保存したフォルダは、一覧を取らずに索引から読む
+        for name, relative_path in sorted(load_index(folder).items()):
+            path = os.path.join(folder, *relative_path.split("/"))
+            if Path(name).suffix.lower() in IMAGE_EXTENSIONS and os.path.isfile(path):
+                yield name, path
+        return
+    for filename in sorted(os.listdir(folder)):
+        path = os.path.join(folder, filename)
+        if Path(filename).suffix.lower() in IMAGE_EXTENSIONS and os.path.isfile(path):
+            yield filename, path
+
+
+def iter_source(source):
+    """元の画像を順に返す。アーカイブはファイル内の並び順に1回だけ読む"""
+    kind = archive_kind(source)
+    if kind == "zip":
+        with zipfile.ZipFile(source) as zf:
+            infos = [info for info in zf.infolist() if not info.is_dir() and is_image_name(info.filename)]
+            # ファイル内の位置順に読み、シークを前方向だけにする
+            infos.sort(key=lambda info: info.header_offset)
+            for info in infos:
+                try:
+                    check_member_name(info.filename)
+                except ValueError as e:
+                    yield SourceItem(info.filename, error=str(e))
+                    continue
+                yield SourceItem(info.filename, data=zf.read(info), mtime=time.mktime(info.date_time + (0, 0, -1)))
+    elif kind == "tar":
+        # ストリームとして開き、メンバーを先頭から順に読む
+        with tarfile.open(source, "r|*") as tf:
+            for member in tf:
+                if not is_image_name(member.name) or not (member.isfile() or member.islnk()):
+                    continue
+                try:
+                    checked = _check_tar_member(member)
+                except ValueError as e:
+                    yield SourceItem(member.name, error=str(e))
+                    continue
+                if member.isfile():
+                    yield SourceItem(checked.name, data=tf.extractfile(member).read(), mtime=member.mtime)
+                else:
+                    # ストリームでは戻って読めないため、リンク先の名前だけを渡す
+                    yield SourceItem(checked.name, link_target=checked.linkname, mtime=member.mtime)
+    else:
+        for filename, path in _folder_images(source):
+            yield SourceItem(filename, path=path)
+
+
+class FolderDestination:
+    def __init__(self, folder):
+        self.folder = folder
+        self.real_folder = os.path.realpath(folder)
+        self.created_dirs = set()  # フォルダ分けしたときに毎回作成を試みないよう記録する
+
+    def path_for(self, name):
+        path = os.path.join(self.folder, *name.split("/"))
+        # 名前やシンボリックリンクで保存先の外に書き込まないようにする
+        if os.path.commonpath([self.real_folder, os.path.realpath(path)]) != self.real_folder:
+            raise ValueError(f"保存先の外を指す名前のため保存しません: {name}")
+        directory = os.path.dirname(path)
+        if directory not in self.created_dirs:
+            os.makedirs(directory, exist_ok=True)
+            self.created_dirs.add(directory)
+        return path
+
+    @contextmanager
+    def open_output(self, name):
+        # 一時ファイルに書き、最後まで書けたときだけ置き換える
+        path = self.path_for(name)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                yield f
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def copy_item(self, item, name):
+        """元のファイルをそのまま name として保存（同じファイルシステムならハードリンク）"""
+        path = self.path_for(name)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            if item.path is not None:
+                try:
+                    os.link(item.path, tmp_path)
+                except OSError:
+                    shutil.copyfile(item.path, tmp_path)
+            else:
+                with open(tmp_path, "wb") as f:
+                    f.write(item.data)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def duplicate(self, existing_name, name):
+        """保存済みの existing_name と同じ内容を name として保存（可能ならハードリンク）"""
+        existing_path = self.path_for(existing_name)
+        path = self.path_for(name)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            try:
+                os.link(existing_path, tmp_path)
+            except OSError:
+                shutil.copyfile(existing_path, tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def close(self):
+        pass
+
+
+class ZipDestination:
+    def __init__(self, path):
+        # JPEGなどは圧縮済みなので無圧縮で格納する
+        self.zf = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED)
+
+    @contextmanager
+    def open_output(self, name):
+        # 書き込みに失敗した画像が途中まで格納されないよう、最後まで書けてから追加する
+        buf = io.BytesIO()
+        yield buf
+        info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+        self.zf.writestr(info, buf.getvalue())
+
+    def copy_item(self, item, name):
+        with self.open_output(name) as out:
+            out.write(item.read())
+
+    def duplicate(self, existing_name, name):
+        # 書き込み中のアーカイブから、格納済みの内容を読み戻して追加する
+        with self.open_output(name) as out:
+            out.write(self.zf.read(existing_name))
+
+    def close(self):
+        self.zf.close()
+
+
+class TarDestination:
+    def __init__(self, path):
+        lower = path.lower()
+        mode = next(mode for suffix, mode in TAR_MODES.items() if lower.endswith(suffix))
+        self.tf = tarfile.open(path, mode)
+
+    @contextmanager
+    def open_output(self, name):
+        buf = io.BytesIO()
+        yield buf
+        info = tarfile.TarInfo(name)
+        info.size = buf.tell()
+        info.mtime = int(time.time())
+        buf.seek(0)
+        self.tf.addfile(info, buf)
+
+    def copy_item(self, item, name):
+        with self.open_output(name) as out:
+            out.write(item.read())
+
+    def duplicate(self, existing_name, name):
+        # tarのハードリンクとして追加し、内容は重ねて格納しない
+        info = tarfile.TarInfo(name)
+        info.type = tarfile.LNKTYPE
+        info.linkname = existing_name
+        info.mtime = int(time.time())
+        self.tf.addfile(info)
+
+    def close(self):
+        self.tf.close()
+
+
+def open_destination(dest):
+    kind = archive_kind(dest)
+    if kind == "zip":
+        return ZipDestination(dest)
+    if kind == "tar":
+        return TarDestination(dest)
+    return FolderDestination(dest)
+
+
+def duplicate_report_path(dest):
+    """重複の一覧を書き出すファイル（保存先と同じ場所に「保存先名.duplicates.csv」）"""
+    return os.path.normpath(dest) + ".duplicates.csv"
+
+
+class BatchResult:
+    def __init__(self):
+        self.processed = 0  # リサイズした件数
+        self.passthrough = 0  # リサイズ不要でそのまま保存した件数
+        self.duplicates = []  # [(名前, 同じ内容の最初の画像の名前), ...]
+        self.failed = []  # [(名前, エラー内容), ...]
+
+    @property
+    def completed(self):
+        return self.processed + self.passthrough + len(self.duplicates) + len(self.failed)
+
+    def summary(self):
+        return (
+            f"リサイズ: {self.processed}件 / そのまま保存: {self.passthrough}件 / "
+            f"重複: {len(self.duplicates)}件 / エラー: {len(self.failed)}件"
+        )
+
+    def write_duplicate_report(self, path):
+        """重複していた画像の一覧をCSVで書き出す"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["name", "same_as"])
+            writer.writerows(self.duplicates)
+        os.replace(tmp_path, path)
+
+
+def resize_batch(
+    source, dest, width=TARGET_WIDTH, quality=95, progress=None, profile=DEFAULT_PROFILE, layout=FLAT, workers=1
+):
+    """source の画像をすべてリサイズして dest に保存する
+
+    横幅が width 以下の画像は再エンコードせず、元のファイルをそのまま保存する。
+    内容（バイト列）が同じ画像は最初の1件だけ処理し、以降は結果を複製して result.duplicates に記録する。
+    profile は保存時の圧縮設定（encoder_profiles.PROFILE_NAMES）。default では quality で保存する。
+    layout は保存先の構成（output_layout.LAYOUTS）。フォルダに flat 以外で保存すると索引も書き込む。
+    workers が2以上の場合はデコードとリサイズを別プロセスで並列に行う（完了の順番は前後する）。
+    progress は1件ごとに (完了数, 総数 or None, 名前) で呼ばれる。
+    """
+    if profile not in PROFILE_NAMES:
+        raise ValueError(f"不明な圧縮設定です: {profile}")
+    if layout not in LAYOUTS:
+        raise ValueError(f"不明な保存先の構成です: {layout}")
+    total = count_source(source)
+    result = BatchResult()
+    processed_names = {}  # (内容のハッシュ, 保存形式) -> 最初に保存した元の名前
+    saved_names = {}  # 元の名前 -> 保存先での名前
+    waiting = {}  # 別プロセスで処理中の元の名前 -> [(重複の名前, 保存先での名前), ...]
+
+    def report(name):
+        if progress is not None:
+            progress(result.completed, total, name)
+
+    def saved(name, out_name):
+        saved_names[name] = out_name
+        if index is not None:
+            index.record(name, out_name)
+        report(name)
+        # 処理中だった画像と同じ内容の画像を、保存できたところで複製する
+        for duplicate_name, duplicate_out_name in waiting.pop(name, []):
+            try:
+                destination.duplicate(out_name, duplicate_out_name)
+                result.duplicates.append((duplicate_name, name))
+                saved(duplicate_name, duplicate_out_name)
+            except Exception as e:
+                failed(duplicate_name, str(e))
+
+    def failed(name, error):
+        print(f"エラー: {name} の処理中にエラーが発生しました: {error}")
+        result.failed.append((name, error))
+        report(name)
+        for duplicate_name, _ in waiting.pop(name, []):
+            failed(duplicate_name, error)
+
+    def on_resized(context, img, error):
+        name, out_name, image_format, options, key = context
+        if error is None:
+            try:
+                with tracing.span("resize.encode", file=name), destination.open_output(out_name) as out:
+                    img.save(out, image_format, **options)
+            except Exception as e:
+                error = str(e)
+        if error is not None:
+            del processed_names[key]
+            failed(name, error)
+            return
+        result.processed += 1
+        saved(name, out_name)
+
+    destination = open_destination(dest)
+    index = OutputIndex(dest) if layout != FLAT and archive_kind(dest) is None else None
+    pipeline = ResizePipeline(workers, width, on_resized) if workers > 1 else None
+    try:
+        for item in iter_source(source):
+            try:
+                if item.error is not None:
+                    raise ValueError(item.error)
+                mtime = item.modified_time() if layout == "date" else None
+                out_name = output_name(item.name, layout, mtime)
+                if item.link_target is not None:
+                    # tarのハードリンクは、リンク先と同じ内容として扱う
+                    if item.link_target not in saved_names and item.link_target not in waiting:
+                        raise ValueError(f"リンク先の {item.link_target} が保存されていません")
+                    first_name = item.link_target
+                else:
+                    # ヘッダーだけで横幅を確認してから、内容を少しずつ読んでハッシュする
+                    fits = fits_width(item, width)
+                    image_format = format_for_name(item.name)
+                    key = (content_digest(item), image_format)
+                    first_name = processed_names.get(key)
+                if first_name is not None:
+                    if first_name in waiting:
+                        waiting[first_name].append((item.name, out_name))
+                    else:
+                        destination.duplicate(saved_names[first_name], out_name)
+                        result.duplicates.append((item.name, first_name))
+                        saved(item.name, out_name)
+                elif fits:
+                    # 拡大や再圧縮による劣化を避けるため、バイト列をそのまま保存する
+                    destination.copy_item(item, out_name)
+                    result.passthrough += 1
+                    processed_names[key] = item.name
+                    saved(item.name, out_name)
+                elif pipeline is not None:
+                    options = save_options(profile, image_format, quality=quality)
+                    processed_names[key] = item.name
+                    waiting[item.name] = []
+                    pipeline.submit(item, (item.name, out_name, image_format, options, key))
+                else:
+                    options = save_options(profile, image_format, quality=quality)
+                    with item.open() as src, destination.open_output(out_name) as out:
+                        resize_image_file(src, out, width=width, format=image_format, save_options=options)
+                    result.processed += 1
+                    processed_names[key] = item.name
+                    saved(item.name, out_name)
+            except Exception as e:
+                failed(item.name, str(e))
+        if pipeline is not None:
+            pipeline.finish()
+    finally:
+        if pipeline is not None:
+            pipeline.close()
+        destination.close()
+        if index is not None:
+            index.close()
+    return result
@@ -0,0 +1,125 @@
+"""
+フォルダ内のメーター画像・解説画像をまとめて取り込む。
+ファイル名からIDと画像の種類を判定し、並列に横幅500px以下のJPEGへ変換する。
+変換は保存先の一時フォルダに行い、JSONの保存に成功してから保存先の画像と置き換える。
+"""
+import os
+import re
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageOps
+
+MAX_WIDTH = 500
+JPEG_QUALITY = 90
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tiff', '.webp'}
+
+# 例: electricity_001.jpg / 001.png / 12_answer.jpeg
+FILENAME_PATTERN = r"^(?:{type}_)?0*(?P<id>\d+)(?P<answer>_answer)?$"
+
+
+def normalize_image(source_path, dest_path, max_width=MAX_WIDTH, quality=JPEG_QUALITY):
+    """画像を横幅max_width以下のJPEGに変換して保存（元画像より大きくはしない）"""
+    with Image.open(source_path) as img:
+        # JPEGは縮小デコードで読み込み量を減らす（回転前の向きでも幅が足りるよう正方形で指定）
+        if img.width > max_width:
+            img.draft("RGB", (max_width, max_width))
+        img = ImageOps.exif_transpose(img)
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        if img.width > max_width:
+            new_height = max(int(img.height * (max_width / img.width)), 1)
+            img = img.resize((max_width, new_height), Image.Resampling.LANCZOS)
+        # 途中で失敗しても既存の画像を壊さないよう、一時ファイルに書いてから置き換える
+        tmp_path = dest_path + ".tmp"
+        img.save(tmp_path, "JPEG", quality=quality, optimize=True)
+    os.replace(tmp_path, dest_path)
+    return dest_path
+
+
+def scan_folder(folder, type_english, pattern=FILENAME_PATTERN):
+    """フォルダ内のファイルをIDごとに振り分ける
+
+    戻り値: ({id: {"meterImage": path, "explanationImage": path}}, [対応しないファイル名, ...])
+    """
+    regex = re.compile(pattern.format(type=re.escape(type_english)), re.IGNORECASE)
+    matched = {}
+    unmatched = []
+    for filename in sorted(os.listdir(folder)):
+        stem, ext = os.path.splitext(filename)
+        if ext.lower() not in IMAGE_EXTENSIONS:
+            continue
+        m = regex.match(stem)
+        if not m or not 1 <= int(m.group("id")) <= 999:
+            unmatched.append(filename)
+            continue
+        image_type = "explanationImage" if m.group("answer") else "meterImage"
+        matched.setdefault(int(m.group("id")), {})[image_type] = os.path.join(folder, filename)
+    return matched, unmatched
+
+
+def image_filename(type_english, question_id, image_type):
+    """IDと画像の種類から保存ファイル名を生成"""
+    id_str = f"{question_id:03d}"
+    if image_type == "meterImage":
+        return f"{type_english}_{id_str}.jpg"
+    return f"{type_english}_{id_str}_answer.jpg"
+
+
+def convert_images(matched, img_dir, type_english, max_workers=None, progress=None, store=None):
+    """振り分けた画像を並列に変換する（storeを指定すると重複排除ストアに登録する）
+
+    戻り値: ({id: {image_type: 保存ファイル名}}, [(元ファイル, エラー内容), ...])
+    """
+    os.makedirs(img_dir, exist_ok=True)
+    jobs = [
+        (question_id, image_type, source_path)
+        for question_id, images in sorted(matched.items())
+        for image_type, source_path in images.items()
+    ]
+    converted = {}
+    errors = []
+
+    def convert(job):
+        question_id, image_type, source_path = job
+        dest_filename = image_filename(type_english, question_id, image_type)
+        dest_path = os.path.join(img_dir, dest_filename)
+        normalize_image(source_path, dest_path)
+        if store is not None:
+            store.adopt(dest_path)
+        return dest_filename
+
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        futures = [(job, executor.submit(convert, job)) for job in jobs]
+        for done, (job, future) in enumerate(futures, start=1):
+            question_id, image_type, source_path = job
+            try:
+                converted.setdefault(question_id, {})[image_type] = future.result()
+            except Exception as e:
+                errors.append((os.path.basename(source_path), str(e)))
+            if progress is not None:
+                progress(done, len(jobs))
+    return converted, errors
+
+
+def create_staging_dir(img_dir):
+    """変換した画像を置く一時フォルダ（置き換えを os.replace で行えるよう、保存先と同じフォルダ内に作る）"""
+    os.makedirs(img_dir, exist_ok=True)
+    return tempfile.mkdtemp(prefix=".import-", dir=img_dir)
+
+
+def commit_images(staging_dir, img_dir, converted, store=None):
+    """一時フォルダの変換済みの画像を保存先に移し、一時フォルダを削除する（JSONを保存してから呼ぶ）"""
+    try:
+        for images in converted.values():
+            for dest_filename in images.values():
+                dest_path = os.path.join(img_dir, dest_filename)
+                os.replace(os.path.join(staging_dir, dest_filename), dest_path)
+                if store is not None:
+                    store.adopt(dest_path)
+    finally:
+        discard_staging_dir(staging_dir)
+
+
+def discard_staging_dir(staging_dir):
+    shutil.rmtree(staging_dir, ignore_errors=True)
@@ -0,0 +1,10 @@
+"""
+各ツールで共通のキャッシュの保存先。
+"""
+import os
+
+
+def cache_dir(*parts):
+    """キャッシュの保存先（XDG_CACHE_HOME またはホーム下の .cache の img_editor/）以下のパス"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "img_editor", *parts)
@@ -0,0 +1,169 @@
+"""
+種別ごとのJSONデータと表示用サムネイルをバックグラウンドで読み込み、メモリ上に保持する。
+ファイルの更新日時（mtime）が変わったときだけ再読み込みする。
+"""
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from .lazy_json import load_json_file, find_question
+    from .lazy_import import LazyModule
+    from . import tracing
+except ImportError:
+    from lazy_json import load_json_file, find_question
+    from lazy_import import LazyModule
+    import tracing
+
+Image = LazyModule("PIL.Image")  # 最初のサムネイルを作るときに読み込む
+
+
+def file_signature(path):
+    """ファイルの変更検知用に (mtime, サイズ) を返す。存在しない場合は None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class ThumbnailCache:
+    """画像を表示幅（指定があれば高さも）まで縮小した状態で保持するLRUキャッシュ"""
+
+    def __init__(self, max_width=500, max_entries=64, max_height=None):
+        self.max_width = max_width
+        self.max_height = max_height
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # (path, signature) -> PIL.Image
+
+    def get(self, image_path):
+        """縮小済みの画像を返す（キャッシュになければ読み込む）"""
+        signature = file_signature(image_path)
+        if signature is None:
+            raise FileNotFoundError(image_path)
+        key = (image_path, signature)
+        with self.lock:
+            img = self.entries.get(key)
+            if img is not None:
+                self.entries.move_to_end(key)
+                return img
+
+        with tracing.span("thumbnail.load", path=os.path.basename(image_path)):
+            img = self._load(image_path)
+        with self.lock:
+            self.entries[key] = img
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return img
+
+    def _load(self, image_path):
+        with Image.open(image_path) as src:
+            width, height = src.size
+            ratio = self.max_width / width
+            if self.max_height:
+                ratio = min(ratio, self.max_height / height)
+            if ratio < 1.0:
+                new_size = (max(int(width * ratio), 1), max(int(height * ratio), 1))
+                # JPEGはデコード時に縮小して読み込む
+                src.draft("RGB", new_size)
+                return src.resize(new_size, Image.Resampling.LANCZOS)
+            src.load()
+            return src.copy()
+
+
+class DatasetCache:
+    """種別ごとのJSONデータを保持し、ファイルが更新されたときだけ再読み込みする"""
+
+    def __init__(self, base_dir, type_mapping, thumbnails=None, on_loaded=None, max_workers=3):
+        self.base_dir = base_dir
+        self.type_mapping = type_mapping  # {"電力": ("electricity", "electricity.json"), ...}
+        self.thumbnails = thumbnails
+        self.on_loaded = on_loaded  # 読み込み（再読み込み）完了時に (type_english, data) で呼ばれる
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dataset")
+        self.lock = threading.Lock()
+        self.entries = {}  # type_english -> (signature, data)
+        self.futures = {}  # type_english -> Future
+
+    def json_path(self, type_english):
+        """種別のJSONファイルのパスを返す"""
+        for english, json_filename in self.type_mapping.values():
+            if english == type_english:
+                return os.path.join(self.base_dir, "json", json_filename)
+        raise KeyError(type_english)
+
+    def preload(self):
+        """すべての種別のJSONと先頭画面のサムネイルを並列に読み込む"""
+        for type_english, _ in self.type_mapping.values():
+            with self.lock:
+                if type_english in self.futures:
+                    continue
+                self.futures[type_english] = self.executor.submit(self._preload_one, type_english)
+
+    def is_ready(self, type_english):
+        """バックグラウンド読み込みが完了しているかどうか"""
+        with self.lock:
+            future = self.futures.get(type_english)
+        return future is None or future.done()
+
+    def _preload_one(self, type_english):
+        data = self._load(type_english)
+        if data is None or self.thumbnails is None:
+            return
+        # 最初に表示されるレコード（ID 1）の画像を先に読み込んでおく
+        _, first = find_question(data.get("questions", []), 1)
+        if first is None:
+            return
+        for key in ("meterImage", "explanationImage"):
+            rel_path = first.get(key)
+            if not rel_path:
+                continue
+            try:
+                self.thumbnails.get(os.path.join(self.base_dir, rel_path))
+            except Exception:
+                pass
+
+    def _load(self, type_english):
+        json_path = self.json_path(type_english)
+        signature = file_signature(json_path)
+        if signature is None:
+            return None
+        with self.lock:
+            cached = self.entries.get(type_english)
+        if cached and cached[0] == signature:
+            return cached[1]
+        # 大きなファイルはID→バイト範囲の索引だけを作り、レコードは必要時に解析する
+        with tracing.span("json.parse", type=type_english):
+            data = load_json_file(json_path)
+        with self.lock:
+            self.entries[type_english] = (signature, data)
+        if self.on_loaded is not None:
+            self.on_loaded(type_english, data)
+        return data
+
+    def get(self, type_english):
+        """種別のJSONデータを返す。ファイルが更新されていれば再読み込みする"""
+        with self.lock:
+            future = self.futures.pop(type_english, None)
+        if future is not None:
+            try:
+                future.result()
+            except Exception:
+                # 失敗した場合は下で同期的に読み直し、例外を呼び出し元に伝える
+                pass
+
+        json_path = self.json_path(type_english)
+        if file_signature(json_path) is None:
+            raise FileNotFoundError(json_path)
+        return self._load(type_english)
+
+    def mark_saved(self, type_english, data):
+        """保存直後のデータと更新日時を登録し、不要な再読み込みを防ぐ"""
+        signature = file_signature(self.json_path(type_english))
+        with self.lock:
+            self.entries[type_english] = (signature, data)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,77 @@
+"""
+各ツールと起動用の __main__ で共通のコマンドライン引数（診断用）を扱う。
+"""
+import argparse
+import atexit
+import os
+
+try:
+    from . import cache_paths, tracing
+    from .watchdog import StallWatchdog, DEFAULT_THRESHOLD_MS
+    from .profiling import ProfileCapture
+except ImportError:
+    import cache_paths
+    import tracing
+    from watchdog import StallWatchdog, DEFAULT_THRESHOLD_MS
+    from profiling import ProfileCapture
+
+# 隠しキー：CPUプロファイルの開始/停止、メモリのスナップショット
+PROFILE_KEY = "<Control-P>"  # Ctrl+Shift+P
+SNAPSHOT_KEY = "<Control-M>"  # Ctrl+Shift+M
+
+
+def add_arguments(parser):
+    group = parser.add_argument_group("診断")
+    group.add_argument(
+        "--trace", nargs="?", const=tracing.DEFAULT_OUTPUT, metavar="ファイル",
+        help=f"処理時間のトレースを記録し、終了時に書き出す（環境変数 {tracing.ENV_VAR} でも指定可）"
+    )
+    group.add_argument(
+        "--watchdog", type=int, default=DEFAULT_THRESHOLD_MS, metavar="ミリ秒",
+        help=f"画面がこの時間以上止まったらメインスレッドのスタックを記録する（0で無効、既定 {DEFAULT_THRESHOLD_MS}）"
+    )
+    group.add_argument(
+        "--profile", action="store_true",
+        help="起動時からCPUプロファイルとメモリの割り当てを記録し、終了時に書き出す（実行中は Ctrl+Shift+P で開始/停止）"
+    )
+    group.add_argument("--diagnostics-dir", metavar="フォルダ", help="診断結果の保存先（既定は ~/.cache/img_editor/diagnostics）")
+
+
+def setup(args):
+    """引数に応じて診断機能を有効にする"""
+    if args.trace:
+        tracing.enable(args.trace)
+
+
+def attach(root, args, name="img_editor"):
+    """Tkのウィンドウを作成した後に呼び、ウィンドウが必要な診断機能を開始する"""
+    output_dir = args.diagnostics_dir or cache_paths.cache_dir("diagnostics")
+    if args.watchdog > 0:
+        watchdog = StallWatchdog(root, threshold_ms=args.watchdog, log_path=os.path.join(output_dir, "stalls.log"))
+        watchdog.start()
+
+    capture = ProfileCapture(output_dir, name)
+
+    def toggle_profile(event=None):
+        capture.toggle()
+        # 計測中はタイトルに表示する
+        title = root.title().replace(" [計測中]", "")
+        root.title(title + " [計測中]" if capture.is_running() else title)
+
+    root.bind_all(PROFILE_KEY, toggle_profile)
+    root.bind_all(SNAPSHOT_KEY, lambda event: capture.memory_snapshot())
+    atexit.register(capture.stop)
+    if args.profile:
+        toggle_profile()
+    return capture
+
+
+def parse_args(description, argv=None, add_tool_arguments=()):
+    """診断用の引数（と add_tool_arguments の各関数で追加した引数）を解析して設定する"""
+    parser = argparse.ArgumentParser(description=description)
+    add_arguments(parser)
+    for add_tool_argument in add_tool_arguments:
+        add_tool_argument(parser)
+    args = parser.parse_args(argv)
+    setup(args)
+    return args
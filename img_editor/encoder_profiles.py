@@ -0,0 +1,150 @@
+"""
+画像を保存するときの圧縮設定（プロファイル）。
+
+    default  : 各ツールの従来どおりの設定（img_resize は quality=95、エディタは Pillow の既定値）
+    fast     : 保存の速さを優先
+    balanced : 速さとファイルサイズのバランスを取る
+    small    : ファイルサイズを優先（保存は遅い）
+
+フォルダ内の画像で各プロファイルの速さとサイズを比べる場合：
+    python -m img_editor.encoder_profiles 元フォルダ [--sample 20] [--formats JPEG,WEBP]
+"""
+import argparse
+import io
+import os
+import sys
+import time
+from pathlib import Path
+
+# 起動用の入口からも読み込むため、Pillowは計測するときに読み込む
+
+DEFAULT_PROFILE = "default"
+CALIBRATION_WIDTH = 500
+
+# 保存形式ごとの Image.save のオプション（subsampling: 0=4:4:4, 2=4:2:0）
+PROFILES = {
+    "fast": {
+        "JPEG": {"quality": 85, "subsampling": 2, "optimize": False, "progressive": False},
+        "WEBP": {"quality": 80, "method": 0},
+        "PNG": {"compress_level": 1},
+    },
+    "balanced": {
+        "JPEG": {"quality": 90, "subsampling": 2, "optimize": True, "progressive": False},
+        "WEBP": {"quality": 85, "method": 4},
+        "PNG": {"compress_level": 6},
+    },
+    "small": {
+        "JPEG": {"quality": 80, "subsampling": 2, "optimize": True, "progressive": True},
+        "WEBP": {"quality": 75, "method": 6},
+        "PNG": {"compress_level": 9, "optimize": True},
+    },
+}
+PROFILE_NAMES = (DEFAULT_PROFILE,) + tuple(PROFILES)
+PROFILE_LABELS = {
+    "default": "標準（従来どおり）",
+    "fast": "速さ優先",
+    "balanced": "バランス",
+    "small": "サイズ優先",
+}
+
+
+def save_options(profile, image_format, **default_options):
+    """プロファイルと保存形式に応じた Image.save のオプションを返す
+
+    default（またはNone）の場合と、プロファイルに設定のない形式では default_options をそのまま使う。
+    """
+    if profile in (None, DEFAULT_PROFILE):
+        return dict(default_options)
+    if profile not in PROFILES:
+        raise ValueError(f"不明な圧縮設定です: {profile}")
+    options = PROFILES[profile].get((image_format or "").upper())
+    return dict(options) if options is not None else dict(default_options)
+
+
+def add_argument(parser):
+    parser.add_argument(
+        "--encoder", choices=PROFILE_NAMES, default=DEFAULT_PROFILE,
+        help="保存時の圧縮設定（default / fast / balanced / small）"
+    )
+
+
+def calibration_sample(folder, count):
+    """フォルダ内の画像から、名前順に等間隔で count 件を選ぶ"""
+    extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tiff', '.webp'}
+    files = sorted(f for f in os.listdir(folder) if Path(f).suffix.lower() in extensions)
+    if len(files) <= count:
+        return files
+    step = len(files) / count
+    return [files[int(i * step)] for i in range(count)]
+
+
+def calibrate(folder, sample=20, formats=("JPEG", "WEBP"), width=CALIBRATION_WIDTH, default_quality=95):
+    """サンプル画像を各プロファイルで保存し、{(形式, プロファイル): (ms/枚, bytes/枚)} を返す
+
+    保存時間だけを比べるため、読み込みとリサイズは計測の前に済ませておく。
+    """
+    from PIL import Image
+    try:
+        from .rendering import resized_size
+    except ImportError:
+        from rendering import resized_size
+
+    images = []
+    for filename in calibration_sample(folder, sample):
+        try:
+            with Image.open(os.path.join(folder, filename)) as img:
+                img.load()
+                if img.width > width:
+                    img = img.resize(resized_size(img.width, img.height, width), Image.Resampling.LANCZOS)
+                images.append(img.convert("RGB"))
+        except Exception as e:
+            print(f"エラー: {filename} を読み込めませんでした: {e}", file=sys.stderr)
+    if not images:
+        return {}
+
+    results = {}
+    for image_format in formats:
+        for profile in PROFILE_NAMES:
+            options = save_options(profile, image_format, quality=default_quality)
+            total_bytes = 0
+            start = time.perf_counter()
+            for img in images:
+                buf = io.BytesIO()
+                img.save(buf, image_format, **options)
+                total_bytes += buf.tell()
+            elapsed = time.perf_counter() - start
+            results[(image_format, profile)] = (elapsed * 1000 / len(images), total_bytes / len(images))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="圧縮設定ごとの保存時間とファイルサイズを計測する")
+    parser.add_argument("folder", help="サンプルに使う画像のフォルダ")
+    parser.add_argument("--sample", type=int, default=20, help="計測に使う画像の枚数")
+    parser.add_argument("--formats", default="JPEG,WEBP", help="比較する保存形式（カンマ区切り）")
+    parser.add_argument("--width", type=int, default=CALIBRATION_WIDTH, help="リサイズ後の横幅")
+    args = parser.parse_args(argv)
+
+    from PIL import features
+
+    formats = [f.strip().upper() for f in args.formats.split(",") if f.strip()]
+    if "WEBP" in formats and not features.check("webp"):
+        print("注意: このPillowはWebPに対応していないため除外します", file=sys.stderr)
+        formats.remove("WEBP")
+
+    results = calibrate(args.folder, args.sample, formats, args.width)
+    if not results:
+        print("計測できる画像がありませんでした", file=sys.stderr)
+        return 1
+
+    print(f"{'形式':<6} {'設定':<10} {'ms/枚':>9} {'KB/枚':>9} {'サイズ比':>8}")
+    for image_format in formats:
+        base_bytes = results[(image_format, DEFAULT_PROFILE)][1]
+        for profile in PROFILE_NAMES:
+            ms, size = results[(image_format, profile)]
+            print(f"{image_format:<6} {profile:<10} {ms:9.2f} {size / 1024:9.1f} {size / base_bytes:8.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""
+元フォルダを監視し、追加・削除された画像ファイルを通知する。
+Linuxではinotifyを使い、使えない環境ではフォルダの更新日時が変わったときだけ一覧を取り直す。
+"""
+import bisect
+import ctypes
+import ctypes.util
+import os
+import queue
+import select
+import struct
+import sys
+import threading
+from pathlib import Path
+
+# inotifyのイベント種別
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def apply_changes(image_files, current_index, added, removed):
+    """ソート済みの画像リストに差分を反映し、表示中の画像が変わらないよう調整した番号を返す"""
+    for filename in removed:
+        index = bisect.bisect_left(image_files, filename)
+        if index < len(image_files) and image_files[index] == filename:
+            del image_files[index]
+            if index < current_index:
+                current_index -= 1
+    for filename in added:
+        index = bisect.bisect_left(image_files, filename)
+        if index < len(image_files) and image_files[index] == filename:
+            continue
+        image_files.insert(index, filename)
+        if index <= current_index:
+            current_index += 1
+    if image_files:
+        current_index = min(max(current_index, 0), len(image_files) - 1)
+    else:
+        current_index = -1
+    return current_index
+
+
+class FolderWatcher:
+    """フォルダの変更を別スレッドで監視し、(追加, 削除) のリストをキューに入れる"""
+
+    def __init__(self, folder, extensions, known_files=(), poll_interval=1.0):
+        self.folder = folder
+        self.extensions = {ext.lower() for ext in extensions}
+        self.known = set(known_files)
+        self.poll_interval = poll_interval
+        self.changes = queue.Queue()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.backend = None
+
+    def start(self):
+        libc = self._load_inotify()
+        if libc is not None:
+            self.backend = "inotify"
+            target = lambda: self._run_inotify(libc)
+        else:
+            self.backend = "polling"
+            target = self._run_polling
+        self.thread = threading.Thread(target=target, daemon=True, name="folder-watcher")
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def poll(self):
+        """溜まった変更をまとめて取り出す（メインスレッドから呼ぶ）"""
+        added, removed = set(), set()
+        while True:
+            try:
+                new_added, new_removed = self.changes.get_nowait()
+            except queue.Empty:
+                break
+            for filename in new_removed:
+                added.discard(filename)
+                removed.add(filename)
+            for filename in new_added:
+                removed.discard(filename)
+                added.add(filename)
+        return sorted(added), sorted(removed)
+
+    def _is_image(self, filename):
+        return Path(filename).suffix.lower() in self.extensions
+
+    def _notify(self, added, removed):
+        added = [f for f in added if f not in self.known]
+        removed = [f for f in removed if f in self.known]
+        self.known.update(added)
+        self.known.difference_update(removed)
+        if added or removed:
+            self.changes.put((added, removed))
+
+    def _rescan(self):
+        try:
+            current = {entry.name for entry in os.scandir(self.folder) if entry.is_file() and self._is_image(entry.name)}
+        except OSError:
+            return
+        self._notify(current - self.known, self.known - current)
+
+    @staticmethod
+    def _load_inotify():
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            libc.inotify_init
+            libc.inotify_add_watch
+        except (OSError, AttributeError):
+            return None
+        return libc
+
+    def _run_inotify(self, libc):
+        fd = libc.inotify_init()
+        if fd < 0:
+            self.backend = "polling"
+            self._run_polling()
+            return
+        try:
+            mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE | IN_DELETE_SELF
+            if libc.inotify_add_watch(fd, os.fsencode(self.folder), mask) < 0:
+                self.backend = "polling"
+                self._run_polling()
+                return
+            # 監視開始までに追加されたファイルを拾う
+            self._rescan()
+            while not self.stop_event.is_set():
+                ready, _, _ = select.select([fd], [], [], 0.5)
+                if not ready:
+                    continue
+                buf = os.read(fd, 64 * 1024)
+                added, removed = [], []
+                offset = 0
+                while offset < len(buf):
+                    _, event_mask, _, name_len = EVENT_HEADER.unpack_from(buf, offset)
+                    name = os.fsdecode(buf[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + name_len].rstrip(b"\0"))
+                    offset += EVENT_HEADER.size + name_len
+                    if event_mask & IN_Q_OVERFLOW:
+                        # イベントが溢れた場合は一覧を取り直す
+                        self._rescan()
+                        continue
+                    if event_mask & IN_ISDIR or not name or not self._is_image(name):
+                        continue
+                    if event_mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                        added.append(name)
+                    elif event_mask & (IN_DELETE | IN_MOVED_FROM):
+                        removed.append(name)
+                self._notify(added, removed)
+        finally:
+            os.close(fd)
+
+    def _run_polling(self):
+        last_mtime = None
+        while not self.stop_event.is_set():
+            try:
+                mtime = os.stat(self.folder).st_mtime_ns
+            except OSError:
+                mtime = None
+            # フォルダの更新日時が変わったときだけ一覧を取り直す
+            if mtime != last_mtime:
+                last_mtime = mtime
+                self._rescan()
+            self.stop_event.wait(self.poll_interval)
@@ -0,0 +1,159 @@
+"""
+JSONエディタの編集履歴。レコード全体ではなく、変更されたフィールドの差分だけを保持する。
+セッション中は元に戻す／やり直しに使い、変更ログはサイズ上限付きのJSON Lines形式で保存する。
+"""
+import json
+import os
+import time
+from collections import deque
+
+try:
+    from .lazy_json import find_question
+except ImportError:
+    from lazy_json import find_question
+
+# フィールドが存在しなかったことを表す値（ログ上では {"$missing": true}）
+MISSING = {"$missing": True}
+
+
+def diff_fields(before, after):
+    """2つのレコードの差分を {field: [変更前, 変更後]} で返す"""
+    before = before or {}
+    changes = {}
+    for field in set(before) | set(after):
+        old = before.get(field, MISSING)
+        new = after.get(field, MISSING)
+        if old != new:
+            changes[field] = [old, new]
+    return changes
+
+
+def entry_records(entry):
+    """履歴1件に含まれるレコードごとの変更（一括取込などはまとめて1件に記録する）"""
+    return entry.get("batch") or [entry]
+
+
+def apply_entry(questions, entry, reverse=False):
+    """履歴1件を問題リストに適用し、適用後のレコード（削除した場合はNone）を返す"""
+    if "batch" in entry:
+        records = entry["batch"][::-1] if reverse else entry["batch"]
+        return [apply_entry(questions, record, reverse) for record in records][-1]
+    index, _ = find_question(questions, entry["id"])
+
+    # 新規作成の取り消しはレコードごと削除する
+    if entry.get("created") and reverse:
+        if index is not None:
+            del questions[index]
+        return None
+
+    question = {} if index is None else questions[index]
+    for field, (old, new) in entry["changes"].items():
+        value = old if reverse else new
+        if value == MISSING:
+            question.pop(field, None)
+        else:
+            question[field] = value
+
+    if index is None:
+        questions.append(question)
+        questions.sort(key=lambda x: x.get("id", 0))
+    return question
+
+
+class EditHistory:
+    def __init__(self, log_path, max_entries=1000, max_log_bytes=1024 * 1024):
+        self.log_path = log_path
+        self.max_log_bytes = max_log_bytes
+        self.undo_stack = deque(maxlen=max_entries)
+        self.redo_stack = []
+
+    def record(self, type_english, question_id, before, after):
+        """保存時の変更を記録（変更がなければ何もしない）"""
+        changes = diff_fields(before, after)
+        if not changes:
+            return None
+        entry = {
+            "time": time.time(),
+            "type": type_english,
+            "id": question_id,
+            "created": before is None,
+            "changes": changes,
+        }
+        return self._push(entry)
+
+    def record_batch(self, type_english, records):
+        """複数レコードの変更 [(ID, 変更前, 変更後), ...] を、1回で元に戻せる1件として記録"""
+        batch = []
+        for question_id, before, after in records:
+            changes = diff_fields(before, after)
+            if changes:
+                batch.append({"id": question_id, "created": before is None, "changes": changes})
+        if not batch:
+            return None
+        entry = {
+            "time": time.time(),
+            "type": type_english,
+            "id": batch[0]["id"],
+            "batch": batch,
+        }
+        return self._push(entry)
+
+    def _push(self, entry):
+        self.undo_stack.append(entry)
+        self.redo_stack.clear()
+        self.append_log(entry, "edit")
+        return entry
+
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def undo(self):
+        """元に戻す履歴を取り出す（適用は呼び出し側で reverse=True として行う）"""
+        if not self.undo_stack:
+            return None
+        entry = self.undo_stack.pop()
+        self.redo_stack.append(entry)
+        self.append_log(entry, "undo")
+        return entry
+
+    def redo(self):
+        """やり直す履歴を取り出す"""
+        if not self.redo_stack:
+            return None
+        entry = self.redo_stack.pop()
+        self.undo_stack.append(entry)
+        self.append_log(entry, "redo")
+        return entry
+
+    def append_log(self, entry, action):
+        """変更ログに1行追記し、上限を超えたら古い行を捨てる"""
+        if not self.log_path:
+            return
+        line = json.dumps(dict(entry, action=action, time=time.time()), ensure_ascii=False)
+        try:
+            os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            if os.path.getsize(self.log_path) > self.max_log_bytes:
+                self.compact_log()
+        except OSError as e:
+            print(f"エラー: 変更ログを書き込めませんでした: {e}")
+
+    def compact_log(self):
+        """変更ログの新しい方の半分だけを残す"""
+        with open(self.log_path, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+        kept = []
+        size = 0
+        for line in reversed(lines):
+            size += len(line.encode("utf-8"))
+            if size > self.max_log_bytes // 2:
+                break
+            kept.append(line)
+        tmp_path = self.log_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(reversed(kept))
+        os.replace(tmp_path, self.log_path)
@@ -0,0 +1,169 @@
+"""
+問題画像をハッシュ値（SHA-256）で管理する重複排除ストア。
+実体は img/.store/ 以下に1つだけ置き、img/{種別}/ のファイルはハードリンクにする。
+JSON内のパス（img/{種別}/{種別}_001.jpg）はそのまま使える。
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+STORE_DIRNAME = ".store"
+MANIFEST_FILENAME = "manifest.json"
+IMAGE_FIELDS = ("meterImage", "explanationImage")
+
+
+def hash_file(path, chunk_size=1024 * 1024):
+    """ファイル内容のSHA-256を返す"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def referenced_paths(questions):
+    """問題データから参照されている画像パス（JSON内の相対パス）を列挙"""
+    for question in questions:
+        for field in IMAGE_FIELDS:
+            rel_path = question.get(field)
+            if rel_path:
+                yield rel_path
+
+
+class ImageStore:
+    def __init__(self, base_dir):
+        self.base_dir = base_dir
+        self.store_dir = os.path.join(base_dir, "img", STORE_DIRNAME)
+        self.manifest_path = os.path.join(self.store_dir, MANIFEST_FILENAME)
+        self.lock = threading.Lock()
+        self.manifest = self._load_manifest()  # JSON内の相対パス -> ハッシュ値
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f).get("refs", {})
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        """マニフェストを保存"""
+        os.makedirs(self.store_dir, exist_ok=True)
+        with self.lock:
+            data = {"refs": dict(sorted(self.manifest.items()))}
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def blob_path(self, digest):
+        return os.path.join(self.store_dir, digest[:2], digest + ".jpg")
+
+    def relative_path(self, path):
+        return os.path.relpath(path, self.base_dir).replace(os.sep, "/")
+
+    def adopt(self, path):
+        """画像ファイルをストアに登録する
+
+        同じ内容の実体が既にあれば、ファイルをその実体へのハードリンクに置き換える。
+        ハードリンクが使えないファイルシステムではコピーする。
+        """
+        digest = hash_file(path)
+        blob = self.blob_path(digest)
+        with self.lock:
+            if os.path.exists(blob):
+                if not os.path.samefile(blob, path):
+                    self._place(blob, path)
+            else:
+                os.makedirs(os.path.dirname(blob), exist_ok=True)
+                try:
+                    os.link(path, blob)
+                except OSError:
+                    shutil.copyfile(path, blob)
+            self.manifest[self.relative_path(path)] = digest
+        return digest
+
+    @staticmethod
+    def _place(blob, path):
+        # 実体を直接書き換えないよう、一時ファイルを作ってから置き換える
+        tmp_path = path + ".tmp"
+        try:
+            os.link(blob, tmp_path)
+        except OSError:
+            shutil.copyfile(blob, tmp_path)
+        os.replace(tmp_path, path)
+
+    def reference_counts(self, questions_list):
+        """ハッシュ値ごとのJSONからの参照数を返す"""
+        counts = {}
+        with self.lock:
+            for questions in questions_list:
+                for rel_path in referenced_paths(questions):
+                    digest = self.manifest.get(rel_path)
+                    if digest:
+                        counts[digest] = counts.get(digest, 0) + 1
+        return counts
+
+    def deduplicate(self, questions_list):
+        """参照されているすべての画像をストアに登録し、重複をハードリンクにまとめる
+
+        戻り値: (登録した画像数, 削減できたバイト数)
+        """
+        seen = set()
+        adopted = 0
+        saved_bytes = 0
+        for questions in questions_list:
+            for rel_path in referenced_paths(questions):
+                if rel_path in seen:
+                    continue
+                seen.add(rel_path)
+                full_path = os.path.join(self.base_dir, rel_path)
+                if not os.path.isfile(full_path):
+                    continue
+                before = os.stat(full_path)
+                self.adopt(full_path)
+                after = os.stat(full_path)
+                if (before.st_dev, before.st_ino) != (after.st_dev, after.st_ino):
+                    saved_bytes += before.st_size
+                adopted += 1
+        self.save()
+        return adopted, saved_bytes
+
+    def collect_garbage(self, questions_list):
+        """どのJSONからも参照されていない実体を削除する
+
+        戻り値: (削除した実体の数, 解放したバイト数)
+        """
+        live_paths = set()
+        for questions in questions_list:
+            live_paths.update(referenced_paths(questions))
+
+        with self.lock:
+            for rel_path in list(self.manifest):
+                if rel_path not in live_paths or not os.path.exists(os.path.join(self.base_dir, rel_path)):
+                    del self.manifest[rel_path]
+            live_digests = set(self.manifest.values())
+
+        removed = 0
+        freed_bytes = 0
+        if os.path.isdir(self.store_dir):
+            for prefix in os.listdir(self.store_dir):
+                prefix_dir = os.path.join(self.store_dir, prefix)
+                if not os.path.isdir(prefix_dir):
+                    continue
+                for filename in os.listdir(prefix_dir):
+                    digest = os.path.splitext(filename)[0]
+                    if digest in live_digests:
+                        continue
+                    blob = os.path.join(prefix_dir, filename)
+                    st = os.stat(blob)
+                    os.remove(blob)
+                    removed += 1
+                    # ハードリンクが残っている場合はディスク上の容量は減らない
+                    if st.st_nlink <= 1:
+                        freed_bytes += st.st_size
+                if not os.listdir(prefix_dir):
+                    os.rmdir(prefix_dir)
+        self.save()
+        return removed, freed_bytes
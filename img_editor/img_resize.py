@@ -1,24 +1,45 @@
 """
 選択したフォルダ内の画像を、縦横比を維持して横幅500pxにリサイズし、保存先フォルダに保存する。
+元・保存先には zip/tar アーカイブも指定できる（展開せずに処理する）。
 """
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-from PIL import Image
-import os
-from pathlib import Path
 import threading
+import zipfile
+import tarfile
+
+try:
+    from .encoder_profiles import PROFILE_NAMES, PROFILE_LABELS, DEFAULT_PROFILE
+    from .output_layout import LAYOUTS, LAYOUT_LABELS, FLAT
+    from .profiling import profiled
+    from .lazy_import import LazyModule
+    from . import diagnostics, encoder_profiles, output_layout, parallel_resize
+except ImportError:
+    from encoder_profiles import PROFILE_NAMES, PROFILE_LABELS, DEFAULT_PROFILE
+    from output_layout import LAYOUTS, LAYOUT_LABELS, FLAT
+    from profiling import profiled
+    from lazy_import import LazyModule
+    import diagnostics
+    import encoder_profiles
+    import output_layout
+    import parallel_resize
+
+# リサイズ処理（Pillow を使う）は実行するときに読み込む
+batch_resize = LazyModule("batch_resize", __package__)
 
 
 class ImageResizeApp:
-    def __init__(self, root):
+    def __init__(self, root, encoder_profile=DEFAULT_PROFILE, layout=FLAT, workers=1):
         self.root = root
         self.root.title("画像リサイズアプリ")
         
         # 変数の初期化
         self.source_folder = ""
         self.dest_folder = ""
-        self.image_files = []
         self.is_processing = False
+        self.encoder_profile = encoder_profile  # 実行時に選択中の圧縮設定
+        self.layout = layout  # 実行時に選択中の保存先フォルダの構成
+        self.workers = workers  # 並列に処理するプロセス数
         
         # UI構築
         self.create_widgets()
@@ -35,6 +56,7 @@ class ImageResizeApp:
         self.source_label = tk.Label(source_frame, text="未選択", bg="white", width=50, anchor="w", relief=tk.SUNKEN)
         self.source_label.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
         tk.Button(source_frame, text="選択", command=self.select_source_folder).pack(side=tk.LEFT, padx=5)
+        tk.Button(source_frame, text="アーカイブ", command=self.select_source_archive).pack(side=tk.LEFT, padx=5)
         
         # 保存先フォルダ選択（縦に並べる）
         dest_frame = tk.Frame(folder_frame)
@@ -43,6 +65,23 @@ class ImageResizeApp:
         self.dest_label = tk.Label(dest_frame, text="未選択", bg="white", width=50, anchor="w", relief=tk.SUNKEN)
         self.dest_label.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
         tk.Button(dest_frame, text="選択", command=self.select_dest_folder).pack(side=tk.LEFT, padx=5)
+        tk.Button(dest_frame, text="アーカイブ", command=self.select_dest_archive).pack(side=tk.LEFT, padx=5)
+        
+        # 圧縮設定の選択
+        profile_frame = tk.Frame(folder_frame)
+        profile_frame.pack(pady=5, fill=tk.X)
+        tk.Label(profile_frame, text="圧縮設定:").pack(side=tk.LEFT, padx=5)
+        self.profile_combo = ttk.Combobox(
+            profile_frame, values=[PROFILE_LABELS[name] for name in PROFILE_NAMES], state="readonly", width=20
+        )
+        self.profile_combo.current(PROFILE_NAMES.index(self.encoder_profile))
+        self.profile_combo.pack(side=tk.LEFT, padx=5)
+        tk.Label(profile_frame, text="保存先の構成:").pack(side=tk.LEFT, padx=5)
+        self.layout_combo = ttk.Combobox(
+            profile_frame, values=[LAYOUT_LABELS[name] for name in LAYOUTS], state="readonly", width=16
+        )
+        self.layout_combo.current(LAYOUTS.index(self.layout))
+        self.layout_combo.pack(side=tk.LEFT, padx=5)
         
         # ボタンフレーム（実行ボタンと終了ボタンを横並び）
         button_frame = tk.Frame(folder_frame)
@@ -75,6 +114,18 @@ class ImageResizeApp:
             self.dest_folder = folder
             self.dest_label.config(text=folder)
             
+    def select_source_archive(self):
+        path = filedialog.askopenfilename(title="元のアーカイブを選択", filetypes=batch_resize.ARCHIVE_FILETYPES)
+        if path:
+            self.source_folder = path
+            self.source_label.config(text=path)
+            
+    def select_dest_archive(self):
+        path = filedialog.asksaveasfilename(title="保存先のアーカイブを指定", filetypes=batch_resize.ARCHIVE_FILETYPES, defaultextension=".zip")
+        if path:
+            self.dest_folder = path
+            self.dest_label.config(text=path)
+            
     def start_resize(self):
         if not self.source_folder:
             messagebox.showwarning("警告", "元フォルダを選択してください")
@@ -88,64 +139,54 @@ class ImageResizeApp:
             messagebox.showwarning("警告", "処理中です。しばらくお待ちください。")
             return
             
-        # 画像ファイルを取得
-        image_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tiff', '.webp'}
-        self.image_files = [
-            f for f in os.listdir(self.source_folder)
-            if Path(f).suffix.lower() in image_extensions
-        ]
-        self.image_files.sort()
-        
-        if not self.image_files:
+        # 画像ファイルの件数を取得（tarは先頭から読むまで件数が分からない）
+        try:
+            total = batch_resize.count_source(self.source_folder)
+        except (OSError, zipfile.BadZipFile, tarfile.TarError) as e:
+            messagebox.showerror("エラー", f"元フォルダを読み込めませんでした: {e}")
+            return
+        
+        if total == 0:
             messagebox.showinfo("情報", "画像ファイルが見つかりませんでした")
             return
             
         # 非同期で処理を開始
+        self.encoder_profile = PROFILE_NAMES[self.profile_combo.current()]
+        self.layout = LAYOUTS[self.layout_combo.current()]
         self.is_processing = True
         self.execute_button.config(state=tk.DISABLED)
-        self.progress_bar['maximum'] = len(self.image_files)
         self.progress_bar['value'] = 0
-        self.progress_label.config(text="0/{}".format(len(self.image_files)))
+        if total is None:
+            self.progress_bar.config(mode='indeterminate')
+        else:
+            self.progress_bar.config(mode='determinate', maximum=total)
+        self.progress_label.config(text="0/{}".format("?" if total is None else total))
         
         # 別スレッドで処理を実行
-        thread = threading.Thread(target=self.resize_images, daemon=True)
+        thread = threading.Thread(target=profiled(self.resize_images), daemon=True)
         thread.start()
         
     def resize_images(self):
         """画像をリサイズする処理（別スレッドで実行）"""
-        total = len(self.image_files)
-        completed = 0
-        
+        def progress(completed, total, name):
+            # プログレスバーを更新（メインスレッドで実行）
+            self.root.after(0, self.update_progress, completed, total)
+            
         try:
-            for filename in self.image_files:
-                # 画像を読み込み
-                image_path = os.path.join(self.source_folder, filename)
-                try:
-                    img = Image.open(image_path)
-                    
-                    # 縦横比を維持して横幅500pxにリサイズ
-                    original_width, original_height = img.size
-                    new_width = 500
-                    new_height = int(original_height * (new_width / original_width))
-                    
-                    resized_img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                    
-                    # 保存
-                    save_path = os.path.join(self.dest_folder, filename)
-                    resized_img.save(save_path, quality=95)
-                    
-                    completed += 1
-                    
-                    # プログレスバーを更新（メインスレッドで実行）
-                    self.root.after(0, self.update_progress, completed, total)
-                    
-                except Exception as e:
-                    print(f"エラー: {filename} の処理中にエラーが発生しました: {e}")
-                    completed += 1
-                    self.root.after(0, self.update_progress, completed, total)
-                    
+            # 縦横比を維持して横幅500pxにリサイズして保存
+            result = batch_resize.resize_batch(
+                self.source_folder, self.dest_folder, width=500, quality=95, progress=progress,
+                profile=self.encoder_profile, layout=self.layout, workers=self.workers
+            )
+            
+            # 同じ内容の画像があった場合は一覧を書き出す
+            report_path = None
+            if result.duplicates:
+                report_path = batch_resize.duplicate_report_path(self.dest_folder)
+                result.write_duplicate_report(report_path)
+            
             # 処理完了
-            self.root.after(0, self.on_complete)
+            self.root.after(0, self.on_complete, result, report_path)
             
         except Exception as e:
             messagebox.showerror("エラー", f"処理中にエラーが発生しました: {e}")
@@ -153,20 +194,34 @@ class ImageResizeApp:
             
     def update_progress(self, completed, total):
         """プログレスバーを更新"""
-        self.progress_bar['value'] = completed
-        self.progress_label.config(text="{}/{}".format(completed, total))
+        if total is None:
+            self.progress_bar.step(1)
+        else:
+            self.progress_bar['value'] = completed
+        self.progress_label.config(text="{}/{}".format(completed, "?" if total is None else total))
         
-    def on_complete(self):
+    def on_complete(self, result=None, report_path=None):
         """処理完了時の処理"""
         self.is_processing = False
         self.execute_button.config(state=tk.NORMAL)
+        self.progress_bar.config(mode='determinate')
         self.progress_label.config(text="Completed!")
-        messagebox.showinfo("完了", "すべての画像のリサイズが完了しました")
+        message = "すべての画像のリサイズが完了しました"
+        if result is not None:
+            message += f"\n{result.summary()}"
+        if report_path is not None:
+            message += f"\n重複の一覧: {report_path}"
+        messagebox.showinfo("完了", message)
 
 
-def main():
+def main(argv=None):
+    args = diagnostics.parse_args(
+        "画像リサイズアプリ", argv,
+        (encoder_profiles.add_argument, output_layout.add_argument, parallel_resize.add_argument)
+    )
     root = tk.Tk()
-    app = ImageResizeApp(root)
+    diagnostics.attach(root, args, "img_resize")
+    app = ImageResizeApp(root, encoder_profile=args.encoder, layout=args.layout, workers=args.workers)
     root.mainloop()
 
 
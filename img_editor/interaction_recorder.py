@@ -0,0 +1,73 @@
+"""
+描画エディタのキャンバス操作（クリック・ドラッグ・Enter）を時刻付きで記録する。
+記録したファイルは python -m benchmarks.replay で再生し、各操作の処理時間を計測できる。
+
+記録の形式（JSON Lines）:
+    1行目: {"recording": 1, "tool": ツール名, "image": 最初に表示していた画像のパス}
+    2行目以降: {"t": 記録開始からのミリ秒, "type": "press" / "motion" / "release" / "return", "x", "y", "state"}
+               画像を切り替えた場合は {"t", "type": "image", "path": 画像のパス}
+"""
+import atexit
+import json
+import os
+import sys
+import time
+
+RECORDING_VERSION = 1
+CANVAS_EVENTS = (
+    ("<Button-1>", "press"),
+    ("<B1-Motion>", "motion"),
+    ("<ButtonRelease-1>", "release"),
+)
+
+
+def current_image_path(app):
+    if 0 <= app.current_image_index < len(app.image_files):
+        return os.path.join(app.source_folder, app.image_files[app.current_image_index])
+    return None
+
+
+class InteractionRecorder:
+    def __init__(self, app, path, tool):
+        self.app = app
+        self.path = path
+        self.tool = tool
+        self.events = []
+        self.start = None
+        self.first_image = None
+        self.last_image = None
+        # エディタ自身の処理の後に記録する（add="+" で既存の処理はそのまま）
+        for sequence, kind in CANVAS_EVENTS:
+            app.canvas.bind(sequence, lambda event, kind=kind: self.record(kind, event), add="+")
+        app.root.bind("<Return>", lambda event: self.record("return", event), add="+")
+        atexit.register(self.save)
+
+    def record(self, kind, event):
+        now = time.perf_counter()
+        if self.start is None:
+            self.start = now
+        elapsed_ms = round((now - self.start) * 1000, 3)
+        image = current_image_path(self.app)
+        if image != self.last_image:
+            if self.first_image is None:
+                self.first_image = image
+            else:
+                self.events.append({"t": elapsed_ms, "type": "image", "path": image})
+            self.last_image = image
+        self.events.append({"t": elapsed_ms, "type": kind, "x": event.x, "y": event.y, "state": event.state})
+
+    def save(self):
+        if not self.events:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            header = {"recording": RECORDING_VERSION, "tool": self.tool, "image": self.first_image}
+            f.write(json.dumps(header, ensure_ascii=False) + "\n")
+            for event in self.events:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.path)
+        print(f"操作を記録しました: {self.path}（{len(self.events)}件）", file=sys.stderr)
+
+
+def add_argument(parser):
+    parser.add_argument("--record", metavar="ファイル", help="キャンバスの操作を記録するファイル（benchmarks.replay で再生）")
@@ -1,10 +1,41 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import json
 import os
+import copy
+import threading
 from pathlib import Path
-from PIL import Image, ImageTk
-import shutil
+
+try:
+    from .dataset_cache import DatasetCache, ThumbnailCache
+    from .search_index import SearchIndex
+    from .image_store import ImageStore
+    from .history import EditHistory, apply_entry, entry_records
+    from .lazy_json import LazyJsonData, find_question, write_json_file
+    from .profiling import profiled
+    from .lazy_import import LazyModule
+    from . import diagnostics, tracing
+except ImportError:
+    from dataset_cache import DatasetCache, ThumbnailCache
+    from search_index import SearchIndex
+    from image_store import ImageStore
+    from history import EditHistory, apply_entry, entry_records
+    from lazy_json import LazyJsonData, find_question, write_json_file
+    from profiling import profiled
+    from lazy_import import LazyModule
+    import diagnostics
+    import tracing
+
+# Pillow と、一覧・一括取込・検証は使うときに読み込む（起動してすぐウィンドウを出せるようにする）
+Image = LazyModule("PIL.Image")
+ImageTk = LazyModule("PIL.ImageTk")
+bulk_import = LazyModule("bulk_import", __package__)
+overview = LazyModule("overview", __package__)
+validator = LazyModule("validator", __package__)
+
+
+def is_text_input(widget):
+    """文字入力中のウィジェットか（Ctrl+Z などは入力欄自身の操作として扱う）"""
+    return isinstance(widget, (tk.Entry, tk.Text, tk.Spinbox, ttk.Entry))
 
 
 class JsonEditorApp:
@@ -26,6 +57,15 @@ class JsonEditorApp:
         self.json_data = None
         self.current_id = 1
         self.current_data = None
+        self.saved_data = None  # 表示したときの current_data の内容（履歴の変更前として使う）
+        self.last_id_by_type = {}  # 種別ごとに最後に表示したID
+        self.base_dir = os.path.dirname(__file__)
+        
+        # 画像はハッシュ値で重複排除して保存
+        self.image_store = ImageStore(self.base_dir)
+        
+        # 編集履歴（フィールド単位の差分。変更ログはjson/history.jsonlに保存）
+        self.history = EditHistory(os.path.join(self.base_dir, "json", "history.jsonl"))
         
         # 画像パスを保持
         self.meter_image_path = None
@@ -33,10 +73,45 @@ class JsonEditorApp:
         
         # 無限ループ防止用フラグ
         self.is_loading = False
+        self.is_importing = False
         self.last_shown_id = None  # 最後にメッセージを表示したID
         
         self.setup_ui()
         
+        # 検索用の転置インデックス（JSONの読み込み時に作成し、保存時に差分更新）
+        self.search_index = SearchIndex(["id", "meterImage", "explanationImage"] + self.field_names)
+        self.search_results = []
+        self.overview = None
+        
+        # 3種別のJSONと先頭画面のサムネイルをバックグラウンドで先読み
+        self.thumbnails = ThumbnailCache(max_width=500)
+        self.datasets = DatasetCache(
+            self.base_dir,
+            self.type_mapping,
+            thumbnails=self.thumbnails,
+            on_loaded=self.on_dataset_loaded
+        )
+        self.datasets.preload()
+        
+        # 先読みが終わったら初期種別を表示
+        self.root.after(50, self.show_initial_type)
+        
+    def on_dataset_loaded(self, type_english, data):
+        """JSONの読み込み完了時に検索用の索引を作成（別スレッドから呼ばれる）"""
+        # 遅延読み込みのデータは全件の解析になるため、最初の検索時に作成する
+        if not isinstance(data, LazyJsonData):
+            self.search_index.index_dataset(type_english, data)
+        
+    def show_initial_type(self):
+        """先読み完了後、まだ何も表示していなければ選択中の種別を表示"""
+        if self.current_type is not None:
+            return
+        type_english = self.type_mapping[self.type_var.get()][0]
+        if not self.datasets.is_ready(type_english):
+            self.root.after(50, self.show_initial_type)
+            return
+        self.on_type_change()
+        
     def setup_ui(self):
         # 上部フレーム：ラジオボタンと読み込みボタン
         top_frame = ttk.Frame(self.root, padding="10")
@@ -83,6 +158,57 @@ class JsonEditorApp:
         # 保存ボタン
         ttk.Button(top_frame, text="保存", command=self.save_data).pack(side=tk.LEFT, padx=10)
         
+        # 元に戻す・やり直しボタン
+        self.undo_button = ttk.Button(top_frame, text="元に戻す", command=self.undo_edit, state=tk.DISABLED)
+        self.undo_button.pack(side=tk.LEFT, padx=5)
+        self.redo_button = ttk.Button(top_frame, text="やり直し", command=self.redo_edit, state=tk.DISABLED)
+        self.redo_button.pack(side=tk.LEFT, padx=5)
+        self.root.bind("<Control-z>", lambda e: None if is_text_input(e.widget) else self.undo_edit())
+        self.root.bind("<Control-y>", lambda e: None if is_text_input(e.widget) else self.redo_edit())
+        
+        # 一覧ボタン
+        ttk.Button(top_frame, text="一覧", command=self.open_overview).pack(side=tk.LEFT, padx=10)
+        
+        # 一括取込ボタン
+        self.import_button = ttk.Button(top_frame, text="一括取込", command=self.bulk_import_images)
+        self.import_button.pack(side=tk.LEFT, padx=10)
+        
+        # 画像整理ボタン（重複画像のハードリンク化と不要な実体の削除）
+        self.cleanup_button = ttk.Button(top_frame, text="画像整理", command=self.cleanup_images)
+        self.cleanup_button.pack(side=tk.LEFT, padx=10)
+        
+        # 検証ボタン
+        self.validate_button = ttk.Button(top_frame, text="検証", command=self.validate_all)
+        self.validate_button.pack(side=tk.LEFT, padx=10)
+        
+        # 検索フレーム：全種別のデータをフィールド単位で検索
+        search_frame = ttk.Frame(self.root, padding=(10, 0))
+        search_frame.pack(fill=tk.X)
+        
+        search_bar = ttk.Frame(search_frame)
+        search_bar.pack(fill=tk.X)
+        ttk.Label(search_bar, text="検索:").pack(side=tk.LEFT, padx=5)
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(search_bar, textvariable=self.search_var, width=40)
+        search_entry.pack(side=tk.LEFT, padx=5)
+        search_entry.bind("<Return>", lambda e: self.run_search())
+        
+        self.search_field_var = tk.StringVar(value="すべて")
+        self.search_field_combo = ttk.Combobox(search_bar, textvariable=self.search_field_var, state="readonly", width=15)
+        self.search_field_combo.pack(side=tk.LEFT, padx=5)
+        ttk.Button(search_bar, text="検索", command=self.run_search).pack(side=tk.LEFT, padx=5)
+        self.search_status_label = ttk.Label(search_bar, text="")
+        self.search_status_label.pack(side=tk.LEFT, padx=10)
+        
+        result_frame = ttk.Frame(search_frame)
+        result_frame.pack(fill=tk.X, pady=5)
+        self.search_listbox = tk.Listbox(result_frame, height=5)
+        result_scrollbar = ttk.Scrollbar(result_frame, orient="vertical", command=self.search_listbox.yview)
+        self.search_listbox.configure(yscrollcommand=result_scrollbar.set)
+        self.search_listbox.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        result_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.search_listbox.bind("<<ListboxSelect>>", self.on_search_select)
+        
         # メインフレーム：左右に分割
         main_frame = ttk.Frame(self.root, padding="10")
         main_frame.pack(fill=tk.BOTH, expand=True)
@@ -170,6 +296,9 @@ class JsonEditorApp:
                 self.text_vars[field_name] = var
                 self.text_entries[field_name] = entry
         
+        # 検索対象フィールドの選択肢
+        self.search_field_combo["values"] = ["すべて"] + [self.get_field_label(f) for f in self.field_names]
+        
     def get_field_label(self, field_name):
         """フィールド名を日本語ラベルに変換"""
         labels = {
@@ -187,14 +316,99 @@ class JsonEditorApp:
         }
         return labels.get(field_name, field_name)
     
+    def run_search(self):
+        """検索欄のキーワードで全種別のデータを検索"""
+        query = self.search_var.get()
+        field = None
+        selected_label = self.search_field_var.get()
+        for field_name in self.field_names:
+            if self.get_field_label(field_name) == selected_label:
+                field = field_name
+                break
+        
+        # ファイルが更新されていれば再読み込み（読み込み時に索引も作り直される）
+        for type_english, _ in self.type_mapping.values():
+            try:
+                data = self.datasets.get(type_english)
+            except Exception:
+                continue
+            if not self.search_index.is_indexed(type_english, data):
+                self.search_index.index_dataset(type_english, data)
+        
+        self.search_results = self.search_index.search(query, field)
+        type_names = {english: name for name, (english, _) in self.type_mapping.items()}
+        self.search_listbox.delete(0, tk.END)
+        for type_english, question_id, field_name, snippet in self.search_results:
+            self.search_listbox.insert(
+                tk.END,
+                f"[{type_names.get(type_english, type_english)}] ID {question_id} / {self.get_field_label(field_name)}: {snippet}"
+            )
+        self.search_status_label.config(text=f"{len(self.search_results)}件")
+    
+    def on_search_select(self, event=None):
+        """検索結果を選択したら該当レコードを表示"""
+        selection = self.search_listbox.curselection()
+        if not selection:
+            return
+        type_english, question_id, _, _ = self.search_results[selection[0]]
+        try:
+            question_id = int(question_id)
+        except (TypeError, ValueError):
+            return
+        for type_name, (english, _) in self.type_mapping.items():
+            if english == type_english:
+                if type_english != self.current_type_english:
+                    self.type_var.set(type_name)
+                    self.on_type_change()
+                break
+        self.select_id(question_id)
+    
+    def select_id(self, question_id):
+        """指定したIDのレコードを表示"""
+        self.current_id = question_id
+        self.id_var.set(str(question_id))
+        self.load_data_by_id()
+    
+    def open_overview(self):
+        """全レコードの一覧ウィンドウを開く"""
+        if self.overview is not None and self.overview.exists():
+            self.overview.window.lift()
+        else:
+            self.overview = overview.OverviewWindow(self.root, self.base_dir, on_select=self.select_id)
+        self.refresh_overview()
+    
+    def refresh_overview(self):
+        """一覧ウィンドウが開いていれば現在の種別のデータで更新"""
+        if self.overview is None or not self.overview.exists():
+            return
+        questions = self.json_data.get("questions", []) if self.json_data else []
+        self.overview.window.title(f"一覧 - {self.current_type or ''}")
+        self.overview.set_records(questions)
+    
     def on_type_change(self):
-        """種別が変更されたときの処理"""
+        """種別が変更されたときの処理（先読み済みのデータに即座に切り替える）"""
+        if self.current_type_english is not None:
+            self.last_id_by_type[self.current_type_english] = self.current_id
+        
         self.current_type = self.type_var.get()
         self.current_type_english, json_filename = self.type_mapping[self.current_type]
         self.current_json_file = os.path.join("json", json_filename)
-        self.current_id = 1
-        self.id_var.set("1")
-        self.clear_display()
+        self.current_id = self.last_id_by_type.get(self.current_type_english, 1)
+        self.id_var.set(str(self.current_id))
+        self.current_data = None
+        self.last_shown_id = None
+        
+        try:
+            self.json_data = self.datasets.get(self.current_type_english)
+        except Exception:
+            # 読み込めない場合は「読み込み」ボタンでエラー内容を表示する
+            self.json_data = None
+        
+        if self.json_data:
+            self.load_data_by_id()
+        else:
+            self.clear_display()
+        self.refresh_overview()
     
     def on_id_change(self):
         """IDが変更されたときの処理"""
@@ -220,15 +434,15 @@ class JsonEditorApp:
             self.current_type = self.type_var.get()
             self.on_type_change()
         
-        json_path = os.path.join(os.path.dirname(__file__), self.current_json_file)
+        json_path = os.path.join(self.base_dir, self.current_json_file)
         
         if not os.path.exists(json_path):
             messagebox.showerror("エラー", f"JSONファイルが見つかりません: {json_path}")
             return
         
         try:
-            with open(json_path, "r", encoding="utf-8") as f:
-                self.json_data = json.load(f)
+            # 更新日時が変わっていなければメモリ上のデータをそのまま使う
+            self.json_data = self.datasets.get(self.current_type_english)
             self.load_data_by_id()
         except Exception as e:
             messagebox.showerror("エラー", f"JSONファイルの読み込みに失敗しました: {str(e)}")
@@ -247,11 +461,9 @@ class JsonEditorApp:
                 return
             
             # 指定IDのデータを検索
-            self.current_data = None
-            for question in self.json_data.get("questions", []):
-                if question.get("id") == self.current_id:
-                    self.current_data = question
-                    break
+            _, self.current_data = find_question(self.json_data.get("questions", []), self.current_id)
+            # 画像の選択などで保存前に current_data が変わるため、表示した時点の内容を控えておく
+            self.saved_data = copy.deepcopy(self.current_data) if self.current_data else None
             
             if not self.current_data:
                 # 同じIDに対しては一度だけメッセージを表示
@@ -280,11 +492,11 @@ class JsonEditorApp:
             return
         
         # 既に存在するIDかチェック
-        for question in self.json_data.get("questions", []):
-            if question.get("id") == self.current_id:
-                messagebox.showinfo("情報", f"ID {self.current_id} のデータは既に存在します。")
-                self.load_data_by_id()
-                return
+        _, question = find_question(self.json_data.get("questions", []), self.current_id)
+        if question is not None:
+            messagebox.showinfo("情報", f"ID {self.current_id} のデータは既に存在します。")
+            self.load_data_by_id()
+            return
         
         # 新規データを作成
         self.create_new_data()
@@ -298,23 +510,25 @@ class JsonEditorApp:
     
     def create_new_data(self):
         """新規データを作成"""
-        id_str = f"{self.current_id:03d}"
-        
-        # デフォルト値を設定
-        self.current_data = {
-            "id": self.current_id,
-            "meterImage": f"img/{self.current_type_english}/{self.current_type_english}_{id_str}.jpg",
+        self.current_data = self.new_question_data(self.current_type_english, self.current_id)
+        self.saved_data = None
+    
+    def new_question_data(self, type_english, question_id):
+        """デフォルト値を設定した新規データを返す"""
+        return {
+            "id": question_id,
+            "meterImage": f"img/{type_english}/{bulk_import.image_filename(type_english, question_id, 'meterImage')}",
             "multiplier": "1",
             "pulseUnit": "1",
-            "pulseUnitDisplay": "kWh/Pulse" if self.current_type_english == "electricity" else "m3/Pulse",
+            "pulseUnitDisplay": "kWh/Pulse" if type_english == "electricity" else "m3/Pulse",
             "integerDigits": "5",
             "decimalDigits": "1",
-            "displayUnit": "kWh" if self.current_type_english == "electricity" else "m3",
+            "displayUnit": "kWh" if type_english == "electricity" else "m3",
             "serialNumber": "",
             "inspectionYear": "2025",
             "inspectionMonth": "1",
             "displayValue": "",
-            "explanationImage": f"img/{self.current_type_english}/{self.current_type_english}_{id_str}_answer.jpg",
+            "explanationImage": f"img/{type_english}/{bulk_import.image_filename(type_english, question_id, 'explanationImage')}",
             "explanationText": []
         }
     
@@ -362,7 +576,8 @@ class JsonEditorApp:
     def load_and_display_image(self, image_path, label, max_height=None):
         """画像を読み込んで表示（縦横比を維持）"""
         try:
-            img = Image.open(image_path)
+            # 表示幅に縮小済みの画像をキャッシュから取得
+            img = self.thumbnails.get(image_path)
             original_width = img.width
             original_height = img.height
             
@@ -388,7 +603,8 @@ class JsonEditorApp:
             if new_width != original_width or new_height != original_height:
                 img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
             
-            photo = ImageTk.PhotoImage(img)
+            with tracing.span("json_editor.photo"):
+                photo = ImageTk.PhotoImage(img)
             label.config(image=photo, text="")
             label.image = photo  # 参照を保持
         except Exception as e:
@@ -456,23 +672,19 @@ class JsonEditorApp:
             self.copy_and_update_image(file_path, "explanationImage")
     
     def copy_and_update_image(self, source_path, image_type):
-        """画像をコピーして更新"""
+        """画像をJPEGに変換して保存し、更新"""
         # 保存先パスを生成
-        id_str = f"{self.current_id:03d}"
-        base_dir = os.path.dirname(__file__)
-        img_dir = os.path.join(base_dir, "img", self.current_type_english)
+        img_dir = os.path.join(self.base_dir, "img", self.current_type_english)
         os.makedirs(img_dir, exist_ok=True)
         
-        if image_type == "meterImage":
-            dest_filename = f"{self.current_type_english}_{id_str}.jpg"
-        else:  # explanationImage
-            dest_filename = f"{self.current_type_english}_{id_str}_answer.jpg"
-        
+        dest_filename = bulk_import.image_filename(self.current_type_english, self.current_id, image_type)
         dest_path = os.path.join(img_dir, dest_filename)
         
         try:
-            # 画像をコピー
-            shutil.copy2(source_path, dest_path)
+            # 横幅500px以下のJPEGに変換して保存（同じ画像が既にあれば共有する）
+            bulk_import.normalize_image(source_path, dest_path)
+            self.image_store.adopt(dest_path)
+            self.image_store.save()
             
             # JSON内のパスを更新
             json_path = f"img/{self.current_type_english}/{dest_filename}"
@@ -485,6 +697,264 @@ class JsonEditorApp:
         except Exception as e:
             messagebox.showerror("エラー", f"画像のコピーに失敗しました: {str(e)}")
     
+    def bulk_import_images(self):
+        """フォルダ内の画像をまとめて取り込み、レコードを作成・更新"""
+        if not self.json_data:
+            messagebox.showwarning("警告", "JSONファイルを読み込んでください")
+            return
+        
+        if self.is_importing:
+            messagebox.showwarning("警告", "処理中です。しばらくお待ちください。")
+            return
+        
+        folder = filedialog.askdirectory(title="取り込む画像のフォルダを選択")
+        if not folder:
+            return
+        
+        type_english = self.current_type_english
+        matched, unmatched = bulk_import.scan_folder(folder, type_english)
+        if not matched:
+            messagebox.showinfo("情報", "取り込める画像が見つかりませんでした\n（例: {0}_001.jpg, {0}_001_answer.jpg）".format(type_english))
+            return
+        
+        image_count = sum(len(images) for images in matched.values())
+        if not messagebox.askyesno("確認", f"{len(matched)}件のID（画像{image_count}枚）を取り込みます。よろしいですか？"):
+            return
+        
+        img_dir = os.path.join(self.base_dir, "img", type_english)
+        try:
+            # 保存先の画像はJSONの保存に成功するまで置き換えない
+            staging_dir = bulk_import.create_staging_dir(img_dir)
+        except OSError as e:
+            messagebox.showerror("エラー", f"取り込みに失敗しました: {str(e)}")
+            return
+        
+        self.is_importing = True
+        self.import_button.config(state=tk.DISABLED)
+        
+        def worker():
+            converted, errors, failure = {}, [], None
+            try:
+                converted, errors = bulk_import.convert_images(
+                    matched, staging_dir, type_english,
+                    progress=lambda done, total: self.root.after(0, self.import_button.config, {"text": f"取込中 {done}/{total}"})
+                )
+            except Exception as e:
+                failure = str(e)
+            finally:
+                # 失敗した場合も必ず完了を通知してボタンを戻す
+                self.root.after(
+                    0, self.on_bulk_import_done, type_english, staging_dir, converted, errors, unmatched, failure
+                )
+        
+        # 別スレッドで変換を実行
+        threading.Thread(target=profiled(worker), daemon=True).start()
+    
+    def on_bulk_import_done(self, type_english, staging_dir, converted, errors, unmatched, failure=None):
+        """変換済みの画像をレコードに反映してJSONを1回で保存し、保存できたら画像を置き換える"""
+        self.is_importing = False
+        self.import_button.config(state=tk.NORMAL, text="一括取込")
+        if failure is not None:
+            bulk_import.discard_staging_dir(staging_dir)
+            messagebox.showerror("エラー", f"取り込みに失敗しました: {failure}")
+            return
+        
+        created = updated = 0
+        try:
+            # コピー上で変更し、保存に成功したときだけ差し替える
+            data = copy.deepcopy(self.datasets.get(type_english))
+            questions = data.setdefault("questions", [])
+            changes = []  # 履歴用の [(ID, 変更前, 変更後), ...]
+            for question_id, images in sorted(converted.items()):
+                _, question = find_question(questions, question_id)
+                if question is None:
+                    before = None
+                    question = self.new_question_data(type_english, question_id)
+                    questions.append(question)
+                    created += 1
+                else:
+                    before = copy.deepcopy(question)
+                    updated += 1
+                for image_type, dest_filename in images.items():
+                    question[image_type] = f"img/{type_english}/{dest_filename}"
+                changes.append((question_id, before, question))
+            questions.sort(key=lambda x: x.get("id", 0))
+            self.write_json_file(type_english, data)
+        except Exception as e:
+            # JSONを保存できなかった場合は、保存先の画像をそのまま残す
+            bulk_import.discard_staging_dir(staging_dir)
+            messagebox.showerror("エラー", f"取り込みに失敗しました: {str(e)}")
+            return
+        
+        try:
+            bulk_import.commit_images(staging_dir, os.path.join(self.base_dir, "img", type_english), converted, store=self.image_store)
+            self.image_store.save()
+        except Exception as e:
+            messagebox.showerror("エラー", f"JSONは保存しましたが、画像の置き換えに失敗しました: {str(e)}")
+        
+        # 一括取込全体を1回の「元に戻す」で取り消せるように記録
+        self.history.record_batch(type_english, changes)
+        self.update_history_buttons()
+        
+        self.search_index.index_dataset(type_english, data)
+        if type_english == self.current_type_english:
+            self.json_data = data
+            self.load_data_by_id()
+            self.refresh_overview()
+        
+        message = f"新規 {created}件、更新 {updated}件のレコードに画像を取り込みました"
+        if errors:
+            message += f"\n\n変換に失敗した画像: {len(errors)}件\n" + "\n".join(f"{name}: {error}" for name, error in errors[:10])
+        if unmatched:
+            message += f"\n\nファイル名からIDを判定できなかった画像: {len(unmatched)}件"
+        messagebox.showinfo("完了", message)
+    
+    def cleanup_images(self):
+        """全種別の画像を重複排除し、どこからも参照されていない実体を削除"""
+        questions_list = []
+        for type_name, (type_english, _) in self.type_mapping.items():
+            try:
+                questions_list.append(self.datasets.get(type_english).get("questions", []))
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                # 読めない種別があると参照数を正しく数えられないため中止
+                messagebox.showerror("エラー", f"{type_name}のJSONを読み込めないため中止しました: {str(e)}")
+                return
+        
+        self.cleanup_button.config(state=tk.DISABLED)
+        
+        def worker():
+            try:
+                adopted, saved_bytes = self.image_store.deduplicate(questions_list)
+                removed, freed_bytes = self.image_store.collect_garbage(questions_list)
+                counts = self.image_store.reference_counts(questions_list)
+                result = (adopted, saved_bytes, removed, freed_bytes, counts)
+            except Exception as e:
+                result = e
+            self.root.after(0, self.on_cleanup_done, result)
+        
+        # 別スレッドで実行（全画像のハッシュ計算を行うため）
+        threading.Thread(target=profiled(worker), daemon=True).start()
+    
+    def on_cleanup_done(self, result):
+        """画像整理の結果を表示"""
+        self.cleanup_button.config(state=tk.NORMAL)
+        if isinstance(result, Exception):
+            messagebox.showerror("エラー", f"画像整理に失敗しました: {str(result)}")
+            return
+        adopted, saved_bytes, removed, freed_bytes, counts = result
+        shared = sum(1 for count in counts.values() if count > 1)
+        messagebox.showinfo(
+            "完了",
+            f"参照画像: {adopted}件（実体 {len(counts)}件、共有 {shared}件）\n"
+            f"重複の統合で削減: {saved_bytes / 1024:.1f} KB\n"
+            f"未参照の実体を削除: {removed}件（{freed_bytes / 1024:.1f} KB）"
+        )
+    
+    def validate_all(self):
+        """全種別のJSONと画像の整合性を検証してレポートを表示"""
+        datasets = []
+        for type_name, (type_english, _) in self.type_mapping.items():
+            try:
+                datasets.append((type_english, self.datasets.get(type_english)))
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                messagebox.showerror("エラー", f"{type_name}のJSONを読み込めません: {str(e)}")
+        if not datasets:
+            messagebox.showinfo("情報", "検証するJSONファイルがありません")
+            return
+        
+        self.validate_button.config(state=tk.DISABLED)
+        
+        def worker():
+            try:
+                reports = [validator.validate_dataset(data, self.base_dir, type_english) for type_english, data in datasets]
+            except Exception as e:
+                # e は except を抜けると消えるので、メッセージはここで作っておく
+                message = f"検証に失敗しました: {str(e)}"
+                self.root.after(0, messagebox.showerror, "エラー", message)
+            else:
+                self.root.after(0, self.show_validation_report, reports)
+            finally:
+                # 検証に失敗した場合もボタンを戻す
+                self.root.after(0, self.validate_button.config, {"state": tk.NORMAL})
+        
+        # 別スレッドで検証を実行
+        threading.Thread(target=profiled(worker), daemon=True).start()
+    
+    def show_validation_report(self, reports):
+        """検証レポートを別ウィンドウに表示"""
+        window = tk.Toplevel(self.root)
+        window.title("検証結果")
+        window.geometry("800x500")
+        text_widget = tk.Text(window, wrap=tk.NONE)
+        scrollbar = ttk.Scrollbar(window, orient="vertical", command=text_widget.yview)
+        text_widget.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        text_widget.pack(fill=tk.BOTH, expand=True)
+        text_widget.insert("1.0", "\n\n".join(report.format_text() for report in reports))
+        text_widget.config(state=tk.DISABLED)
+    
+    def undo_edit(self):
+        """直前の保存を取り消す"""
+        entry = self.history.undo()
+        if entry is not None:
+            self.apply_history_entry(entry, reverse=True)
+    
+    def redo_edit(self):
+        """取り消した保存をやり直す"""
+        entry = self.history.redo()
+        if entry is not None:
+            self.apply_history_entry(entry, reverse=False)
+    
+    def apply_history_entry(self, entry, reverse):
+        """履歴をJSONに適用して保存し、該当レコードを表示"""
+        type_english = entry["type"]
+        try:
+            data = self.datasets.get(type_english)
+            questions = data.setdefault("questions", [])
+            apply_entry(questions, entry, reverse=reverse)
+            self.write_json_file(type_english, data)
+        except Exception as e:
+            # 適用できなかった操作はスタックを元に戻す
+            if reverse:
+                self.history.undo_stack.append(self.history.redo_stack.pop())
+            else:
+                self.history.redo_stack.append(self.history.undo_stack.pop())
+            messagebox.showerror("エラー", f"履歴の適用に失敗しました: {str(e)}")
+            return
+        
+        for record in entry_records(entry):
+            _, question = find_question(questions, record["id"])
+            if question is None:
+                self.search_index.remove(type_english, record["id"])
+            else:
+                self.search_index.update(type_english, question)
+        self.update_history_buttons()
+        
+        # 種別が異なる場合は切り替えてから該当レコードを表示
+        for type_name, (english, _) in self.type_mapping.items():
+            if english == type_english and english != self.current_type_english:
+                self.type_var.set(type_name)
+                self.on_type_change()
+                break
+        self.json_data = data
+        self.last_shown_id = entry["id"]  # 削除された場合に「データがありません」を出さない
+        self.select_id(entry["id"])
+        self.refresh_overview()
+    
+    def update_history_buttons(self):
+        """元に戻す・やり直しボタンの有効／無効を更新"""
+        self.undo_button.config(state=tk.NORMAL if self.history.can_undo() else tk.DISABLED)
+        self.redo_button.config(state=tk.NORMAL if self.history.can_redo() else tk.DISABLED)
+    
+    def write_json_file(self, type_english, data):
+        """JSONファイルを一時ファイル経由で保存し、キャッシュの更新日時を更新"""
+        write_json_file(self.datasets.json_path(type_english), data)
+        self.datasets.mark_saved(type_english, data)
+    
     def save_data(self):
         """データを保存"""
         if not self.json_data or not self.current_data:
@@ -492,6 +962,16 @@ class JsonEditorApp:
             return
         
         try:
+            # 履歴用の変更前の状態（表示した時点の内容。新規データの場合はNone）
+            questions = self.json_data.get("questions", [])
+            existing_index, existing = find_question(questions, self.current_id)
+            if existing is None:
+                before = None
+            elif self.saved_data is not None and self.saved_data.get("id") == self.current_id:
+                before = self.saved_data
+            else:
+                before = copy.deepcopy(existing)
+            
             # テキストフィールドから値を取得して更新
             for field_name in self.field_names:
                 if field_name == "explanationText":
@@ -507,14 +987,6 @@ class JsonEditorApp:
                     value = self.text_vars[field_name].get()
                     self.current_data[field_name] = value
             
-            # IDが既存かどうかを確認
-            questions = self.json_data.get("questions", [])
-            existing_index = None
-            for i, question in enumerate(questions):
-                if question.get("id") == self.current_id:
-                    existing_index = i
-                    break
-            
             if existing_index is not None:
                 # 既存データを更新
                 questions[existing_index] = self.current_data
@@ -525,19 +997,29 @@ class JsonEditorApp:
                 questions.sort(key=lambda x: x.get("id", 0))
             
             # JSONファイルに保存
-            json_path = os.path.join(os.path.dirname(__file__), self.current_json_file)
-            with open(json_path, "w", encoding="utf-8") as f:
-                json.dump(self.json_data, f, ensure_ascii=False, indent=2)
+            self.write_json_file(self.current_type_english, self.json_data)
+            self.search_index.update(self.current_type_english, self.current_data)
+            self.refresh_overview()
+            self.history.record(self.current_type_english, self.current_id, before, self.current_data)
+            self.saved_data = copy.deepcopy(self.current_data)
+            self.update_history_buttons()
             
             messagebox.showinfo("成功", "データを保存しました")
         except Exception as e:
             messagebox.showerror("エラー", f"データの保存に失敗しました: {str(e)}")
+            
+    def shutdown(self):
+        """終了時に先読み用のスレッドを止める"""
+        self.datasets.shutdown()
 
 
-def main():
+def main(argv=None):
+    args = diagnostics.parse_args("JSONエディタ", argv)
     root = tk.Tk()
+    diagnostics.attach(root, args, "json_editor")
     app = JsonEditorApp(root)
     root.mainloop()
+    app.shutdown()
 
 
 if __name__ == "__main__":
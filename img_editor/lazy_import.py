@@ -0,0 +1,34 @@
+"""
+モジュールを、初めて使うときに読み込む。
+ツールのモジュールを読み込んだ時点では Pillow や使っていない機能のモジュールを読み込まず、起動を速くする。
+
+    session = LazyModule("session", __package__)
+    session.load_session(...)  # ここで初めて session を読み込む
+"""
+import importlib
+
+
+def import_module(name, package=None):
+    """package 内のモジュールを読み込む（package が空なら、スクリプトとして直接実行した場合としてそのまま読み込む）"""
+    if package:
+        return importlib.import_module(f"{package}.{name}")
+    return importlib.import_module(name)
+
+
+class LazyModule:
+    """属性に初めてアクセスしたときにモジュールを読み込む（読み込みは import と同じくスレッドセーフ）"""
+
+    def __init__(self, name, package=None):
+        self._name = name
+        self._package = package
+        self._module = None
+
+    def __getattr__(self, attr):
+        module = self._module
+        if module is None:
+            module = self._module = import_module(self._name, self._package)
+        return getattr(module, attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<LazyModule {self._name!r} ({state})>"
@@ -0,0 +1,342 @@
+"""
+大きな問題JSONを遅延読み込みする。
+ファイルを1回走査して「ID → questions配列内のバイト範囲」の索引を作り、ファイルの隣に
+キャッシュする（更新日時とサイズが変わったら作り直す）。各レコードは必要になったときに解析する。
+小さなファイルは従来どおり json.load で読み込む。
+"""
+import copy
+import json
+import mmap
+import os
+import re
+import threading
+
+LAZY_THRESHOLD_BYTES = 32 * 1024 * 1024
+INDEX_SUFFIX = ".idx"
+INDEX_VERSION = 1
+
+# 文字列トークン（エスケープを含む）と括弧だけを拾う
+TOKEN_RE = re.compile(rb'"(?:[^"\\]|\\.)*"|[\[\]{}]', re.DOTALL)
+ARRAY_START_RE = re.compile(rb'\s*:\s*\[')
+ID_VALUE_RE = re.compile(rb'\s*:\s*(-?\d+)')
+QUOTE, LBRACE, LBRACKET = ord('"'), ord('{'), ord('[')
+PLACEHOLDER = "__lazy_questions__"
+
+# ファイルごとの保存回数。別のオブジェクト（deepcopy したコピーなど）が同じファイルに保存したことを検出する
+_generations = {}
+_generations_lock = threading.Lock()
+
+
+def file_generation(json_path):
+    with _generations_lock:
+        return _generations.get(os.path.abspath(json_path), 0)
+
+
+def _advance_generation(json_path):
+    with _generations_lock:
+        key = os.path.abspath(json_path)
+        _generations[key] = _generations.get(key, 0) + 1
+        return _generations[key]
+
+
+def file_signature(path):
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+def scan_offsets(buf):
+    """questions配列の範囲と、各レコードの (id, 開始, 終了) を返す"""
+    depth = 0
+    pending_array = False
+    in_questions = False
+    array_start = array_end = None
+    record_start = record_id = None
+    records = []
+
+    for m in TOKEN_RE.finditer(buf):
+        c = buf[m.start()]
+        if c == QUOTE:
+            if depth == 1 and array_start is None and m.group() == b'"questions"':
+                pending_array = ARRAY_START_RE.match(buf, m.end()) is not None
+            elif in_questions and depth == 3 and m.group() == b'"id"':
+                value = ID_VALUE_RE.match(buf, m.end())
+                if value:
+                    record_id = int(value.group(1))
+            continue
+
+        if c == LBRACE or c == LBRACKET:
+            depth += 1
+            if pending_array and c == LBRACKET and depth == 2:
+                pending_array = False
+                in_questions = True
+                array_start = m.start()
+            elif in_questions and depth == 3:
+                if c != LBRACE:
+                    raise ValueError("questions の要素がオブジェクトではありません")
+                record_start = m.start()
+                record_id = None
+        else:
+            if in_questions and depth == 3:
+                records.append((record_id, record_start, m.end()))
+                record_start = None
+            elif in_questions and depth == 2:
+                in_questions = False
+                array_end = m.end()
+            depth -= 1
+
+    if array_start is None or array_end is None:
+        raise ValueError("questions 配列が見つかりません")
+    return array_start, array_end, records
+
+
+def load_offset_index(json_path):
+    """キャッシュ済みの索引を読み込む（古ければ走査して作り直す）"""
+    signature = file_signature(json_path)
+    index_path = json_path + INDEX_SUFFIX
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("version") == INDEX_VERSION and index.get("signature") == signature:
+            return index
+    except (OSError, ValueError):
+        pass
+
+    with open(json_path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            array_start, array_end, records = scan_offsets(buf)
+    index = {
+        "version": INDEX_VERSION,
+        "signature": signature,
+        "array": [array_start, array_end],
+        "records": records,
+    }
+    save_offset_index(json_path, index)
+    return index
+
+
+def save_offset_index(json_path, index):
+    index_path = json_path + INDEX_SUFFIX
+    tmp_path = index_path + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, separators=(",", ":"))
+        os.replace(tmp_path, index_path)
+    except OSError as e:
+        # キャッシュが書けなくても読み込み自体は続ける
+        print(f"エラー: 索引キャッシュを保存できませんでした: {e}")
+
+
+class LazyQuestions:
+    """questions配列の代わりに使う遅延読み込みのリスト
+
+    インデックス指定（questions[i]）で取り出したレコードは解析後に保持され、変更も保存される。
+    for文での走査は未解析のレコードをその場で解析して返す（保持しない）ため読み取り専用として扱う。
+    並べ替え（sort）のkey関数には、未解析のレコードは "id" だけを持つ辞書が渡される。
+    """
+
+    def __init__(self, json_path, records, generation=None):
+        self.json_path = json_path
+        self.lock = threading.Lock()
+        self.fp = None
+        # [id, 開始, 終了, 解析済みのレコード or None]
+        self.slots = [[question_id, start, end, None] for question_id, start, end in records]
+        self.positions = None
+        self.generation = file_generation(json_path) if generation is None else generation
+
+    def _rebuild(self):
+        """他のオブジェクトが同じファイルに保存した後、未解析のレコードの位置を新しい索引からIDで取り直す"""
+        if self.fp is not None:
+            self.fp.close()
+            self.fp = None
+        generation = file_generation(self.json_path)
+        ranges = {}
+        for question_id, start, end in load_offset_index(self.json_path)["records"]:
+            ranges.setdefault(question_id, []).append((start, end))
+        for slot in self.slots:
+            found = ranges.get(slot[0])
+            if found:
+                start, end = found.pop(0)
+                if slot[3] is None:
+                    slot[1], slot[2] = start, end
+            elif slot[3] is None:
+                raise ValueError(f"ID {slot[0]} のレコードが保存し直したファイルにありません: {self.json_path}")
+        self.generation = generation
+
+    def _read(self, slot):
+        with self.lock:
+            if self.generation != file_generation(self.json_path):
+                self._rebuild()
+            if self.fp is None:
+                self.fp = open(self.json_path, "rb")
+            self.fp.seek(slot[1])
+            return self.fp.read(slot[2] - slot[1])
+
+    def _parse(self, slot):
+        return json.loads(self._read(slot).decode("utf-8"))
+
+    def close(self):
+        with self.lock:
+            if self.fp is not None:
+                self.fp.close()
+                self.fp = None
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __getitem__(self, index):
+        slot = self.slots[index]
+        if slot[3] is None:
+            slot[3] = self._parse(slot)
+        return slot[3]
+
+    def __setitem__(self, index, question):
+        slot = self.slots[index]
+        slot[0] = question.get("id")
+        slot[3] = question
+        self.positions = None
+
+    def __delitem__(self, index):
+        del self.slots[index]
+        self.positions = None
+
+    def __iter__(self):
+        for slot in list(self.slots):
+            yield slot[3] if slot[3] is not None else self._parse(slot)
+
+    def append(self, question):
+        self.slots.append([question.get("id"), None, None, question])
+        self.positions = None
+
+    def sort(self, key=None, reverse=False):
+        def slot_key(slot):
+            question = slot[3] if slot[3] is not None else {"id": slot[0]}
+            return key(question) if key else question.get("id", 0)
+        self.slots.sort(key=slot_key, reverse=reverse)
+        self.positions = None
+
+    def index_of(self, question_id):
+        """IDの位置を返す（見つからなければNone）"""
+        if self.positions is None:
+            self.positions = {}
+            for i, slot in enumerate(self.slots):
+                self.positions.setdefault(slot[0], i)
+        return self.positions.get(question_id)
+
+    def materialized_count(self):
+        return sum(1 for slot in self.slots if slot[3] is not None)
+
+    def __deepcopy__(self, memo):
+        clone = LazyQuestions(self.json_path, [], self.generation)
+        clone.slots = [[s[0], s[1], s[2], copy.deepcopy(s[3], memo)] for s in self.slots]
+        return clone
+
+    def iter_encoded(self):
+        """保存用に各レコードのバイト列を返す（未変更のレコードは元ファイルの内容をそのまま使う）"""
+        for slot in self.slots:
+            if slot[3] is None:
+                yield slot, self._read(slot)
+            else:
+                text = json.dumps(slot[3], ensure_ascii=False, indent=2).replace("\n", "\n    ")
+                yield slot, text.encode("utf-8")
+
+
+class LazyJsonData(dict):
+    """questions以外のキーは通常どおり保持し、questionsだけをLazyQuestionsにした辞書"""
+
+    @classmethod
+    def open(cls, json_path):
+        index = load_offset_index(json_path)
+        array_start, array_end = index["array"]
+        with open(json_path, "rb") as f:
+            prefix = f.read(array_start)
+            f.seek(array_end)
+            suffix = f.read()
+        data = cls(json.loads((prefix + b"[]" + suffix).decode("utf-8")))
+        data["questions"] = LazyQuestions(json_path, index["records"])
+        return data
+
+    def __deepcopy__(self, memo):
+        clone = LazyJsonData()
+        for key, value in self.items():
+            clone[key] = copy.deepcopy(value, memo)
+        return clone
+
+    def write_to(self, json_path):
+        """json.dump(indent=2)と同じ形式で保存し、新しい索引を作成する"""
+        questions = self["questions"]
+        skeleton = json.dumps(dict(self, questions=PLACEHOLDER), ensure_ascii=False, indent=2)
+        head, tail = skeleton.split(json.dumps(PLACEHOLDER), 1)
+        head = head.encode("utf-8")
+
+        tmp_path = json_path + ".tmp"
+        records = []
+        with open(tmp_path, "wb") as f:
+            f.write(head)
+            pos = len(head)
+            array_start = pos
+            f.write(b"[")
+            pos += 1
+            for i, (slot, encoded) in enumerate(questions.iter_encoded()):
+                separator = b"\n    " if i == 0 else b",\n    "
+                f.write(separator + encoded)
+                pos += len(separator)
+                records.append((slot, pos, pos + len(encoded)))
+                pos += len(encoded)
+            closing = b"\n  ]" if records else b"]"
+            f.write(closing)
+            pos += len(closing)
+            array_end = pos
+            f.write(tail.encode("utf-8"))
+
+        questions.close()
+        os.replace(tmp_path, json_path)
+
+        # 書き込んだ位置で索引を更新（解析済みのレコードはそのまま保持）
+        for slot, start, end in records:
+            slot[1], slot[2] = start, end
+        questions.json_path = json_path
+        # 同じファイルを読んでいた他のオブジェクトは、次に読むときに位置を取り直す
+        questions.generation = _advance_generation(json_path)
+        save_offset_index(json_path, {
+            "version": INDEX_VERSION,
+            "signature": file_signature(json_path),
+            "array": [array_start, array_end],
+            "records": [(slot[0], start, end) for slot, start, end in records],
+        })
+
+
+def load_json_file(json_path, lazy_threshold=LAZY_THRESHOLD_BYTES):
+    """JSONファイルを読み込む。大きなファイルは遅延読み込みにする"""
+    if lazy_threshold is not None and os.path.getsize(json_path) >= lazy_threshold:
+        try:
+            return LazyJsonData.open(json_path)
+        except ValueError:
+            # 想定外の構造の場合は通常の読み込みに切り替える
+            pass
+    with open(json_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_json_file(json_path, data):
+    """JSONファイルを一時ファイル経由で保存"""
+    if isinstance(data, LazyJsonData):
+        data.write_to(json_path)
+        return
+    tmp_path = json_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, json_path)
+    _advance_generation(json_path)
+
+
+def find_question(questions, question_id):
+    """IDに一致するレコードの (位置, レコード) を返す（見つからなければ (None, None)）"""
+    if isinstance(questions, LazyQuestions):
+        index = questions.index_of(question_id)
+        if index is None:
+            return None, None
+        return index, questions[index]
+    for i, question in enumerate(questions):
+        if question.get("id") == question_id:
+            return i, question
+    return None, None
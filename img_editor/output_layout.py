@@ -0,0 +1,88 @@
+"""
+保存先フォルダの構成（フォルダ分け）と、元のファイル名から保存先を引くための索引。
+
+    flat : 保存先フォルダの直下に保存（従来どおり）
+    hash : ファイル名のハッシュの先頭2文字のフォルダに分けて保存（例: 3f/a.jpg）
+    date : 元画像の更新日のフォルダに分けて保存（例: 2024/05/01/a.jpg）
+
+flat 以外では保存先フォルダの index.tsv に「元のファイル名<TAB>保存先の相対パス」を追記するので、
+保存先のフォルダ一覧を取らずに load_index() で保存先を引ける。
+"""
+import csv
+import hashlib
+import os
+import time
+
+FLAT = "flat"
+LAYOUTS = (FLAT, "hash", "date")
+LAYOUT_LABELS = {
+    "flat": "そのまま",
+    "hash": "ハッシュで分ける",
+    "date": "日付で分ける",
+}
+INDEX_NAME = "index.tsv"
+HASH_PREFIX_LENGTH = 2  # 256個のフォルダに分ける
+
+
+def output_name(name, layout=FLAT, mtime=None):
+    """保存先での相対パス（区切りは "/"）を返す。date は mtime（省略時は現在時刻）の日付を使う"""
+    if layout == FLAT:
+        return name
+    if layout == "hash":
+        prefix = hashlib.md5(name.encode("utf-8")).hexdigest()[:HASH_PREFIX_LENGTH]
+        return f"{prefix}/{name}"
+    if layout == "date":
+        day = time.strftime("%Y/%m/%d", time.localtime(time.time() if mtime is None else mtime))
+        return f"{day}/{name}"
+    raise ValueError(f"不明な保存先の構成です: {layout}")
+
+
+def load_index(folder):
+    """保存先フォルダの索引を {元のファイル名: 保存先の相対パス} で返す（同じ名前は後の行を優先）"""
+    path = os.path.join(folder, INDEX_NAME)
+    index = {}
+    if not os.path.exists(path):
+        return index
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.reader(f, delimiter="\t"):
+            # 書き込み途中で終了した最後の行などは読み飛ばす
+            if len(row) == 2:
+                index[row[0]] = row[1]
+    return index
+
+
+class OutputIndex:
+    """保存先フォルダの索引に追記する（内容が変わらない行は書かない）"""
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.entries = load_index(folder)
+        self.file = None
+        self.writer = None
+
+    def record(self, name, relative_path):
+        if self.entries.get(name) == relative_path:
+            return
+        if self.file is None:
+            os.makedirs(self.folder, exist_ok=True)
+            self.file = open(os.path.join(self.folder, INDEX_NAME), "a", encoding="utf-8", newline="")
+            self.writer = csv.writer(self.file, delimiter="\t", lineterminator="\n")
+        self.writer.writerow([name, relative_path])
+        self.file.flush()
+        self.entries[name] = relative_path
+
+    def lookup(self, name):
+        return self.entries.get(name)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            self.writer = None
+
+
+def add_argument(parser):
+    parser.add_argument(
+        "--layout", choices=LAYOUTS, default=FLAT,
+        help="保存先フォルダの構成（flat / hash / date）"
+    )
@@ -0,0 +1,220 @@
+"""
+JSONエディタ用の一覧表示。全レコードを表形式で表示し、列見出しのクリックで並べ替える。
+表示範囲の行とサムネイルだけを描画するため、数千件でもウィジェットを大量に作らない。
+"""
+import tkinter as tk
+from tkinter import ttk
+import os
+
+try:
+    from .dataset_cache import ThumbnailCache
+    from .virtual_canvas import VirtualCanvasWindow
+except ImportError:
+    from dataset_cache import ThumbnailCache
+    from virtual_canvas import VirtualCanvasWindow
+
+
+class OverviewWindow(VirtualCanvasWindow):
+    ROW_HEIGHT = 22
+    THUMB_SIZE = 72
+    COLUMNS = [
+        ("id", "ID", 60),
+        ("serialNumber", "シリアル番号", 160),
+        ("displayValue", "表示値", 120),
+        ("meterExists", "メーター画像", 100),
+        ("explanationExists", "解説画像", 100),
+    ]
+    EXISTS_KEYS = ("meterExists", "explanationExists")
+
+    def __init__(self, root, base_dir, on_select):
+        # サムネイルは表示中の行の分だけ別スレッドで作成
+        super().__init__(root, "一覧", "600x600", max_workers=2, thread_name_prefix="overview-thumb")
+        self.base_dir = base_dir
+        self.on_select = on_select  # 行をクリックしたときに question_id で呼ばれる
+
+        self.rows = []
+        self.sort_key = "id"
+        self.sort_reverse = False
+        self.selected_id = None
+
+        self.thumbnails = ThumbnailCache(max_width=self.THUMB_SIZE, max_height=self.THUMB_SIZE, max_entries=256)
+
+        self.create_widgets()
+
+    def create_widgets(self):
+        table_width = sum(width for _, _, width in self.COLUMNS)
+
+        # 見出し（クリックで並べ替え）
+        self.header = tk.Canvas(self.window, height=self.ROW_HEIGHT, width=table_width, bg="lightgray", highlightthickness=0)
+        self.header.pack(fill=tk.X)
+        self.header.bind("<Button-1>", self.on_header_click)
+
+        # 本体：表示範囲の行だけを描画する仮想スクロール
+        body_frame = ttk.Frame(self.window)
+        body_frame.pack(fill=tk.BOTH, expand=True)
+        self.body = tk.Canvas(body_frame, width=table_width, bg="white", highlightthickness=0)
+        self.scrollbar = ttk.Scrollbar(body_frame, orient="vertical", command=self.body.yview)
+        self.body.configure(yscrollcommand=self.on_body_scroll)
+        self.body.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.body.bind("<Configure>", lambda e: self.schedule_render())
+        self.body.bind("<Button-1>", self.on_row_click)
+        self.body.bind("<MouseWheel>", self.on_mouse_wheel)
+        self.body.bind("<Button-4>", lambda e: self.body.yview_scroll(-3, "units"))
+        self.body.bind("<Button-5>", lambda e: self.body.yview_scroll(3, "units"))
+
+        # サムネイル列（表示中の行のメーター画像）
+        self.strip = tk.Canvas(self.window, height=self.THUMB_SIZE + 24, bg="gray", highlightthickness=0)
+        self.strip.pack(fill=tk.X)
+        self.strip.bind("<Button-1>", self.on_strip_click)
+
+        self.draw_header()
+
+    def set_records(self, questions):
+        """表示するレコードを設定（画像ファイルの有無は、表示する行の分だけ描画時に確認する）"""
+        rows = []
+        for question in questions:
+            rows.append({
+                "id": question.get("id"),
+                "serialNumber": str(question.get("serialNumber", "")),
+                "displayValue": str(question.get("displayValue", "")),
+                "meterPath": self._full_path(question.get("meterImage")),
+                "explanationPath": self._full_path(question.get("explanationImage")),
+                "meterExists": None,  # 未確認
+                "explanationExists": None,
+            })
+        self.rows = rows
+        self.sort_rows()
+
+    def _full_path(self, rel_path):
+        return os.path.join(self.base_dir, rel_path) if rel_path else ""
+
+    @staticmethod
+    def check_exists(row):
+        """行の画像ファイルの有無を確認する（確認済みの行は何もしない）"""
+        if row["meterExists"] is None:
+            row["meterExists"] = bool(row["meterPath"]) and os.path.exists(row["meterPath"])
+            row["explanationExists"] = bool(row["explanationPath"]) and os.path.exists(row["explanationPath"])
+
+    def sort_rows(self):
+        if self.sort_key in self.EXISTS_KEYS:
+            # 画像の有無で並べ替えるときだけ、全行を確認する
+            for row in self.rows:
+                self.check_exists(row)
+
+        def sort_value(row):
+            value = row[self.sort_key]
+            # 数値はそのまま、文字列は後ろに並べる
+            if isinstance(value, (bool, int, float)):
+                return (0, value, "")
+            return (1, 0, str(value))
+        self.rows.sort(key=sort_value, reverse=self.sort_reverse)
+        self.body.configure(scrollregion=(0, 0, 1, len(self.rows) * self.ROW_HEIGHT))
+        self.draw_header()
+        self.schedule_render()
+
+    def draw_header(self):
+        self.header.delete("all")
+        x = 0
+        for key, label, width in self.COLUMNS:
+            if key == self.sort_key:
+                label += " ▼" if self.sort_reverse else " ▲"
+            self.header.create_text(x + 5, self.ROW_HEIGHT // 2, text=label, anchor=tk.W)
+            self.header.create_line(x + width, 0, x + width, self.ROW_HEIGHT, fill="gray")
+            x += width
+
+    def on_header_click(self, event):
+        x = 0
+        for key, _, width in self.COLUMNS:
+            if x <= event.x < x + width:
+                if self.sort_key == key:
+                    self.sort_reverse = not self.sort_reverse
+                else:
+                    self.sort_key = key
+                    self.sort_reverse = False
+                self.sort_rows()
+                return
+            x += width
+
+    def on_body_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self.schedule_render()
+
+    def on_mouse_wheel(self, event):
+        self.body.yview_scroll(int(-event.delta / 40) or (-1 if event.delta > 0 else 1), "units")
+
+    def visible_range(self):
+        top = self.body.canvasy(0)
+        height = self.body.winfo_height()
+        first = max(int(top // self.ROW_HEIGHT), 0)
+        last = min(int((top + height) // self.ROW_HEIGHT) + 1, len(self.rows))
+        return first, last
+
+    def render(self):
+        """表示範囲の行とサムネイルだけを描画"""
+        self.body.delete("row")
+        first, last = self.visible_range()
+
+        for index in range(first, last):
+            row = self.rows[index]
+            self.check_exists(row)
+            y = index * self.ROW_HEIGHT
+            if row["id"] == self.selected_id:
+                self.body.create_rectangle(0, y, self.body.winfo_width(), y + self.ROW_HEIGHT, fill="lightblue", outline="", tags="row")
+            x = 0
+            for key, _, width in self.COLUMNS:
+                value = row[key]
+                if isinstance(value, bool):
+                    text = "○" if value else "×"
+                else:
+                    text = str(value)
+                self.body.create_text(x + 5, y + self.ROW_HEIGHT // 2, text=text, anchor=tk.W, tags="row")
+                x += width
+            self.body.create_line(0, y + self.ROW_HEIGHT, x, y + self.ROW_HEIGHT, fill="#e0e0e0", tags="row")
+
+        self.render_strip(first, last)
+
+    def render_strip(self, first, last):
+        self.strip.delete("all")
+        cell_width = self.THUMB_SIZE + 8
+        max_cells = max(self.strip.winfo_width() // cell_width, 1)
+        visible_paths = set()
+
+        for cell, index in enumerate(range(first, min(last, first + max_cells))):
+            row = self.rows[index]
+            x = cell * cell_width + 4
+            path = row["meterPath"]
+            if row["meterExists"]:
+                visible_paths.add(path)
+                photo = self.photos.get(path)
+                if photo is not None:
+                    self.strip.create_image(x + self.THUMB_SIZE // 2, 4 + self.THUMB_SIZE // 2, image=photo)
+                else:
+                    self.request_thumbnail(path, lambda path=path: self.thumbnails.get(path))
+            else:
+                self.strip.create_rectangle(x, 4, x + self.THUMB_SIZE, 4 + self.THUMB_SIZE, outline="white")
+            self.strip.create_text(x + self.THUMB_SIZE // 2, self.THUMB_SIZE + 14, text=str(row["id"]), fill="white")
+
+        self.discard_offscreen(visible_paths)
+
+    def row_at(self, y):
+        index = int(self.body.canvasy(y) // self.ROW_HEIGHT)
+        if 0 <= index < len(self.rows):
+            return self.rows[index]
+        return None
+
+    def on_row_click(self, event):
+        row = self.row_at(event.y)
+        if row is not None:
+            self.select(row["id"])
+
+    def on_strip_click(self, event):
+        first, _ = self.visible_range()
+        index = first + event.x // (self.THUMB_SIZE + 8)
+        if 0 <= index < len(self.rows):
+            self.select(self.rows[index]["id"])
+
+    def select(self, question_id):
+        self.selected_id = question_id
+        self.schedule_render()
+        self.on_select(question_id)
@@ -0,0 +1,170 @@
+"""
+一括リサイズのデコードとリサイズを別プロセスで並列に行う。
+
+リサイズ後の画素は pickle せず、あらかじめ確保した共有メモリのスロット（固定数）に書き込んで親プロセスに渡す。
+親プロセスはスロットの内容をそのまま画像として保存し、保存が終わったスロットを再利用する。
+保存先への書き込み（アーカイブを含む）は親プロセスだけが行う。
+"""
+import io
+import queue
+
+try:
+    from .lazy_import import LazyModule
+except ImportError:
+    from lazy_import import LazyModule
+
+# multiprocessing と Pillow は並列処理を始めるときに読み込む（--workers を定義するだけでは読み込まない）
+multiprocessing = LazyModule("multiprocessing")
+shared_memory = LazyModule("multiprocessing.shared_memory")
+Image = LazyModule("PIL.Image")
+rendering = LazyModule("rendering", __package__)
+
+SLOT_BYTES = 8 * 1024 * 1024  # スロット1つの大きさ（横幅500pxのRGBAで約4000px分の高さ）
+SLOTS_PER_WORKER = 2
+POLL_SECONDS = 1.0  # 結果を待つ間、この間隔で子プロセスが生きているか確認する
+
+
+def _worker(tasks, results, free_slots, slot_names, width):
+    # 子プロセスは親プロセスの resource_tracker を共有するので、接続しても削除の対象は増えない
+    # （削除は親プロセスの close() で行う）
+    slots = [shared_memory.SharedMemory(name=name) for name in slot_names]
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            task_id, path, data = task
+            try:
+                with Image.open(path if path is not None else io.BytesIO(data)) as img:
+                    img.load()
+                    resized = img.resize(rendering.resized_size(img.width, img.height, width), Image.Resampling.LANCZOS)
+                with resized:
+                    raw = resized.tobytes()
+                    palette = resized.getpalette() if resized.mode == "P" else None
+                    header = (resized.mode, resized.size, dict(resized.info), palette)
+                if len(raw) <= len(slots[0].buf):
+                    slot = free_slots.get()
+                    slots[slot].buf[:len(raw)] = raw
+                    results.put((task_id, slot, len(raw), header, None))
+                else:
+                    # スロットに収まらない大きな画像だけはそのまま送る
+                    results.put((task_id, None, raw, header, None))
+            except Exception as e:
+                results.put((task_id, None, None, None, str(e)))
+    finally:
+        for shm in slots:
+            shm.close()
+
+
+class ResizePipeline:
+    """別プロセスでデコードとリサイズを行い、結果を handler(context, 画像 or None, エラー or None) に渡す
+
+    handler は submit または finish を呼んだ親プロセスのスレッドで呼ばれる。
+    渡した画像は handler から戻ると閉じるので、保持する場合はコピーする。
+    """
+
+    def __init__(self, workers, width, handler, slots=None, slot_bytes=SLOT_BYTES):
+        # Tkのスレッドから起動しても安全なように、fork ではなく spawn で起動する
+        context = multiprocessing.get_context("spawn")
+        self.handler = handler
+        self.slots = [shared_memory.SharedMemory(create=True, size=slot_bytes) for _ in range(slots or workers * SLOTS_PER_WORKER)]
+        self.free_slots = context.Queue()
+        for i in range(len(self.slots)):
+            self.free_slots.put(i)
+        self.tasks = context.Queue()
+        self.results = context.Queue()
+        self.pending = {}  # タスクID -> context
+        self.next_id = 0
+        self.error = None  # 子プロセスが異常終了した場合のエラー内容
+        self.max_pending = len(self.slots) + workers  # 読み込んだ元画像を溜め込みすぎないようにする
+        self.processes = [
+            context.Process(
+                target=_worker,
+                args=(self.tasks, self.results, self.free_slots, [shm.name for shm in self.slots], width),
+                daemon=True,
+            )
+            for _ in range(workers)
+        ]
+        for process in self.processes:
+            process.start()
+
+    def submit(self, item, context):
+        """元画像（SourceItem）のリサイズを依頼する。処理待ちが多い場合は先に結果を受け取る"""
+        while len(self.pending) >= self.max_pending:
+            self._receive()
+        if self.error is not None:
+            self.handler(context, None, self.error)
+            return
+        task_id = self.next_id
+        self.next_id += 1
+        self.pending[task_id] = context
+        if item.path is not None:
+            self.tasks.put((task_id, item.path, None))
+        else:
+            self.tasks.put((task_id, None, item.read()))
+
+    def finish(self):
+        """依頼したすべての結果を受け取る"""
+        while self.pending:
+            self._receive()
+
+    def _receive(self):
+        while True:
+            try:
+                message = self.results.get(timeout=POLL_SECONDS)
+                break
+            except queue.Empty:
+                dead = [process for process in self.processes if not process.is_alive()]
+                if dead:
+                    self._abort(f"リサイズ用のプロセスが異常終了しました（終了コード {dead[0].exitcode}）")
+                    return
+        task_id, slot, payload, header, error = message
+        context = self.pending.pop(task_id)
+        if error is not None:
+            self.handler(context, None, error)
+            return
+        mode, size, info, palette = header
+        view = self.slots[slot].buf[:payload] if slot is not None else payload
+        try:
+            img = Image.frombuffer(mode, size, view, "raw", mode, 0, 1)
+            img.info.update(info)
+            if palette is not None:
+                img.putpalette(palette)
+            try:
+                self.handler(context, img, None)
+            finally:
+                img.close()
+                del img
+        finally:
+            if slot is not None:
+                view.release()
+                self.free_slots.put(slot)
+
+    def _abort(self, error):
+        """子プロセスが終了して結果が届かない場合、処理待ちのタスクをすべてエラーにして後片付けする"""
+        self.error = error
+        pending, self.pending = self.pending, {}
+        self.close()
+        for context in pending.values():
+            self.handler(context, None, error)
+
+    def close(self):
+        # 異常終了時に _abort から呼んだ後、もう一度呼ばれても問題ないようにする
+        processes, self.processes = self.processes, []
+        slots, self.slots = self.slots, []
+        for _ in processes:
+            self.tasks.put(None)
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        for shm in slots:
+            shm.close()
+            shm.unlink()
+
+
+def add_argument(parser):
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="一括リサイズで並列に処理するプロセス数（1 の場合は並列にしない）"
+    )
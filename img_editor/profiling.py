@@ -0,0 +1,159 @@
+"""
+起動中のツールでCPUプロファイル（cProfile）とメモリの割り当て（tracemalloc）を記録する。
+開始から停止までの間を .prof ファイルに、割り当ての増加が多い箇所を .txt に書き出す。
+
+.prof ファイルは python -m pstats や snakeviz などで確認できる。
+"""
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+TRACEMALLOC_FRAMES = 25
+TOP_ALLOCATIONS = 30
+
+_active = None  # 記録中の ProfileCapture
+
+
+def active():
+    return _active
+
+
+@contextmanager
+def worker_profile():
+    """別スレッドの処理を囲むと、記録中であればそのスレッドも計測に含める"""
+    capture = _active
+    if capture is None:
+        yield
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Python 3.12以降は1つのプロファイラで全スレッドを記録するため、別に開始できない
+        yield
+        return
+    try:
+        yield
+    finally:
+        profiler.disable()
+        capture.add_thread_profile(profiler)
+
+
+def profiled(func):
+    """スレッドの target に渡す関数を worker_profile で囲む"""
+    def run(*args, **kwargs):
+        with worker_profile():
+            return func(*args, **kwargs)
+    return run
+
+
+def write_allocation_diff(path, snapshot, previous, title, limit=TOP_ALLOCATIONS):
+    """2つのスナップショットの差分のうち、増加量の多い箇所を書き出す"""
+    stats = snapshot.compare_to(previous, "lineno")
+    current, peak = tracemalloc.get_traced_memory()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"{title}\n")
+        f.write(f"追跡中のメモリ: 現在 {current / 1024 / 1024:.1f}MB / 最大 {peak / 1024 / 1024:.1f}MB\n\n")
+        for stat in stats[:limit]:
+            f.write(f"{stat}\n")
+        if stats:
+            # 最も増えた箇所は呼び出し元までたどれるようにする
+            top = snapshot.compare_to(previous, "traceback")[0]
+            f.write("\n最も増えた割り当ての呼び出し元:\n")
+            f.write("\n".join(top.traceback.format()) + "\n")
+
+
+class ProfileCapture:
+    def __init__(self, output_dir, name="img_editor"):
+        self.output_dir = output_dir
+        self.name = name
+        self.profiler = None
+        self.thread_profiles = []
+        self.lock = threading.Lock()
+        self.start_snapshot = None
+        self.last_snapshot = None
+        self.started_tracemalloc = False
+        self.started_at = None
+
+    def is_running(self):
+        return self.profiler is not None
+
+    def _path(self, suffix):
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        return os.path.join(self.output_dir, f"{self.name}-{stamp}-{os.getpid()}{suffix}")
+
+    def _ensure_tracemalloc(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self.started_tracemalloc = True
+
+    def start(self):
+        """計測を開始（計測を開始したスレッドのCPU時間を記録する）"""
+        global _active
+        if self.is_running():
+            return
+        self._ensure_tracemalloc()
+        self.start_snapshot = tracemalloc.take_snapshot()
+        self.thread_profiles = []
+        self.started_at = time.perf_counter()
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+        _active = self
+
+    def add_thread_profile(self, profiler):
+        with self.lock:
+            if self.is_running():
+                self.thread_profiles.append(profiler)
+
+    def stop(self):
+        """計測を終了し、書き出したファイルのパスを返す"""
+        global _active
+        if not self.is_running():
+            return []
+        self.profiler.disable()
+        _active = None
+        elapsed = time.perf_counter() - self.started_at
+
+        prof_path = self._path(".prof")
+        stats = pstats.Stats(self.profiler)
+        with self.lock:
+            for profiler in self.thread_profiles:
+                stats.add(profiler)
+            self.thread_profiles = []
+        stats.dump_stats(prof_path)
+        self.profiler = None
+
+        snapshot = tracemalloc.take_snapshot()
+        alloc_path = self._path("-alloc.txt")
+        write_allocation_diff(alloc_path, snapshot, self.start_snapshot, f"計測期間 {elapsed:.1f}秒 の割り当ての増加")
+        self.start_snapshot = None
+        if self.started_tracemalloc and self.last_snapshot is None:
+            tracemalloc.stop()
+            self.started_tracemalloc = False
+        print(f"プロファイルを保存しました: {prof_path}\n割り当ての差分: {alloc_path}", file=sys.stderr)
+        return [prof_path, alloc_path]
+
+    def toggle(self):
+        if self.is_running():
+            return self.stop()
+        self.start()
+        return []
+
+    def memory_snapshot(self):
+        """前回のスナップショットからの割り当ての増加を書き出す（初回は基準を取るだけ）"""
+        self._ensure_tracemalloc()
+        snapshot = tracemalloc.take_snapshot()
+        previous, self.last_snapshot = self.last_snapshot, snapshot
+        if previous is None:
+            print("メモリのスナップショットを取得しました（次回の取得時に差分を書き出します）", file=sys.stderr)
+            return None
+        path = self._path("-snapshot.txt")
+        write_allocation_diff(path, snapshot, previous, "前回のスナップショットからの割り当ての増加")
+        print(f"割り当ての差分を保存しました: {path}", file=sys.stderr)
+        return path
@@ -0,0 +1,74 @@
+"""
+描画エディタと一括リサイズで共通の画像処理。
+画面（tkinter）を使わないので、ベンチマークなどからもそのまま呼び出せる。
+"""
+import os
+from PIL import Image, ImageDraw
+
+try:
+    from . import tracing
+except ImportError:
+    import tracing
+
+TARGET_WIDTH = 500  # リサイズ後の横幅
+ANNOTATION_COLORS = {"red": (255, 0, 0), "lime": (0, 255, 0)}
+LINE_WIDTH = 3
+
+
+def resized_size(width, height, new_width=TARGET_WIDTH):
+    """縦横比を維持して横幅を new_width にしたときのサイズ"""
+    return new_width, int(height * (new_width / width))
+
+
+def format_for_name(filename):
+    """拡張子から保存形式（"JPEG" など）を返す（不明ならNone）"""
+    return Image.registered_extensions().get(os.path.splitext(filename)[1].lower())
+
+
+def resize_image_file(src, dest, width=TARGET_WIDTH, quality=95, format=None, save_options=None):
+    """画像を縦横比を維持して横幅 width にリサイズし、dest に保存する
+
+    src・dest にはパスのほか、バイナリのファイルオブジェクトも指定できる
+    （dest がファイルオブジェクトの場合は format で保存形式を指定する）。
+    save_options を指定すると quality の代わりにそのオプションで保存する。
+    """
+    if save_options is None:
+        save_options = {"quality": quality}
+    filename = os.path.basename(src) if isinstance(src, str) else os.path.basename(getattr(src, "name", "") or "")
+    with tracing.span("resize.decode", file=filename):
+        img = Image.open(src)
+        img.load()
+    with img:
+        with tracing.span("resize.resize", file=filename):
+            resized_img = img.resize(resized_size(img.width, img.height, width), Image.Resampling.LANCZOS)
+    with resized_img:
+        with tracing.span("resize.encode", file=filename):
+            resized_img.save(dest, format, **save_options)
+
+
+def prepare_display_image(image_path, width=None):
+    """表示用の画像と、元画像に対する倍率（元の幅 / 表示幅）を返す
+
+    width を指定すると縦横比を維持してその横幅にリサイズする。
+    元のファイルはピクセルを読み込んだ時点で閉じる。
+    """
+    with Image.open(image_path) as img:
+        with tracing.span("display.decode"):
+            img.load()
+        if width is None:
+            return img, 1.0
+        with tracing.span("display.resize"):
+            resized_img = img.resize(resized_size(img.width, img.height, width), Image.Resampling.LANCZOS)
+        return resized_img, img.width / width
+
+
+def burn_annotations(image, rectangles, lines):
+    """矩形 [(x1, y1, x2, y2, 色名), ...] と線 [(x1, y1, x2, y2), ...] を描き込んだ新しい画像を返す"""
+    with tracing.span("render.burn"):
+        result = image.copy()
+        draw = ImageDraw.Draw(result)
+        for x1, y1, x2, y2, color in rectangles:
+            draw.rectangle([x1, y1, x2, y2], outline=ANNOTATION_COLORS.get(color, (255, 0, 0)), width=LINE_WIDTH)
+        for x1, y1, x2, y2 in lines:
+            draw.line([x1, y1, x2, y2], fill=(255, 0, 0), width=LINE_WIDTH)
+    return result
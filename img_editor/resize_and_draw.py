@@ -4,13 +4,38 @@
 """
 import tkinter as tk
 from tkinter import filedialog, messagebox
-from PIL import Image, ImageTk, ImageDraw
 import os
 from pathlib import Path
 
+try:
+    from .lazy_import import LazyModule
+    from . import diagnostics, tracing
+except ImportError:
+    from lazy_import import LazyModule
+    import diagnostics
+    import tracing
+
+# Pillow と機能モジュールは使うときに読み込む（ツールを起動してすぐウィンドウを出せるようにする）
+ImageTk = LazyModule("PIL.ImageTk")
+encoder_profiles = LazyModule("encoder_profiles", __package__)
+folder_watcher = LazyModule("folder_watcher", __package__)
+interaction_recorder = LazyModule("interaction_recorder", __package__)
+output_layout = LazyModule("output_layout", __package__)
+rendering = LazyModule("rendering", __package__)
+resource_monitor = LazyModule("resource_monitor", __package__)
+session = LazyModule("session", __package__)
+thumbnail_browser = LazyModule("thumbnail_browser", __package__)
+work_queue = LazyModule("work_queue", __package__)
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tiff', '.webp'}
+WATCH_INTERVAL_MS = 500  # フォルダ監視の結果を画面に反映する間隔
+RENEW_INTERVAL_MS = 60000  # 作業分担モードでリースを更新する間隔
+SESSION_SAVE_DELAY_MS = 1000  # 画像を切り替えてから作業状態を保存するまでの時間（続けて切り替えた場合は1回にまとめる）
+SESSION_NAME = "resize_and_draw"  # 作業状態の保存名
+
 
 class ImageEditorApp:
-    def __init__(self, root):
+    def __init__(self, root, encoder_profile=None, layout=None, resume=True, work_queue=False):
         self.root = root
         self.root.title("画像エディタ")
         
@@ -20,9 +45,19 @@ class ImageEditorApp:
         self.image_files = []
         self.current_image_index = -1
         self.current_image = None
-        self.display_image = None
-        self.original_image = None
+        self.display_image = None  # 表示中の画像（読み込み元のファイルは閉じたもの）
+        self.photo = None
+        self.browser = None  # サムネイル一覧ウィンドウ
+        self.watcher = None  # フォルダ監視
+        self.watch_job = None
         self.scale_factor = 1.0
+        self.encoder_profile = encoder_profile  # 保存時の圧縮設定（None は既定の設定）
+        self.layout = layout  # 保存先フォルダの構成（None は flat）
+        self.output_index = None  # 保存先フォルダの索引（flat 以外で使う）
+        self.use_work_queue = work_queue  # 作業分担モード（他の作業者と画像を分担する）
+        self.work_queue = None
+        self.renew_job = None
+        self.session_job = None  # 予約中の作業状態の保存
         
         # 描画用の変数
         self.rectangles = []  # [(x1, y1, x2, y2, color), ...]
@@ -39,6 +74,10 @@ class ImageEditorApp:
         # キーバインド
         self.root.bind('<Return>', self.close_polygon)
         
+        # 前回のフォルダと画像を開き直す
+        if resume:
+            self.restore_session()
+        
     def create_widgets(self):
         # 上部：フォルダ選択エリア
         folder_frame = tk.Frame(self.root)
@@ -61,7 +100,11 @@ class ImageEditorApp:
         tk.Button(dest_frame, text="選択", command=self.select_dest_folder).pack(side=tk.LEFT, padx=5)
         
         # 実行ボタン
-        tk.Button(folder_frame, text="実行", command=self.load_images, bg="lightblue").pack(pady=10)
+        run_frame = tk.Frame(folder_frame)
+        run_frame.pack(pady=10)
+        tk.Button(run_frame, text="実行", command=self.load_images, bg="lightblue").pack(side=tk.LEFT, padx=5)
+        self.watch_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(run_frame, text="フォルダ監視", variable=self.watch_var, command=self.toggle_watch).pack(side=tk.LEFT, padx=5)
         
         # 中央：画像表示エリア
         self.canvas = tk.Canvas(self.root, bg="gray", width=500, height=500)
@@ -78,10 +121,15 @@ class ImageEditorApp:
         
         tk.Button(button_frame, text="前へ", command=self.prev_image).pack(side=tk.LEFT, padx=5)
         tk.Button(button_frame, text="次へ", command=self.next_image).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="一覧", command=self.open_browser).pack(side=tk.LEFT, padx=5)
         tk.Button(button_frame, text="リセット", command=self.reset_drawings, bg="lightyellow").pack(side=tk.LEFT, padx=5)
         tk.Button(button_frame, text="保存", command=self.save_image, bg="lightgreen").pack(side=tk.LEFT, padx=5)
         tk.Button(button_frame, text="終了", command=self.root.quit, bg="lightcoral").pack(side=tk.LEFT, padx=5)
         
+        # メモリ使用量の表示
+        self.memory_label = tk.Label(self.root, text="", fg="gray40", anchor="e")
+        self.memory_label.pack(fill=tk.X, padx=10)
+        
     def select_source_folder(self):
         folder = filedialog.askdirectory(title="元フォルダを選択")
         if folder:
@@ -93,45 +141,58 @@ class ImageEditorApp:
         if folder:
             self.dest_folder = folder
             self.dest_label.config(text=folder)
+            self.store_session()
+            # 作業分担モードでは、新しい保存先のリースで取得し直す
+            if self.work_queue is not None:
+                self.load_images()
             
-    def load_images(self):
+    def load_images(self, start_file=None, start_index=0):
         if not self.source_folder:
             messagebox.showwarning("警告", "元フォルダを選択してください")
             return
             
-        # 画像ファイルを取得
-        image_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tiff', '.webp'}
-        self.image_files = [
-            f for f in os.listdir(self.source_folder)
-            if Path(f).suffix.lower() in image_extensions
-        ]
-        self.image_files.sort()
+        if self.use_work_queue and not self.dest_folder:
+            messagebox.showwarning("警告", "作業分担モードでは先に保存先フォルダを選択してください")
+            return
+            
+        # 画像ファイルを取得（フォルダが前回から変わっていなければ一覧のキャッシュを使う）
+        self.image_files = session.list_images(self.source_folder, IMAGE_EXTENSIONS)
+        if self.use_work_queue:
+            # 作業分担モードでは、他の作業者が取得していない画像だけをまとめて取得する
+            self.open_work_queue()
+            self.image_files = self.work_queue.claim(self.image_files)
+        self.current_image_index = -1
+        
+        # 監視中なら新しいフォルダで監視し直す（空のフォルダでも追加を待てるようにする）
+        if self.watch_var.get():
+            self.start_watcher()
         
         if not self.image_files:
-            messagebox.showinfo("情報", "画像ファイルが見つかりませんでした")
+            if self.work_queue is not None:
+                messagebox.showinfo("情報", "未処理の画像はありません（他の作業者が処理中の画像を除く）")
+            else:
+                messagebox.showinfo("情報", "画像ファイルが見つかりませんでした")
             return
             
-        self.current_image_index = 0
+        self.current_image_index = session.find_position(self.image_files, start_file, start_index)
         self.display_current_image()
         
+        # サムネイル一覧が開いていれば新しいリストで更新
+        if self.browser is not None and self.browser.exists():
+            self.browser.source_folder = self.source_folder
+            self.browser.set_files(self.image_files)
+        
     def display_current_image(self):
         if self.current_image_index < 0 or self.current_image_index >= len(self.image_files):
             return
             
-        # 画像を読み込み
+        # 画像を読み込んでリサイズ（横幅500px、縦横比維持）
+        # 元画像はリサイズ後すぐに閉じ、リサイズ後の画像だけを保持する
         image_path = os.path.join(self.source_folder, self.image_files[self.current_image_index])
-        self.original_image = Image.open(image_path)
-        
-        # リサイズ（横幅500px、縦横比維持）
-        original_width, original_height = self.original_image.size
-        new_width = 500
-        new_height = int(original_height * (new_width / original_width))
-        self.scale_factor = original_width / new_width
+        resized_image, self.scale_factor = rendering.prepare_display_image(image_path, width=500)
         
-        resized_image = self.original_image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-        
-        # 表示用の画像を作成（描画用のコピー）
-        self.display_image = resized_image.copy()
+        # 表示用の画像を差し替え（resizeの結果は新しい画像なのでコピーは不要）
+        self.set_display_image(resized_image)
         
         # 描画をクリア
         self.rectangles = []
@@ -142,6 +203,64 @@ class ImageEditorApp:
         
         self.update_canvas()
         
+        # サムネイル一覧の選択位置を合わせる
+        if self.browser is not None and self.browser.exists():
+            self.browser.set_current(self.current_image_index)
+        
+        self.schedule_store_session()
+        
+    def schedule_store_session(self):
+        """作業状態の保存を予約（画像を切り替えるたびにTkのスレッドで書き込まないようにする）"""
+        if self.session_job is None:
+            self.session_job = self.root.after(SESSION_SAVE_DELAY_MS, self.store_session)
+        
+    def store_session(self):
+        """フォルダと表示中の画像を保存（次回の起動時に開き直す）"""
+        if self.session_job is not None:
+            try:
+                self.root.after_cancel(self.session_job)
+            except tk.TclError:
+                # ウィンドウを閉じた後（終了時の保存）
+                pass
+            self.session_job = None
+        current_file = None
+        if 0 <= self.current_image_index < len(self.image_files):
+            current_file = self.image_files[self.current_image_index]
+        try:
+            session.save_session(SESSION_NAME, {
+                "source_folder": self.source_folder,
+                "dest_folder": self.dest_folder,
+                "current_file": current_file,
+                "current_index": self.current_image_index,
+            })
+        except OSError as e:
+            print(f"作業状態を保存できませんでした: {e}")
+        
+    def restore_session(self):
+        """前回のフォルダを開き、最後に表示していた画像から再開"""
+        state = session.load_session(SESSION_NAME)
+        dest_folder = state.get("dest_folder")
+        if dest_folder and os.path.isdir(dest_folder):
+            self.dest_folder = dest_folder
+            self.dest_label.config(text=dest_folder)
+        source_folder = state.get("source_folder")
+        if source_folder and os.path.isdir(source_folder):
+            self.source_folder = source_folder
+            self.source_label.config(text=source_folder)
+            self.load_images(start_file=state.get("current_file"), start_index=state.get("current_index") or 0)
+        
+    def set_display_image(self, img):
+        """表示する画像を差し替える（前の画像とPhotoImageはここで解放する）"""
+        self.canvas.delete("all")
+        self.photo = None
+        if self.display_image is not None and self.display_image is not img:
+            self.display_image.close()
+        self.display_image = img
+        self.update_memory_label()
+        
+    def update_memory_label(self):
+        self.memory_label.config(text=resource_monitor.memory_summary(self.display_image))
+        
     def update_canvas(self):
         if self.display_image is None:
             return
@@ -149,12 +268,15 @@ class ImageEditorApp:
         # キャンバスをクリア
         self.canvas.delete("all")
         
-        # 画像を表示
-        self.photo = ImageTk.PhotoImage(self.display_image)
+        # 画像を表示（PhotoImageは画像を切り替えたときだけ作る）
+        if self.photo is None:
+            with tracing.span("canvas.photo"):
+                self.photo = ImageTk.PhotoImage(self.display_image)
         self.canvas.create_image(0, 0, anchor=tk.NW, image=self.photo)
         
         # 既存の描画を再描画
-        self.redraw_all()
+        with tracing.span("canvas.redraw"):
+            self.redraw_all()
         
     def redraw_all(self):
         # 矩形を描画
@@ -259,38 +381,179 @@ class ImageEditorApp:
             messagebox.showwarning("警告", "保存先フォルダを選択してください")
             return
             
-        # リサイズした画像に描画を反映
-        save_image = self.display_image.copy()
-        draw = ImageDraw.Draw(save_image)
-        
-        # 矩形を描画（座標変換不要、そのまま使用）
-        for rect in self.rectangles:
-            x1, y1, x2, y2, color = rect
-            # 色をRGBに変換
-            if color == "red":
-                rgb_color = (255, 0, 0)
-            elif color == "lime":
-                rgb_color = (0, 255, 0)
-            else:
-                rgb_color = (255, 0, 0)
-                
-            draw.rectangle([x1, y1, x2, y2], outline=rgb_color, width=3)
-            
-        # 線を描画
-        for line in self.lines:
-            x1, y1, x2, y2 = line
-            draw.line([x1, y1, x2, y2], fill=(255, 0, 0), width=3)
+        # 作業分担モードでは、リースが他の作業者に移った画像は保存しない
+        original_filename = self.image_files[self.current_image_index]
+        if self.work_queue is not None and not self.work_queue.confirm(original_filename):
+            self.remove_lost_images([original_filename])
+            return
             
+        # リサイズした画像に描画を反映（座標変換不要、そのまま使用）
+        save_image = rendering.burn_annotations(self.display_image, self.rectangles, self.lines)
+        
         # 保存
-        original_filename = self.image_files[self.current_image_index]
         base_name = Path(original_filename).stem
-        save_path = os.path.join(self.dest_folder, f"{base_name}_answer.jpg")
-        save_image.save(save_path, "JPEG")
+        layout = self.layout or output_layout.FLAT
+        mtime = None
+        if layout == "date":
+            mtime = os.path.getmtime(os.path.join(self.source_folder, original_filename))
+        relative_path = output_layout.output_name(f"{base_name}_answer.jpg", layout, mtime)
+        save_path = os.path.join(self.dest_folder, *relative_path.split("/"))
+        os.makedirs(os.path.dirname(save_path), exist_ok=True)
+        save_image.save(save_path, "JPEG", **encoder_profiles.save_options(self.encoder_profile, "JPEG"))
+        save_image.close()
+        if layout != output_layout.FLAT:
+            self.record_output(original_filename, relative_path)
+        if self.work_queue is not None:
+            try:
+                self.work_queue.mark_done(original_filename)
+            except ValueError:
+                # 確認してから保存し終わるまでの間にリースが他の作業者に移った（処理済みにはしない）
+                self.remove_lost_images([original_filename])
+                return
         messagebox.showinfo("保存完了", f"画像を保存しました:\n{save_path}")
         
+    def record_output(self, original_filename, relative_path):
+        """保存先フォルダの索引に、元のファイル名と保存先を記録"""
+        if self.output_index is None or self.output_index.folder != self.dest_folder:
+            if self.output_index is not None:
+                self.output_index.close()
+            self.output_index = output_layout.OutputIndex(self.dest_folder)
+        self.output_index.record(original_filename, relative_path)
+        
+    def open_work_queue(self):
+        """保存先フォルダの作業キューを開く（前のキューで取得していた画像は返す）"""
+        if self.work_queue is not None:
+            self.work_queue.release_all()
+        self.work_queue = work_queue.WorkQueue(self.dest_folder)
+        if self.renew_job is None:
+            self.renew_job = self.root.after(RENEW_INTERVAL_MS, self.renew_leases)
+        
+    def renew_leases(self):
+        """取得中の画像のリースを更新（期限切れにならないようにする）"""
+        self.renew_job = None
+        if self.work_queue is None:
+            return
+        try:
+            lost = self.work_queue.renew()
+        except OSError as e:
+            print(f"リースを更新できませんでした: {e}")
+        else:
+            if lost:
+                self.remove_lost_images(lost)
+        self.renew_job = self.root.after(RENEW_INTERVAL_MS, self.renew_leases)
+        
+    def remove_lost_images(self, lost):
+        """期限切れで他の作業者に移った画像を一覧から外して知らせる"""
+        self.apply_folder_changes([], sorted(lost))
+        messagebox.showwarning(
+            "警告",
+            "次の画像はリースの期限が切れ、他の作業者に移ったため一覧から外しました（保存されません）:\n"
+            + "\n".join(sorted(lost))
+        )
+        if not self.image_files:
+            self.claim_next_batch()
+        
+    def claim_next_batch(self):
+        """作業分担モードで次の画像をまとめて取得し、保存しなかった前の画像は他の作業者に返す"""
+        previous = list(self.work_queue.held)
+        image_files = self.work_queue.claim(session.list_images(self.source_folder, IMAGE_EXTENSIONS))
+        if not image_files:
+            messagebox.showinfo("情報", "未処理の画像はありません（他の作業者が処理中の画像を除く）")
+            return
+        for name in previous:
+            self.work_queue.release(name)
+        self.image_files = image_files
+        self.current_image_index = 0
+        self.display_current_image()
+        if self.browser is not None and self.browser.exists():
+            self.browser.set_files(self.image_files)
+        
+    def shutdown(self):
+        """終了時に、予約中の作業状態を保存して作業分担のリースを返す"""
+        if self.session_job is not None:
+            self.store_session()
+        if self.work_queue is not None:
+            self.work_queue.release_all()
+        
+    def open_browser(self):
+        """元フォルダの画像をサムネイル一覧で表示"""
+        if not self.image_files:
+            messagebox.showwarning("警告", "画像が読み込まれていません")
+            return
+        if self.browser is not None and self.browser.exists():
+            self.browser.window.lift()
+            return
+        self.browser = thumbnail_browser.ThumbnailBrowser(
+            self.root, self.source_folder, self.image_files,
+            on_select=self.on_browser_select,
+            current_index=max(self.current_image_index, 0)
+        )
+        
+    def on_browser_select(self, index):
+        """サムネイル一覧で選択した画像を表示"""
+        if 0 <= index < len(self.image_files):
+            self.current_image_index = index
+            self.display_current_image()
+        
+    def toggle_watch(self):
+        if self.watch_var.get():
+            if self.source_folder:
+                self.start_watcher()
+        else:
+            self.stop_watcher()
+        
+    def start_watcher(self):
+        """元フォルダの監視を開始（追加・削除されたファイルを一覧に反映する）"""
+        self.stop_watcher()
+        self.watcher = folder_watcher.FolderWatcher(self.source_folder, IMAGE_EXTENSIONS, known_files=self.image_files)
+        self.watcher.start()
+        self.watch_job = self.root.after(WATCH_INTERVAL_MS, self.check_folder_changes)
+        
+    def stop_watcher(self):
+        if self.watch_job is not None:
+            self.root.after_cancel(self.watch_job)
+            self.watch_job = None
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+            
+    def check_folder_changes(self):
+        self.watch_job = None
+        if self.watcher is None:
+            return
+        added, removed = self.watcher.poll()
+        if added or removed:
+            self.apply_folder_changes(added, removed)
+        self.watch_job = self.root.after(WATCH_INTERVAL_MS, self.check_folder_changes)
+        
+    def apply_folder_changes(self, added, removed):
+        """一覧を差分だけ更新する（表示中の画像と描画内容はそのまま）"""
+        if self.work_queue is not None:
+            # 作業分担モードでは、追加された画像は次にまとめて取得するときに取得する
+            added = []
+        if 0 <= self.current_image_index < len(self.image_files):
+            current_file = self.image_files[self.current_image_index]
+        else:
+            current_file = None
+        self.current_image_index = folder_watcher.apply_changes(self.image_files, self.current_image_index, added, removed)
+        
+        # 表示中の画像が消えた場合や、初めて画像が届いた場合だけ表示し直す
+        if current_file is None or current_file in removed:
+            if self.image_files:
+                self.display_current_image()
+            else:
+                self.set_display_image(None)
+                
+        if self.browser is not None and self.browser.exists():
+            self.browser.set_files(self.image_files)
+            self.browser.set_current(max(self.current_image_index, 0))
+        
     def next_image(self):
         if len(self.image_files) == 0:
             return
+        if self.work_queue is not None and self.current_image_index == len(self.image_files) - 1:
+            self.claim_next_batch()
+            return
         self.current_image_index = (self.current_image_index + 1) % len(self.image_files)
         self.display_current_image()
         
@@ -301,10 +564,22 @@ class ImageEditorApp:
         self.display_current_image()
 
 
-def main():
+def main(argv=None):
+    args = diagnostics.parse_args(
+        "画像エディタ（リサイズ・描画）", argv,
+        (encoder_profiles.add_argument, output_layout.add_argument, session.add_argument, work_queue.add_argument,
+         interaction_recorder.add_argument)
+    )
     root = tk.Tk()
-    app = ImageEditorApp(root)
+    diagnostics.attach(root, args, "resize_and_draw")
+    app = ImageEditorApp(
+        root, encoder_profile=args.encoder, layout=args.layout, resume=not args.no_resume,
+        work_queue=args.work_queue
+    )
+    if args.record:
+        interaction_recorder.InteractionRecorder(app, args.record, "resize_and_draw")
     root.mainloop()
+    app.shutdown()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,122 @@
+"""
+エディタのメモリ使用量を確認するための補助関数。
+プロセスのRSS・開いているファイル数・保持している画像のピクセルバッファの大きさを返す。
+
+長時間の画像切り替えでメモリが増え続けないことを確認する場合：
+    python -m img_editor.resource_monitor 元フォルダ --count 10000
+"""
+import argparse
+import os
+import sys
+
+
+def rss_bytes():
+    """現在のRSS（取得できない環境ではNone）"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # /procがない環境では最大RSSで代用（macOSはバイト、それ以外はKB単位）
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def open_file_count():
+    """開いているファイルディスクリプタの数（取得できない環境ではNone）"""
+    for fd_dir in ("/proc/self/fd", "/dev/fd"):
+        try:
+            return len(os.listdir(fd_dir))
+        except OSError:
+            continue
+    return None
+
+
+def image_bytes(*images):
+    """画像のピクセルバッファの合計サイズ（Noneは無視）"""
+    total = 0
+    for img in images:
+        if img is not None:
+            total += img.width * img.height * len(img.getbands())
+    return total
+
+
+def format_bytes(size):
+    if size is None:
+        return "-"
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GB"
+
+
+def memory_summary(*images):
+    """ステータス表示用の文字列"""
+    files = open_file_count()
+    return "RSS {} / 画像 {} / ファイル {}".format(
+        format_bytes(rss_bytes()),
+        format_bytes(image_bytes(*images)),
+        "-" if files is None else files
+    )
+
+
+def soak(app, count, report_every=1000, output=sys.stdout):
+    """app.next_image を count 回呼び、一定間隔でRSSとファイル数を出力する"""
+    samples = []
+    for i in range(1, count + 1):
+        app.next_image()
+        app.root.update_idletasks()
+        if i % report_every == 0 or i == count:
+            sample = (i, rss_bytes(), open_file_count())
+            samples.append(sample)
+            print(f"{sample[0]:>7} 回: RSS {format_bytes(sample[1])}, ファイル {sample[2]}", file=output)
+    return samples
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="画像を繰り返し切り替えてメモリ使用量の推移を確認する")
+    parser.add_argument("folder", help="画像のあるフォルダ")
+    parser.add_argument("--count", type=int, default=10000, help="画像を切り替える回数")
+    parser.add_argument("--report-every", type=int, default=1000)
+    parser.add_argument("--app", choices=("resize_and_draw", "img_draw"), default="resize_and_draw")
+    args = parser.parse_args(argv)
+
+    import tkinter as tk
+    if args.app == "img_draw":
+        try:
+            from .img_draw import ImageEditorApp
+        except ImportError:
+            from img_draw import ImageEditorApp
+    else:
+        try:
+            from .resize_and_draw import ImageEditorApp
+        except ImportError:
+            from resize_and_draw import ImageEditorApp
+
+    root = tk.Tk()
+    root.withdraw()
+    app = ImageEditorApp(root, resume=False)
+    # 耐久テストで作業状態（前回のフォルダと画像）を上書きしない
+    app.store_session = lambda: None
+    app.source_folder = args.folder
+    app.load_images()
+    if not app.image_files:
+        root.destroy()
+        return 1
+    samples = soak(app, args.count, args.report_every)
+    root.destroy()
+
+    first, last = samples[0], samples[-1]
+    if first[1] is not None and last[1] is not None:
+        print(f"RSSの増加: {format_bytes(max(last[1] - first[1], 0))}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+問題データ（questions）のフィールドを対象にした、メモリ上の転置インデックス。
+日本語を含むテキストは文字n-gram（1文字・2文字）に分割して索引付けする。
+"""
+import threading
+import unicodedata
+
+
+def normalize_text(value):
+    """検索用にテキストを正規化（全角/半角の統一、小文字化）"""
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        value = "\n".join(str(v) for v in value)
+    return unicodedata.normalize("NFKC", str(value)).lower()
+
+
+def ngrams(text, max_n=2):
+    """テキストを1～max_n文字のn-gramの集合に分割（空白は区切りとして扱う）"""
+    grams = set()
+    for chunk in text.split():
+        for n in range(1, max_n + 1):
+            for i in range(len(chunk) - n + 1):
+                grams.add(chunk[i:i + n])
+    return grams
+
+
+class SearchIndex:
+    """種別とIDをキーに、フィールドごとのn-gram転置インデックスを保持する"""
+
+    def __init__(self, field_names):
+        self.field_names = list(field_names)
+        self.lock = threading.Lock()
+        self.postings = {field: {} for field in self.field_names}  # field -> gram -> {doc_key, ...}
+        self.documents = {}  # (type_english, id) -> {field: 正規化済みテキスト}
+        self.sources = {}  # type_english -> 索引付けしたJSONデータ
+
+    def is_indexed(self, type_english, data):
+        """指定したJSONデータで索引が作成済みかどうか"""
+        with self.lock:
+            return self.sources.get(type_english) is data
+
+    def index_dataset(self, type_english, data):
+        """種別のデータ全体を索引付けし直す"""
+        with self.lock:
+            for doc_key in [k for k in self.documents if k[0] == type_english]:
+                self._remove(doc_key)
+            for question in data.get("questions", []):
+                self._add(type_english, question)
+            self.sources[type_english] = data
+
+    def update(self, type_english, question):
+        """1件分の索引を差し替える（保存時の差分更新）"""
+        with self.lock:
+            self._remove((type_english, question.get("id")))
+            self._add(type_english, question)
+
+    def remove(self, type_english, question_id):
+        with self.lock:
+            self._remove((type_english, question_id))
+
+    def _add(self, type_english, question):
+        doc_key = (type_english, question.get("id"))
+        fields = {}
+        for field in self.field_names:
+            text = normalize_text(question.get(field))
+            if not text:
+                continue
+            fields[field] = text
+            field_postings = self.postings[field]
+            for gram in ngrams(text):
+                field_postings.setdefault(gram, set()).add(doc_key)
+        self.documents[doc_key] = fields
+
+    def _remove(self, doc_key):
+        fields = self.documents.pop(doc_key, None)
+        if not fields:
+            return
+        for field, text in fields.items():
+            field_postings = self.postings[field]
+            for gram in ngrams(text):
+                docs = field_postings.get(gram)
+                if docs is None:
+                    continue
+                docs.discard(doc_key)
+                if not docs:
+                    del field_postings[gram]
+
+    def search(self, query, field=None, limit=200):
+        """クエリを含むレコードを検索し、[(type_english, id, field, 抜粋), ...] を返す"""
+        terms = normalize_text(query).split()
+        if not terms:
+            return []
+        fields = [field] if field else self.field_names
+        results = []
+        with self.lock:
+            for target_field in fields:
+                field_postings = self.postings.get(target_field, {})
+                candidates = None
+                for term in terms:
+                    # 語に含まれる2文字gram（1文字の語はその文字）の積集合で候補を絞る
+                    grams = ngrams(term) if len(term) == 1 else {term[i:i + 2] for i in range(len(term) - 1)}
+                    for gram in grams:
+                        docs = field_postings.get(gram)
+                        if not docs:
+                            candidates = set()
+                            break
+                        candidates = set(docs) if candidates is None else candidates & docs
+                    if not candidates:
+                        break
+                for doc_key in candidates or ():
+                    # n-gramの一致は候補にすぎないため、部分文字列で最終確認する
+                    text = self.documents[doc_key][target_field]
+                    if all(term in text for term in terms):
+                        results.append((doc_key[0], doc_key[1], target_field, self._snippet(text, terms[0])))
+
+        results.sort(key=lambda r: (r[0], r[1] if isinstance(r[1], int) else 0, self.field_names.index(r[2])))
+        return results[:limit]
+
+    @staticmethod
+    def _snippet(text, term, width=20):
+        pos = text.find(term)
+        start = max(pos - width // 2, 0)
+        snippet = text[start:start + width + len(term)].replace("\n", " ")
+        return ("…" if start > 0 else "") + snippet
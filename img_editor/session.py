@@ -0,0 +1,91 @@
+"""
+描画エディタの作業状態（前回のフォルダと表示中の画像）と、元フォルダの一覧のキャッシュ。
+
+一覧のキャッシュはフォルダの更新日時（ナノ秒）が一致する間だけ使う。ファイルの追加・削除・名前の変更で
+フォルダの更新日時が変わるため、再起動時にファイル数の多いフォルダを一覧し直さずに済む。
+"""
+import hashlib
+import json
+import os
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+try:
+    from . import cache_paths
+except ImportError:
+    import cache_paths
+
+RACY_SECONDS = 2  # 一覧を取る直前に更新されたフォルダは、同じ更新日時のまま変わる可能性があるので保存しない
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_session(name, session_dir=None):
+    """前回の作業状態（なければ空のdict）"""
+    state = _read_json(os.path.join(session_dir or cache_paths.cache_dir("session"), f"{name}.json"))
+    return state if isinstance(state, dict) else {}
+
+
+def save_session(name, state, session_dir=None):
+    _write_json(os.path.join(session_dir or cache_paths.cache_dir("session"), f"{name}.json"), state)
+
+
+def snapshot_path(folder, session_dir=None):
+    digest = hashlib.md5(os.path.abspath(folder).encode("utf-8")).hexdigest()
+    return os.path.join(session_dir or cache_paths.cache_dir("session"), "listings", digest + ".json")
+
+
+def list_images(folder, extensions, session_dir=None):
+    """フォルダ内の画像ファイル名を名前順に返す（更新日時が変わっていなければキャッシュを使う）"""
+    folder_mtime = os.stat(folder).st_mtime_ns
+    path = snapshot_path(folder, session_dir)
+    snapshot = _read_json(path)
+    if (
+        isinstance(snapshot, dict)
+        and snapshot.get("folder") == os.path.abspath(folder)
+        and snapshot.get("mtime_ns") == folder_mtime
+        and snapshot.get("extensions") == sorted(extensions)
+    ):
+        return snapshot["files"]
+
+    listed_at = time.time_ns()
+    files = sorted(f for f in os.listdir(folder) if Path(f).suffix.lower() in extensions)
+    if folder_mtime < listed_at - RACY_SECONDS * 1_000_000_000:
+        _write_json(path, {
+            "folder": os.path.abspath(folder),
+            "mtime_ns": folder_mtime,
+            "extensions": sorted(extensions),
+            "files": files,
+        })
+    return files
+
+
+def find_position(image_files, filename, fallback_index=0):
+    """名前順のリストで filename の位置を返す（なくなっていれば前回の位置の近く）"""
+    if not image_files:
+        return -1
+    if filename:
+        index = bisect_left(image_files, filename)
+        if index < len(image_files) and image_files[index] == filename:
+            return index
+        return min(index, len(image_files) - 1)
+    return min(max(fallback_index, 0), len(image_files) - 1)
+
+
+def add_argument(parser):
+    parser.add_argument("--no-resume", action="store_true", help="前回のフォルダと画像を開かずに起動する")
@@ -0,0 +1,181 @@
+"""
+描画エディタ用のサムネイル一覧。元フォルダの画像をグリッド表示し、クリックした画像を開く。
+サムネイルは表示範囲のセルの分だけ別スレッドで作成し、ディスク上のキャッシュに保存する。
+"""
+import tkinter as tk
+from tkinter import ttk
+import hashlib
+import os
+from PIL import Image
+
+try:
+    from .virtual_canvas import VirtualCanvasWindow
+    from . import cache_paths
+except ImportError:
+    from virtual_canvas import VirtualCanvasWindow
+    import cache_paths
+
+THUMB_SIZE = 120
+
+
+class ThumbnailDiskCache:
+    """元画像のパス・更新日時・サイズをキーに、サムネイルをJPEGで保存するキャッシュ"""
+
+    def __init__(self, cache_dir=None, size=THUMB_SIZE):
+        self.cache_dir = cache_dir or cache_paths.cache_dir("thumbnails")
+        self.size = size
+
+    def cache_path(self, image_path):
+        st = os.stat(image_path)
+        key = f"{os.path.abspath(image_path)}|{st.st_mtime_ns}|{st.st_size}|{self.size}"
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], digest + ".jpg")
+
+    def get(self, image_path):
+        """サムネイルを返す（キャッシュになければ作成して保存）"""
+        cache_path = self.cache_path(image_path)
+        try:
+            with Image.open(cache_path) as cached:
+                cached.load()
+                return cached.copy()
+        except (OSError, ValueError):
+            pass
+
+        with Image.open(image_path) as img:
+            # JPEGは縮小デコードで読み込み量を減らす
+            img.draft("RGB", (self.size, self.size))
+            img.thumbnail((self.size, self.size), Image.Resampling.LANCZOS)
+            thumb = img.convert("RGB")
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            thumb.save(tmp_path, "JPEG", quality=85)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            # キャッシュに書けなくても表示は続ける
+            pass
+        return thumb
+
+
+class ThumbnailBrowser(VirtualCanvasWindow):
+    CELL_PADDING = 8
+    LABEL_HEIGHT = 18
+
+    def __init__(self, root, source_folder, image_files, on_select, current_index=0, cache=None, max_workers=None):
+        super().__init__(
+            root, f"サムネイル一覧 - {source_folder}", "840x600",
+            max_workers=max_workers or min(4, os.cpu_count() or 1), thread_name_prefix="thumbnail"
+        )
+        self.source_folder = source_folder
+        self.image_files = image_files
+        self.on_select = on_select  # セルをクリックしたときに画像の番号で呼ばれる
+        self.current_index = current_index
+
+        self.cache = cache or ThumbnailDiskCache()
+        self.failed = set()  # サムネイルを作成できなかった画像のパス
+
+        self.cell_width = THUMB_SIZE + self.CELL_PADDING * 2
+        self.cell_height = THUMB_SIZE + self.CELL_PADDING * 2 + self.LABEL_HEIGHT
+
+        self.create_widgets()
+        self.window.after_idle(self.scroll_to_current)
+
+    def create_widgets(self):
+        self.canvas = tk.Canvas(self.window, bg="gray25", highlightthickness=0)
+        self.scrollbar = ttk.Scrollbar(self.window, orient="vertical", command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self.on_scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+
+        self.canvas.bind("<Configure>", lambda e: self.update_layout())
+        self.canvas.bind("<Button-1>", self.on_click)
+        self.canvas.bind("<MouseWheel>", lambda e: self.canvas.yview_scroll(-1 if e.delta > 0 else 1, "units"))
+        self.canvas.bind("<Button-4>", lambda e: self.canvas.yview_scroll(-1, "units"))
+        self.canvas.bind("<Button-5>", lambda e: self.canvas.yview_scroll(1, "units"))
+
+    def columns(self):
+        return max(self.canvas.winfo_width() // self.cell_width, 1)
+
+    def update_layout(self):
+        rows = (len(self.image_files) + self.columns() - 1) // self.columns()
+        self.canvas.configure(
+            scrollregion=(0, 0, self.columns() * self.cell_width, rows * self.cell_height),
+            yscrollincrement=self.cell_height // 2
+        )
+        self.schedule_render()
+
+    def set_files(self, image_files):
+        """画像リストが変わったときに呼ぶ（作成中のサムネイルは画像のパスで受け取るので、そのまま使える）"""
+        self.image_files = image_files
+        self.photos.clear()
+        self.failed.clear()
+        self.update_layout()
+
+    def set_current(self, index):
+        self.current_index = index
+        self.schedule_render()
+
+    def scroll_to_current(self):
+        self.update_layout()
+        rows = max((len(self.image_files) + self.columns() - 1) // self.columns(), 1)
+        row = self.current_index // self.columns()
+        self.canvas.yview_moveto(row / rows)
+
+    def on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self.schedule_render()
+
+    def visible_range(self):
+        top = self.canvas.canvasy(0)
+        first_row = max(int(top // self.cell_height), 0)
+        last_row = int((top + self.canvas.winfo_height()) // self.cell_height) + 1
+        columns = self.columns()
+        return first_row * columns, min((last_row + 1) * columns, len(self.image_files))
+
+    def render(self):
+        """表示範囲のセルだけを描画し、足りないサムネイルを作成依頼する"""
+        self.canvas.delete("all")
+        first, last = self.visible_range()
+        columns = self.columns()
+        visible_paths = set()
+
+        for index in range(first, last):
+            row, column = divmod(index, columns)
+            x = column * self.cell_width
+            y = row * self.cell_height
+            if index == self.current_index:
+                self.canvas.create_rectangle(x + 2, y + 2, x + self.cell_width - 2, y + self.cell_height - 2, outline="yellow", width=3)
+            center_x = x + self.cell_width // 2
+            center_y = y + self.CELL_PADDING + THUMB_SIZE // 2
+            filename = self.image_files[index]
+            image_path = os.path.join(self.source_folder, filename)
+            visible_paths.add(image_path)
+            photo = self.photos.get(image_path)
+            if photo is not None:
+                self.canvas.create_image(center_x, center_y, image=photo)
+            elif image_path in self.failed:
+                self.canvas.create_text(center_x, center_y, text="×", fill="red")
+            else:
+                self.canvas.create_text(center_x, center_y, text="…", fill="white")
+                self.request_thumbnail(image_path, lambda path=image_path: self.cache.get(path))
+            if len(filename) > 18:
+                filename = filename[:8] + "…" + filename[-9:]
+            self.canvas.create_text(center_x, y + self.cell_height - self.LABEL_HEIGHT // 2 - 2, text=filename, fill="white")
+
+        self.discard_offscreen(visible_paths)
+
+    def on_thumbnail_loaded(self, path, img):
+        if img is None:
+            self.failed.add(path)
+        else:
+            super().on_thumbnail_loaded(path, img)
+
+    def on_click(self, event):
+        column = int(self.canvas.canvasx(event.x) // self.cell_width)
+        row = int(self.canvas.canvasy(event.y) // self.cell_height)
+        if column >= self.columns():
+            return
+        index = row * self.columns() + column
+        if 0 <= index < len(self.image_files):
+            self.set_current(index)
+            self.on_select(index)
@@ -0,0 +1,181 @@
+"""
+処理時間を区間（span）ごとに記録する軽量なトレース。
+環境変数 IMG_EDITOR_TRACE（出力先のファイル名、または 1）か各ツールの --trace で有効になる。
+無効の場合、span() は何もしない共通のオブジェクトを返すだけなので処理はほぼ増えない。
+
+終了時に Chrome のトレース形式（chrome://tracing や Perfetto で開ける）のJSONと、
+区間ごとの集計（件数・合計・パーセンタイル・ヒストグラム）を書き出す。
+"""
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+
+ENV_VAR = "IMG_EDITOR_TRACE"
+DEFAULT_OUTPUT = "img_editor_trace.json"
+# ヒストグラムの区切り（ミリ秒）
+HISTOGRAM_BOUNDS_MS = (0.1, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+_events = []  # (名前, スレッドID, 開始ns, 所要ns, 引数)
+_output_path = None
+_enabled = False
+_lock = threading.Lock()
+
+
+class _NullSpan:
+    """トレース無効時に使う何もしないspan"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        # list.append はスレッドセーフなのでロックは取らない
+        _events.append((self.name, threading.get_ident(), self.start, end - self.start, self.args))
+        return False
+
+
+def span(name, **args):
+    """with span("resize.decode"): ... のように処理を囲む"""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, args)
+
+
+def is_enabled():
+    return _enabled
+
+
+def enable(output_path=None):
+    """トレースを有効にする（終了時に output_path へ書き出す）"""
+    global _enabled, _output_path
+    with _lock:
+        if not _enabled:
+            atexit.register(write_reports)
+        _enabled = True
+        _output_path = output_path or DEFAULT_OUTPUT
+
+
+def events():
+    return list(_events)
+
+
+def chrome_trace():
+    """Chrome トレースイベント形式の辞書を返す"""
+    pid = os.getpid()
+    trace_events = []
+    thread_ids = set()
+    for name, tid, start_ns, duration_ns, args in list(_events):
+        trace_events.append({
+            "name": name,
+            "cat": name.split(".", 1)[0],
+            "ph": "X",
+            "ts": start_ns / 1000,
+            "dur": duration_ns / 1000,
+            "pid": pid,
+            "tid": tid,
+            "args": args,
+        })
+        thread_ids.add(tid)
+    # スレッド名を表示できるようにメタデータを付ける
+    for thread in threading.enumerate():
+        if thread.ident in thread_ids:
+            trace_events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": thread.ident, "args": {"name": thread.name}})
+    return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+
+def percentile(sorted_values, ratio):
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(ratio * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def summary():
+    """区間名ごとの集計を返す（時間はミリ秒）"""
+    durations = {}
+    for name, _, _, duration_ns, _ in list(_events):
+        durations.setdefault(name, []).append(duration_ns / 1e6)
+
+    result = {}
+    for name, values in sorted(durations.items()):
+        values.sort()
+        histogram = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+        for value in values:
+            bucket = 0
+            while bucket < len(HISTOGRAM_BOUNDS_MS) and value > HISTOGRAM_BOUNDS_MS[bucket]:
+                bucket += 1
+            histogram[bucket] += 1
+        result[name] = {
+            "count": len(values),
+            "total_ms": sum(values),
+            "p50_ms": percentile(values, 0.5),
+            "p90_ms": percentile(values, 0.9),
+            "p99_ms": percentile(values, 0.99),
+            "max_ms": values[-1],
+            "histogram": histogram,
+        }
+    return result
+
+
+def format_summary(stats=None):
+    """集計を表形式の文字列にする"""
+    stats = summary() if stats is None else stats
+    if not stats:
+        return "記録された区間はありません"
+    labels = [f"<={bound:g}ms" for bound in HISTOGRAM_BOUNDS_MS] + [f">{HISTOGRAM_BOUNDS_MS[-1]:g}ms"]
+    lines = []
+    for name, s in stats.items():
+        lines.append(
+            f"{name}: {s['count']}件 合計 {s['total_ms']:.1f}ms "
+            f"p50 {s['p50_ms']:.2f}ms p90 {s['p90_ms']:.2f}ms p99 {s['p99_ms']:.2f}ms 最大 {s['max_ms']:.2f}ms"
+        )
+        peak = max(s["histogram"]) or 1
+        for label, count in zip(labels, s["histogram"]):
+            if count:
+                lines.append(f"  {label:>9} {'#' * max(1, count * 40 // peak)} {count}")
+    return "\n".join(lines)
+
+
+def write_reports(output_path=None):
+    """トレース（JSON）と集計（.summary.txt）を書き出す"""
+    output_path = output_path or _output_path or DEFAULT_OUTPUT
+    if not _events:
+        return None
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(chrome_trace(), f, ensure_ascii=False)
+    text = format_summary()
+    summary_path = os.path.splitext(output_path)[0] + ".summary.txt"
+    with open(summary_path, "w", encoding="utf-8") as f:
+        f.write(text + "\n")
+    print(f"トレースを保存しました: {output_path}\n{text}", file=sys.stderr)
+    return output_path
+
+
+def _enable_from_environment():
+    value = os.environ.get(ENV_VAR, "").strip()
+    if value and value.lower() not in ("0", "false", "no", "off"):
+        enable(None if value.lower() in ("1", "true", "yes", "on") else value)
+
+
+_enable_from_environment()
@@ -0,0 +1,227 @@
+"""
+問題データ（JSON）と参照画像の整合性をまとめて検証する。
+画像はスレッドプールで存在確認とヘッダーの読み取り（画素は読み込まない）を行う。
+
+使い方（GUIなし）:
+    python -m img_editor.validator               # 全種別を検証
+    python -m img_editor.validator electricity   # 種別を指定
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+
+try:
+    from .lazy_json import LazyQuestions, load_json_file
+except ImportError:
+    from lazy_json import LazyQuestions, load_json_file
+
+TYPES = ("electricity", "water", "gas")
+IMAGE_FIELDS = ("meterImage", "explanationImage")
+REQUIRED_FIELDS = (
+    "multiplier", "pulseUnit", "pulseUnitDisplay", "integerDigits",
+    "decimalDigits", "displayUnit", "serialNumber", "inspectionYear",
+    "inspectionMonth", "displayValue", "explanationText"
+)
+MIN_ID = 1
+MAX_ID = 999
+
+
+def inspect_image(full_path):
+    """画像の存在とヘッダーを確認し、(エラー内容, 情報) を返す"""
+    try:
+        st = os.stat(full_path)
+    except OSError:
+        return "画像が見つかりません", None
+    try:
+        # Image.openはヘッダーだけを読む（load()しない限り画素はデコードされない）
+        with Image.open(full_path) as img:
+            info = {"format": img.format, "size": img.size, "bytes": st.st_size}
+    except Exception as e:
+        return f"画像を読み込めません: {e}", None
+    return None, info
+
+
+def check_digits(question):
+    """表示値が整数桁・小数桁に収まっているかを確認し、エラー内容のリストを返す"""
+    errors = []
+    value = str(question.get("displayValue", "")).strip()
+    if not value:
+        return errors
+    try:
+        integer_digits = int(question.get("integerDigits", ""))
+        decimal_digits = int(question.get("decimalDigits", ""))
+    except (TypeError, ValueError):
+        errors.append(("integerDigits", "整数桁・小数桁が数値ではありません"))
+        return errors
+
+    integer_part, _, decimal_part = value.lstrip("-").partition(".")
+    if not integer_part.isdigit() or (decimal_part and not decimal_part.isdigit()):
+        errors.append(("displayValue", f"表示値が数値ではありません: {value}"))
+        return errors
+    if len(integer_part) > integer_digits:
+        errors.append(("displayValue", f"表示値の整数部 {len(integer_part)}桁 が整数桁 {integer_digits} を超えています"))
+    if len(decimal_part) > decimal_digits:
+        errors.append(("displayValue", f"表示値の小数部 {len(decimal_part)}桁 が小数桁 {decimal_digits} を超えています"))
+    return errors
+
+
+class ValidationReport:
+    def __init__(self, type_english):
+        self.type_english = type_english
+        self.issues = []  # [(level, id, field, message), ...]
+        self.record_count = 0
+        self.image_count = 0
+        self.images = []  # 読み込めた画像 [(id, field, 相対パス, 形式, (幅, 高さ), バイト数), ...]
+        self.elapsed = 0.0
+
+    def add(self, level, question_id, field, message):
+        self.issues.append((level, question_id, field, message))
+
+    @property
+    def error_count(self):
+        return sum(1 for issue in self.issues if issue[0] == "error")
+
+    @property
+    def warning_count(self):
+        return sum(1 for issue in self.issues if issue[0] == "warning")
+
+    def size_counts(self):
+        """画像サイズ (幅, 高さ) ごとの件数を、多い順に返す"""
+        return Counter(size for _, _, _, _, size, _ in self.images).most_common()
+
+    def to_dict(self):
+        return {
+            "type": self.type_english,
+            "records": self.record_count,
+            "images": self.image_count,
+            "errors": self.error_count,
+            "warnings": self.warning_count,
+            "elapsed": round(self.elapsed, 3),
+            "imageDetails": [
+                {"id": question_id, "field": field, "path": rel_path, "format": image_format,
+                 "width": size[0], "height": size[1], "bytes": size_bytes}
+                for question_id, field, rel_path, image_format, size, size_bytes in self.images
+            ],
+            "issues": [
+                {"level": level, "id": question_id, "field": field, "message": message}
+                for level, question_id, field, message in self.issues
+            ],
+        }
+
+    def format_text(self):
+        """レポートを文字列にする"""
+        lines = [
+            f"[{self.type_english}] レコード {self.record_count}件 / 画像 {self.image_count}件 / "
+            f"エラー {self.error_count}件 / 警告 {self.warning_count}件 ({self.elapsed:.2f}秒)"
+        ]
+        size_counts = self.size_counts()
+        if size_counts:
+            shown = ", ".join(f"{width}x{height} {count}件" for (width, height), count in size_counts[:5])
+            if len(size_counts) > 5:
+                shown += f" ほか{len(size_counts) - 5}種類"
+            lines.append(f"  画像サイズ: {shown}")
+        level_labels = {"error": "エラー", "warning": "警告"}
+        for level, question_id, field, message in sorted(self.issues, key=lambda i: (str(i[1]), i[2])):
+            lines.append(f"  {level_labels[level]} ID {question_id} {field}: {message}")
+        return "\n".join(lines)
+
+
+def validate_dataset(data, base_dir, type_english, max_workers=None):
+    """1種別分のJSONデータを検証してValidationReportを返す"""
+    start = time.perf_counter()
+    report = ValidationReport(type_english)
+    questions = data.get("questions") if isinstance(data, dict) else None
+    if not isinstance(questions, (list, LazyQuestions)):
+        report.add("error", None, "questions", "questions 配列がありません")
+        report.elapsed = time.perf_counter() - start
+        return report
+    report.record_count = len(questions)
+
+    # レコード単位の検証
+    seen_ids = set()
+    image_jobs = []
+    for question in questions:
+        question_id = question.get("id")
+        if not isinstance(question_id, int) or not MIN_ID <= question_id <= MAX_ID:
+            report.add("error", question_id, "id", f"IDが範囲外です（{MIN_ID}～{MAX_ID}）")
+        elif question_id in seen_ids:
+            report.add("error", question_id, "id", "IDが重複しています")
+        seen_ids.add(question_id)
+
+        for field in REQUIRED_FIELDS:
+            if field not in question:
+                report.add("warning", question_id, field, "フィールドがありません")
+        if "displayValue" in question and not str(question["displayValue"]).strip():
+            report.add("warning", question_id, "displayValue", "表示値が空です")
+        for field, message in check_digits(question):
+            report.add("error", question_id, field, message)
+
+        for field in IMAGE_FIELDS:
+            rel_path = question.get(field)
+            if not rel_path:
+                report.add("warning", question_id, field, "画像が設定されていません")
+                continue
+            image_jobs.append((question_id, field, os.path.join(base_dir, rel_path)))
+
+    # 画像の検証（I/O待ちが中心なのでスレッドで並列化）
+    report.image_count = len(image_jobs)
+    with ThreadPoolExecutor(max_workers=max_workers or min(32, (os.cpu_count() or 1) * 4)) as executor:
+        results = executor.map(lambda job: inspect_image(job[2]), image_jobs)
+        for (question_id, field, full_path), (error, info) in zip(image_jobs, results):
+            rel_path = os.path.relpath(full_path, base_dir)
+            if error:
+                report.add("error", question_id, field, f"{error}: {rel_path}")
+                continue
+            report.images.append((question_id, field, rel_path, info["format"], info["size"], info["bytes"]))
+            if full_path.lower().endswith((".jpg", ".jpeg")) and info["format"] != "JPEG":
+                report.add("warning", question_id, field, f"拡張子は.jpgですが実際の形式は{info['format']}です")
+
+    report.elapsed = time.perf_counter() - start
+    return report
+
+
+def validate_file(json_path, base_dir, type_english, max_workers=None):
+    """JSONファイルを読み込んで検証"""
+    try:
+        data = load_json_file(json_path)
+    except (OSError, ValueError) as e:
+        report = ValidationReport(type_english)
+        report.add("error", None, "json", f"JSONファイルを読み込めません: {e}")
+        return report
+    return validate_dataset(data, base_dir, type_english, max_workers)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="問題データと画像の整合性を検証します")
+    parser.add_argument("types", nargs="*", metavar="type", help="検証する種別: " + ", ".join(TYPES) + "（省略時はすべて）")
+    parser.add_argument("--base-dir", default=os.path.dirname(os.path.abspath(__file__)), help="json/ と img/ があるディレクトリ")
+    parser.add_argument("--workers", type=int, default=None, help="画像検証のスレッド数")
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力")
+    args = parser.parse_args(argv)
+    for type_english in args.types:
+        if type_english not in TYPES:
+            parser.error(f"不明な種別です: {type_english}")
+
+    reports = []
+    for type_english in args.types or TYPES:
+        json_path = os.path.join(args.base_dir, "json", f"{type_english}.json")
+        if not os.path.exists(json_path):
+            continue
+        reports.append(validate_file(json_path, args.base_dir, type_english, args.workers))
+
+    if args.json:
+        json.dump([r.to_dict() for r in reports], sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        for report in reports:
+            print(report.format_text())
+    return 1 if any(r.error_count for r in reports) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
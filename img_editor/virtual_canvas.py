@@ -0,0 +1,86 @@
+"""
+一覧ウィンドウ（描画エディタのサムネイル一覧、JSONエディタの一覧）で共通の仕組み。
+表示範囲だけを描画する仮想スクロールの描画予約と、サムネイルの別スレッドでの作成を扱う。
+"""
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from PIL import ImageTk
+
+
+class VirtualCanvasWindow:
+    """表示範囲だけを描画する一覧ウィンドウ（サブクラスで render を定義する）"""
+
+    def __init__(self, root, title, geometry, max_workers, thread_name_prefix):
+        self.root = root
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self.photos = {}  # 画像のパス -> PhotoImage（表示中のもののみ保持）
+        self.loading = {}  # 画像のパス -> 作成中のサムネイルの Future
+        self.render_pending = False
+
+        self.window = tk.Toplevel(root)
+        self.window.title(title)
+        self.window.geometry(geometry)
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+    def render(self):
+        raise NotImplementedError
+
+    def schedule_render(self):
+        """連続したスクロールイベントをまとめて1回だけ描画する"""
+        if not self.render_pending:
+            self.render_pending = True
+            self.window.after_idle(self._render)
+
+    def _render(self):
+        self.render_pending = False
+        self.render()
+
+    def request_thumbnail(self, path, load_thumbnail):
+        """path のサムネイルを別スレッドで load_thumbnail() により作成する（作成中なら何もしない）"""
+        if path in self.loading:
+            return
+
+        def load():
+            try:
+                img = load_thumbnail()
+            except Exception:
+                img = None
+            try:
+                self.window.after(0, self._on_thumbnail_loaded, path, img)
+            except (RuntimeError, tk.TclError):
+                # ウィンドウが閉じられた後は何もしない
+                pass
+
+        self.loading[path] = self.executor.submit(load)
+
+    def _on_thumbnail_loaded(self, path, img):
+        self.loading.pop(path, None)
+        if not self.exists():
+            return
+        self.on_thumbnail_loaded(path, img)
+        self.schedule_render()
+
+    def on_thumbnail_loaded(self, path, img):
+        """作成したサムネイルを受け取る（作成できなかった場合は img が None）"""
+        if img is not None:
+            self.photos[path] = ImageTk.PhotoImage(img)
+
+    def discard_offscreen(self, visible_paths):
+        """表示範囲外のサムネイルと、まだ始まっていない作成依頼を破棄"""
+        for path in list(self.photos):
+            if path not in visible_paths:
+                del self.photos[path]
+        for path, future in list(self.loading.items()):
+            if path not in visible_paths and future.cancel():
+                del self.loading[path]
+
+    def exists(self):
+        try:
+            return bool(self.window.winfo_exists())
+        except tk.TclError:
+            return False
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.photos.clear()
+        self.window.destroy()
@@ -0,0 +1,112 @@
+"""
+Tkのメインスレッドが止まっていないかを監視する。
+メインスレッドでは after で一定間隔の心拍を記録し、別スレッドで心拍が途切れていないかを確認する。
+しきい値を超えて止まった場合は、その時点のメインスレッドのスタックを取得してログに書き出す。
+"""
+import os
+import sys
+import threading
+import time
+import traceback
+
+DEFAULT_THRESHOLD_MS = 1000
+HEARTBEAT_INTERVAL_MS = 100
+MAX_SAMPLES_PER_STALL = 5  # 1回の停止で取得するスタックの最大数
+
+
+class StallWatchdog:
+    def __init__(self, root, threshold_ms=DEFAULT_THRESHOLD_MS, interval_ms=HEARTBEAT_INTERVAL_MS, log_path=None):
+        self.root = root
+        self.threshold = threshold_ms / 1000
+        self.interval_ms = interval_ms
+        self.log_path = log_path
+        self.main_thread_id = threading.get_ident()
+        self.last_beat = time.perf_counter()
+        self.expected_beat = None
+        self.stall_start = None  # 停止を検出した時点の最後の心拍
+        self.samples = 0
+        self.stall_count = 0
+        self.max_latency_ms = 0.0
+        self.stop_event = threading.Event()
+        self.after_id = None
+        self.thread = None
+
+    def start(self):
+        """メインスレッドから呼ぶ"""
+        self.main_thread_id = threading.get_ident()
+        self.last_beat = time.perf_counter()
+        self.expected_beat = self.last_beat + self.interval_ms / 1000
+        self.after_id = self.root.after(self.interval_ms, self.beat)
+        self.thread = threading.Thread(target=self.watch, daemon=True, name="stall-watchdog")
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.after_id is not None:
+            try:
+                self.root.after_cancel(self.after_id)
+            except Exception:
+                pass
+            self.after_id = None
+
+    def beat(self):
+        """心拍（メインスレッドで実行）。予定時刻からの遅れをイベントループの遅延として記録する"""
+        now = time.perf_counter()
+        latency_ms = max(now - self.expected_beat, 0) * 1000
+        self.max_latency_ms = max(self.max_latency_ms, latency_ms)
+        if self.stall_start is not None:
+            duration_ms = (now - self.stall_start) * 1000
+            self.log(f"メインスレッドの停止が解消しました（{duration_ms:.0f}ms）")
+            self.stall_start = None
+        self.last_beat = now
+        self.expected_beat = now + self.interval_ms / 1000
+        if not self.stop_event.is_set():
+            self.after_id = self.root.after(self.interval_ms, self.beat)
+
+    def watch(self):
+        """別スレッドで心拍が途切れていないか確認する"""
+        check_interval = min(self.threshold / 4, self.interval_ms / 1000)
+        next_sample = None
+        while not self.stop_event.wait(check_interval):
+            last_beat = self.last_beat
+            stalled_for = time.perf_counter() - last_beat
+            if stalled_for < self.threshold + self.interval_ms / 1000:
+                next_sample = None
+                continue
+            if self.stall_start != last_beat:
+                if self.last_beat != last_beat:
+                    # 確認中に心拍が届いた
+                    continue
+                # 新しい停止
+                self.stall_start = last_beat
+                self.stall_count += 1
+                self.samples = 0
+                next_sample = stalled_for
+            if next_sample is not None and stalled_for >= next_sample and self.samples < MAX_SAMPLES_PER_STALL:
+                self.samples += 1
+                self.log(
+                    f"メインスレッドが {stalled_for * 1000:.0f}ms 応答していません"
+                    f"（しきい値 {self.threshold * 1000:.0f}ms、{self.samples}回目の取得）\n"
+                    + self.main_thread_stack()
+                )
+                # 停止が続く場合は間隔を倍にしながら取得し直す
+                next_sample = stalled_for * 2
+
+    def main_thread_stack(self):
+        frame = sys._current_frames().get(self.main_thread_id)
+        if frame is None:
+            return "  （スタックを取得できませんでした）\n"
+        return "".join(traceback.format_stack(frame))
+
+    def log(self, message):
+        line = f"{time.strftime('%Y-%m-%d %H:%M:%S')} [{os.getpid()}] {message}"
+        print(line, file=sys.stderr)
+        if self.log_path:
+            try:
+                directory = os.path.dirname(self.log_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(line.rstrip("\n") + "\n")
+            except OSError:
+                pass
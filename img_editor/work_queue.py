@@ -0,0 +1,187 @@
+"""
+複数の作業者で同じ元フォルダを分担するための作業キュー（サーバー不要）。
+
+保存先フォルダの .leases/ に、作業中の画像ごとに「ファイル名.lease」を O_CREAT|O_EXCL で作成して取得する。
+同じ画像を取得できるのは1人だけで、保存が終わると「ファイル名.done」を作成して以降は誰も取得しない。
+取得中はリースの更新日時を定期的に更新し、LEASE_SECONDS 以上更新されていないリース（終了した作業者のもの）は
+他の作業者が取り直せる。更新日時は共有フォルダ側の時刻なので、各端末の時計は大きくずれていないこと。
+"""
+import glob
+import json
+import os
+import time
+
+LEASE_DIR_NAME = ".leases"
+LEASE_SUFFIX = ".lease"
+DONE_SUFFIX = ".done"
+LEASE_SECONDS = 600  # この時間更新されていないリースは期限切れ
+BATCH_SIZE = 20  # 1回に取得する画像の数
+KEEP_RETRIES = 10  # 他の作業者がリースを確認中のとき、元に戻されるのを待つ回数
+KEEP_RETRY_SECONDS = 0.02
+
+
+def default_owner():
+    """リースの所有者名（ホスト名-PID-乱数）。socket と uuid は起動時に読み込まないようここで読み込む"""
+    import socket
+    import uuid
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+class WorkQueue:
+    def __init__(self, dest_folder, batch_size=BATCH_SIZE, lease_seconds=LEASE_SECONDS, owner=None):
+        self.lease_dir = os.path.join(dest_folder, LEASE_DIR_NAME)
+        os.makedirs(self.lease_dir, exist_ok=True)
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.owner = owner or default_owner()
+        self.held = []  # 取得中の画像のファイル名
+
+    def _lease_path(self, name):
+        return os.path.join(self.lease_dir, name + LEASE_SUFFIX)
+
+    def _done_path(self, name):
+        return os.path.join(self.lease_dir, name + DONE_SUFFIX)
+
+    def _read_owner(self, path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f).get("owner")
+        except (OSError, ValueError):
+            return None
+
+    def _is_expired(self, path):
+        try:
+            return os.stat(path).st_mtime + self.lease_seconds < time.time()
+        except FileNotFoundError:
+            return True
+
+    def _break_expired(self, path):
+        """期限切れのリースを外す（外せた、または既になければTrue）"""
+        if not self._is_expired(path):
+            return False
+        owner = self._read_owner(path)
+        stale_path = f"{path}.{self.owner}.stale"
+        try:
+            # 名前の変更は1人しか成功しないので、同時に外そうとしても重複しない
+            os.rename(path, stale_path)
+        except FileNotFoundError:
+            return True
+        if self._read_owner(stale_path) != owner or not self._is_expired(stale_path):
+            # 確認してから外すまでの間に他の作業者が取り直していた場合は元に戻す
+            try:
+                os.link(stale_path, path)
+            except OSError:
+                pass
+            os.remove(stale_path)
+            return False
+        os.remove(stale_path)
+        return True
+
+    def try_claim(self, name):
+        """画像1件のリースを取得する（取得できたらTrue）"""
+        path = self._lease_path(name)
+        for _ in range(2):
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+            except FileExistsError:
+                if not self._break_expired(path):
+                    return False
+                continue
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"owner": self.owner, "claimed_at": time.time()}, f)
+            # 確認から取得までの間に他の作業者が保存を終えていた場合は返す
+            if os.path.exists(self._done_path(name)):
+                os.remove(path)
+                return False
+            self.held.append(name)
+            return True
+        return False
+
+    def claim(self, image_files):
+        """未処理で誰も取得していない画像を、名前順に最大 batch_size 件取得して返す"""
+        done = set()
+        leased = set()
+        for entry in os.listdir(self.lease_dir):
+            if entry.endswith(DONE_SUFFIX):
+                done.add(entry[:-len(DONE_SUFFIX)])
+            elif entry.endswith(LEASE_SUFFIX):
+                leased.add(entry[:-len(LEASE_SUFFIX)])
+
+        claimed = []
+        expired_candidates = []
+        for name in image_files:
+            if len(claimed) >= self.batch_size:
+                break
+            if name in done or name in self.held:
+                continue
+            if name in leased:
+                expired_candidates.append(name)
+                continue
+            if self.try_claim(name):
+                claimed.append(name)
+        # 未取得の画像が足りないときだけ、期限切れのリースを取り直す
+        for name in expired_candidates:
+            if len(claimed) >= self.batch_size:
+                break
+            if self._is_expired(self._lease_path(name)) and self.try_claim(name):
+                claimed.append(name)
+        return sorted(claimed)
+
+    def confirm(self, name):
+        """name のリースを今も自分が持っているか確認して更新する（期限切れで他の作業者に移っていればFalse）"""
+        return name in self.held and self._keep(name)
+
+    def _keep(self, name):
+        path = self._lease_path(name)
+        for _ in range(KEEP_RETRIES):
+            try:
+                # 確認より先に更新する（期限切れとして外されかけていても、外す側の再確認で元に戻される）
+                os.utime(path)
+            except FileNotFoundError:
+                # 他の作業者が期限切れか確認するため .stale に名前を変えている間は、戻されるのを待って確認し直す
+                if not self._is_being_checked(path):
+                    break
+                time.sleep(KEEP_RETRY_SECONDS)
+                continue
+            if self._read_owner(path) == self.owner:
+                return True
+            break
+        self.held.remove(name)
+        return False
+
+    def _is_being_checked(self, path):
+        return bool(glob.glob(glob.escape(path) + ".*.stale"))
+
+    def mark_done(self, name):
+        """保存が終わった画像を処理済みにし、リースを外す（リースを失っていた場合は ValueError）"""
+        if not self.confirm(name):
+            raise ValueError(f"{name} のリースは期限切れのため他の作業者に移っています")
+        with open(self._done_path(name), "w", encoding="utf-8") as f:
+            json.dump({"owner": self.owner, "done_at": time.time()}, f)
+        self.release(name)
+
+    def release(self, name):
+        """リースを外す（他の作業者が取得し直していた場合はそのままにする）"""
+        if name in self.held:
+            self.held.remove(name)
+        path = self._lease_path(name)
+        if self._read_owner(path) == self.owner:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def release_all(self):
+        for name in list(self.held):
+            self.release(name)
+
+    def renew(self):
+        """取得中のリースの更新日時を更新し、期限切れで他の作業者に移ったものを返す"""
+        return [name for name in list(self.held) if not self._keep(name)]
+
+
+def add_argument(parser):
+    parser.add_argument(
+        "--work-queue", action="store_true",
+        help="保存先フォルダのリースで画像を分担する（複数人で同じ元フォルダを処理する場合）"
+    )